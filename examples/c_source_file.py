@@ -3,8 +3,8 @@ Create a wordcloud from a single C source file
 """
 
 # this package
-from wordle import Wordle, export_wordcloud
+from wordle import Wordle
 
 w = Wordle(random_state=5678)
-w.generate_from_file("example.c", outfile="c_wordcloud.svg")
-export_wordcloud(w, outfile="c_wordcloud.png")
+w.generate_from_file("example.c")
+w.export("c_wordcloud.svg", "c_wordcloud.png")
@@ -5,8 +5,8 @@ https://github.com/python-visualization/folium
 """
 
 # this package
-from wordle import Wordle, export_wordcloud
+from wordle import Wordle
 
 w = Wordle(random_state=5678)
-w.generate_from_git("https://github.com/python-visualization/folium", outfile="folium_wordcloud.svg")
-export_wordcloud(w, outfile="folium_wordcloud.png")
+w.generate_from_git("https://github.com/python-visualization/folium")
+w.export("folium_wordcloud.svg", "folium_wordcloud.png")
@@ -6,10 +6,10 @@ Create a wordcloud from a single Python source file
 import pathlib
 
 # this package
-from wordle import Wordle, export_wordcloud
+from wordle import Wordle
 
 filename = pathlib.Path('.').absolute().parent / "wordle/__init__.py"
 
 w = Wordle(random_state=5678)
-w.generate_from_file(filename, outfile="python_wordcloud.svg")
-export_wordcloud(w, outfile="python_wordcloud.png")
+w.generate_from_file(filename)
+w.export("python_wordcloud.svg", "python_wordcloud.png")
@@ -0,0 +1,64 @@
+# stdlib
+from typing import Optional
+
+# 3rd party
+import pytest
+from domdf_python_tools.paths import PathPlus
+
+# this package
+from wordle.filters import BINARY, GENERATED, MINIFIED, TOO_LARGE, SourceFilter
+
+source = b"def greet(name):\n\treturn f'Hello {name}'\n" * 10
+
+
+@pytest.mark.parametrize(
+		"data, reason",
+		[
+				pytest.param(source, None, id="source"),
+				pytest.param(b'', None, id="empty"),
+				pytest.param(b"\x89PNG\r\n\x1a\n\0\0\0\rIHDR", BINARY, id="binary"),
+				pytest.param(b"var a=1;" * 100, MINIFIED, id="minified"),
+				pytest.param(b"// Code generated by protoc-gen-go. DO NOT EDIT.\n" + source, GENERATED, id="go"),
+				pytest.param(b"# @generated by some tool\n" + source, GENERATED, id="@generated"),
+				pytest.param(b"/* Generated by Cython 3.0.0 */\n" + source, GENERATED, id="cython"),
+				]
+		)
+def test_check_data(data: bytes, reason: Optional[str]):
+	assert SourceFilter().check_data(data) == reason
+
+
+def test_check_data_options():
+	assert SourceFilter(max_size=100).check_data(source) == TOO_LARGE
+	assert SourceFilter(max_size=100).check_data(source[:50]) is None
+	assert SourceFilter(max_size=100).check_data(source[:50], size=1000) == TOO_LARGE
+
+	assert SourceFilter(binary=False).check_data(b"abc\0def") is None
+	assert SourceFilter(max_line_length=None).check_data(b"var a=1;" * 100) is None
+	assert SourceFilter(generated_markers=None).check_data(b"# @generated\n") is None
+	assert SourceFilter(generated_markers=["made by hand"]).check_data(b"# Made By Hand\n") == GENERATED
+
+	# Markers are only looked for at the top of the file.
+	assert SourceFilter().check_data(source + b"# @generated\n") is None
+	assert SourceFilter(marker_lines=100).check_data(source + b"# @generated\n") == GENERATED
+
+	# Only the start of the file is examined.
+	assert SourceFilter(sniff_size=len(source)).check_data(source + b"\0") is None
+
+
+def test_check(tmp_pathplus: PathPlus):
+	file_filter = SourceFilter(max_size=1000)
+
+	(tmp_pathplus / "source.py").write_bytes(source)
+	(tmp_pathplus / "image.c").write_bytes(b"\0" * 10)
+	(tmp_pathplus / "big.py").write_bytes(source * 10)
+
+	assert file_filter.check(tmp_pathplus / "source.py") is None
+	assert file_filter.check(tmp_pathplus / "image.c") == BINARY
+	assert file_filter.check(tmp_pathplus / "big.py", name="big.py") == TOO_LARGE
+	assert file_filter.check("generated.py", b"# This file is autogenerated\n") == GENERATED
+
+	assert file_filter.skipped == {
+			str(tmp_pathplus / "image.c"): BINARY,
+			"big.py": TOO_LARGE,
+			"generated.py": GENERATED,
+			}
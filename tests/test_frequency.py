@@ -0,0 +1,520 @@
+# stdlib
+import re
+import tracemalloc
+import typing
+from collections import Counter
+from typing import Any, Dict, Optional
+
+# 3rd party
+import pygments.lexers  # type: ignore[import-untyped]
+import pygments.util  # type: ignore[import-untyped]
+import pytest
+from domdf_python_tools.paths import PathPlus
+from dulwich import porcelain
+from dulwich.errors import NotTreeError
+from dulwich.object_store import tree_lookup_path
+from dulwich.objects import Commit
+from dulwich.repo import Repo
+
+# this package
+from wordle import frequency
+from wordle.cache import MirrorCache, TokenCache
+from wordle.filters import BINARY, GENERATED, SourceFilter
+from wordle.frequency import (
+		_get_lexer,
+		_walk_directory,
+		frequency_from_directory,
+		frequency_from_file,
+		frequency_from_git,
+		frequency_from_repos,
+		frequency_history,
+		get_tokens
+		)
+
+examples_dir = PathPlus(__file__).parent.parent / "examples"
+src_dir = PathPlus(__file__).parent.parent / "wordle"
+
+
+def _fail_tokenize(filename, *args, **kwargs) -> Counter:  # pragma: no cover
+	raise AssertionError(f"{filename} should not have been tokenized")
+
+
+@pytest.fixture()
+def source_tree(tmp_pathplus: PathPlus) -> PathPlus:
+	root = tmp_pathplus / "src"
+
+	for idx in range(10):
+		subdir = root / f"pkg_{idx}"
+		subdir.maybe_make(parents=True)
+
+		for file in [src_dir / "utils.py", *examples_dir.glob("*.py"), examples_dir / "example.c"]:
+			(subdir / file.name).write_bytes(file.read_bytes())
+
+	return root
+
+
+def _commit_all(repo_dir: PathPlus, message: str) -> str:
+	with Repo(str(repo_dir)) as repo:
+		porcelain.add(repo, paths=[str(p) for p in repo_dir.rglob("*") if ".git" not in p.parts and p.is_file()])
+		status = porcelain.status(repo)
+		if status.staged["delete"]:
+			porcelain.remove(repo, paths=[str(repo_dir / p.decode()) for p in status.staged["delete"]], cached=True)
+		sha = porcelain.commit(repo, message, author=b"A <a@b.c>", committer=b"A <a@b.c>")
+
+	return sha.decode("UTF-8")
+
+
+def _get_head(repo_dir: PathPlus) -> str:
+	with Repo(str(repo_dir)) as repo:
+		return repo.head().decode("UTF-8")
+
+
+@pytest.fixture()
+def git_repo(source_tree: PathPlus) -> PathPlus:
+	with porcelain.init(str(source_tree)):
+		pass
+
+	_commit_all(source_tree, "Initial commit")
+
+	return source_tree
+
+
+def test_frequency_from_directory_workers(source_tree: PathPlus, monkeypatch):
+	serial = frequency_from_directory(source_tree)
+
+	monkeypatch.setattr(frequency, "_PARALLEL_THRESHOLD", 0)
+	parallel = frequency_from_directory(source_tree, workers=2)
+
+	assert parallel == serial
+	assert list(parallel) == list(serial)
+
+
+def test_token_cache(source_tree: PathPlus, tmp_pathplus: PathPlus):
+	cache = TokenCache(tmp_pathplus / "cache")
+	src_file = source_tree / "pkg_0" / "example.c"
+
+	uncached = frequency_from_file(src_file)
+	assert frequency_from_file(src_file, cache=cache) == uncached
+	assert cache.size() > 0
+
+	digest = cache.digest(src_file.read_bytes())
+	assert cache.get(digest, 'C') == uncached
+	assert list(cache.get(digest, 'C')) == list(uncached)  # type: ignore[arg-type]
+	assert cache.get(digest, "Python") is None
+
+	assert frequency_from_directory(source_tree, cache=cache) == frequency_from_directory(source_tree)
+
+
+def test_token_cache_eviction(tmp_pathplus: PathPlus):
+	cache = TokenCache(tmp_pathplus / "cache", max_size=0)
+	cache.put(cache.digest(b"abc"), 'C', Counter(abc=1))
+	assert cache.get(cache.digest(b"abc"), 'C') == Counter(abc=1)
+
+	cache.prune()
+	assert cache.size() == 0
+	assert cache.get(cache.digest(b"abc"), 'C') is None
+
+
+def test_frequency_from_directory_manifest(source_tree: PathPlus, tmp_pathplus: PathPlus, monkeypatch):
+	manifest = tmp_pathplus / "manifest.json"
+
+	assert frequency_from_directory(source_tree, manifest=manifest) == frequency_from_directory(source_tree)
+	assert manifest.is_file()
+
+	# Unchanged files are not tokenized again.
+	expected = frequency_from_directory(source_tree)
+
+	with monkeypatch.context() as m:
+		m.setattr(frequency, "get_tokens", _fail_tokenize)
+		assert frequency_from_directory(source_tree, manifest=manifest) == expected
+
+	# Added, modified and deleted files
+	(source_tree / "pkg_0" / "new.py").write_text("def brand_new_function(): pass\n")
+	(source_tree / "pkg_1" / "example.c").write_text("int modified_variable = 1;\n")
+	(source_tree / "pkg_2" / "utils.py").unlink()
+
+	incremental = frequency_from_directory(source_tree, manifest=manifest, exclude_words=["def"])
+	full = frequency_from_directory(source_tree, exclude_words=["def"])
+	assert incremental == full
+	assert incremental["brand_new_function"] == 1
+	assert incremental["modified_variable"] == 1
+	assert "def" not in incremental
+
+	# Newly excluded directories are removed from the totals.
+	incremental = frequency_from_directory(source_tree, manifest=manifest, exclude_dirs=["pkg_0"])
+	assert incremental == frequency_from_directory(source_tree, exclude_dirs=["pkg_0"])
+	assert "brand_new_function" not in incremental
+
+
+@pytest.mark.parametrize(
+		"options",
+		[
+				pytest.param({"chunk_size": 16}, id="chunk_size"),
+				pytest.param({"include_extensions": [".py"]}, id="include_extensions"),
+				pytest.param({"exclude_extensions": [".c"]}, id="exclude_extensions"),
+				pytest.param({"file_filter": SourceFilter()}, id="file_filter"),
+				pytest.param({"file_filter": SourceFilter(max_size=1_000_000)}, id="file_filter_settings"),
+				]
+		)
+def test_frequency_from_directory_manifest_options(
+		source_tree: PathPlus,
+		tmp_pathplus: PathPlus,
+		monkeypatch,
+		options: Dict[str, Any],
+		):
+	manifest = tmp_pathplus / "manifest.json"
+	frequency_from_directory(source_tree, manifest=manifest, file_filter=SourceFilter(max_line_length=None))
+
+	# The manifest is rebuilt when the options change.
+	tokenized = []
+
+	def recording_get_tokens(filename, *args, **kwargs) -> Counter:
+		tokenized.append(filename)
+		return get_tokens(filename, *args, **kwargs)
+
+	with monkeypatch.context() as m:
+		m.setattr(frequency, "get_tokens", recording_get_tokens)
+		counts = frequency_from_directory(source_tree, manifest=manifest, **options)
+
+	assert counts == frequency_from_directory(source_tree, **options)
+	assert tokenized
+
+	# And is reused when they don't.
+	with monkeypatch.context() as m:
+		m.setattr(frequency, "get_tokens", _fail_tokenize)
+		assert frequency_from_directory(source_tree, manifest=manifest, **options) == counts
+
+
+def test_walk_directory(source_tree: PathPlus):
+	(source_tree / ".git").maybe_make()
+	(source_tree / ".git" / "config.py").write_text("x = 1\n")
+	(source_tree / "Makefile").write_text("all:\n")
+
+	exclude_pattern = re.compile("(?:.git)|(?:pkg_[12])")
+
+	expected = [
+			path for path in source_tree.rglob("**/*.*")
+			if path.is_file() and not exclude_pattern.match(path.relative_to(source_tree).as_posix())
+			]
+	files = list(_walk_directory(source_tree, exclude_pattern))
+
+	assert files == expected
+	assert not any(path.parent.name in {".git", "pkg_1", "pkg_2"} for path in files)
+	assert source_tree / "pkg_0" / "example.c" in files
+
+
+def test_get_tokens(tmp_pathplus: PathPlus):
+	(tmp_pathplus / "greet.py").write_lines([
+			"def greet(name: str) -> str:  # a comment",
+			'\t"""Say hello."""',
+			'\tmessage = f"Hello {name}!\\n"',
+			"\treturn 'x' + message",
+			])
+
+	assert get_tokens(tmp_pathplus / "greet.py") == {
+			"def": 1,
+			"greet": 1,
+			"name": 2,
+			"str": 2,
+			'"""Say': 1,
+			'hello."""': 1,
+			"message": 2,
+			"Hello": 1,
+			"return": 1,
+			'x': 1,
+			}
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_get_tokens_chunk_size(tmp_pathplus: PathPlus, newline: str):
+	sources = [*sorted(examples_dir.glob("*.py")), src_dir / "utils.py", src_dir / "cache.py"]
+	source = "\n\n".join(file.read_text() for file in sources) * 10
+	big_file = tmp_pathplus / "big_file.py"
+	big_file.write_bytes(("\ufeff\n" + source).replace("\n", newline).encode("UTF-8"))
+
+	whole = get_tokens(big_file)
+	chunked = get_tokens(big_file, chunk_size=8192)
+	assert chunked == whole
+	assert list(chunked) == list(whole)
+
+	# Files smaller than the chunk size are read in one go
+	assert get_tokens(big_file, chunk_size=big_file.stat().st_size) == whole
+
+	cache = TokenCache(tmp_pathplus / "cache")
+	assert frequency_from_file(big_file, cache=cache, chunk_size=8192) == whole
+	assert frequency_from_file(big_file, cache=cache, chunk_size=8192) == whole
+
+
+def test_get_tokens_chunk_size_memory(tmp_pathplus: PathPlus):
+	source = (examples_dir / "python.py").read_text()
+	small_file = tmp_pathplus / "small_file.py"
+	small_file.write_text(source * 100)
+	big_file = tmp_pathplus / "big_file.py"
+	big_file.write_text(source * 400)
+
+	def peak_memory(filename: PathPlus) -> int:
+		tracemalloc.start()
+		try:
+			get_tokens(filename, chunk_size=8192)
+			return tracemalloc.get_traced_memory()[1]
+		finally:
+			tracemalloc.stop()
+
+	# Load the lexer first, so only the memory used to read and lex the file is measured.
+	peak_memory(small_file)
+
+	# The peak memory use depends on the chunk size, not the size of the file.
+	assert peak_memory(big_file) < peak_memory(small_file) * 1.5
+
+
+def test_frequency_from_directory_extensions(source_tree: PathPlus):
+	python_only = frequency_from_directory(source_tree, include_extensions=["py"])
+	c_only = frequency_from_directory(source_tree, include_extensions=[".C"])
+	no_c = frequency_from_directory(source_tree, exclude_extensions=[".c"])
+
+	assert python_only == no_c
+	assert python_only + c_only == frequency_from_directory(source_tree)
+	single_c = frequency_from_directory(source_tree / "pkg_0", include_extensions=[".c"])
+	assert c_only == {word: count * 10 for word, count in single_c.items()}
+
+
+@pytest.mark.parametrize(
+		"filename",
+		[
+				"example.c",
+				"module.py",
+				"other.py",
+				"Makefile",
+				"CMakeLists.txt",
+				"notes.txt",
+				"Dockerfile",
+				"setup.cfg",
+				"archive.tar.gz",
+				"image.png",
+				"README",
+				],
+		)
+def test_get_lexer(filename: str):
+	try:
+		expected = type(pygments.lexers.get_lexer_for_filename(filename))
+	except pygments.util.ClassNotFound:
+		expected = None
+
+	lexer = _get_lexer(filename)
+	assert (None if lexer is None else type(lexer)) is expected
+	assert _get_lexer(filename) is lexer
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_frequency_from_git_without_checkout(git_repo: PathPlus, workers: Optional[int], monkeypatch):
+	monkeypatch.setattr(frequency, "_PARALLEL_THRESHOLD", 0)
+
+	(git_repo / "untracked.py").write_text("untracked_function = None\n")
+
+	expected = frequency_from_git(git_repo.as_uri(), exclude_dirs=["pkg_1"], exclude_words=["def"])
+	assert "untracked_function" not in expected
+
+	tree_counts = frequency_from_git(
+			git_repo.as_uri(),
+			exclude_dirs=["pkg_1"],
+			exclude_words=["def"],
+			workers=workers,
+			checkout=False,
+			)
+	assert tree_counts == expected
+
+
+@pytest.mark.parametrize("checkout", [True, False])
+def test_frequency_from_git_mirror_cache(git_repo: PathPlus, tmp_pathplus: PathPlus, checkout: bool):
+	mirror_cache = MirrorCache(tmp_pathplus / "mirrors")
+	git_url = git_repo.as_uri()
+
+	first_sha = _get_head(git_repo)
+	expected = frequency_from_git(git_url)
+	assert frequency_from_git(git_url, mirror_cache=mirror_cache, checkout=checkout) == expected
+	assert mirror_cache.path_for(git_url).is_dir()
+
+	# New commits are fetched into the existing mirror.
+	(git_repo / "pkg_0" / "new.py").write_text("def brand_new_function(): pass\n")
+	_commit_all(git_repo, "Second commit")
+
+	counts = frequency_from_git(git_url, mirror_cache=mirror_cache, checkout=checkout)
+	assert counts == frequency_from_git(git_url)
+	assert counts["brand_new_function"] == 1
+
+	# Older commits are found in the mirror.
+	assert frequency_from_git(git_url, sha=first_sha, mirror_cache=mirror_cache, checkout=checkout) == expected
+
+
+def test_frequency_from_git_not_a_tree(git_repo: PathPlus):
+	with Repo(str(git_repo)) as repo:
+		commit = repo[repo.head()]
+		assert isinstance(commit, Commit)
+		_, blob_id = tree_lookup_path(repo.__getitem__, commit.tree, b"pkg_0/example.c")
+
+	with pytest.raises(NotTreeError):
+		frequency_from_git(git_repo.as_uri(), sha=blob_id.decode("ASCII"), checkout=False)
+
+
+def test_mirror_cache_eviction(git_repo: PathPlus, tmp_pathplus: PathPlus):
+	mirror_cache = MirrorCache(tmp_pathplus / "mirrors", max_size=0)
+
+	first = mirror_cache.mirror(git_repo.as_uri())
+	assert first.is_dir()
+
+	# The most recently used mirror is kept even though the cache is too big.
+	second = mirror_cache.mirror(git_repo.as_uri() + '/')
+	assert second.is_dir()
+	assert not first.exists()
+
+	mirror_cache.prune()
+	assert mirror_cache.size() == 0
+
+
+def test_frequency_history(git_repo: PathPlus):
+	shas = [_get_head(git_repo)]
+
+	(git_repo / "pkg_0" / "new.py").write_text("def brand_new_function(): pass\n")
+	shas.append(_commit_all(git_repo, "Add a file"))
+
+	(git_repo / "pkg_1" / "example.c").write_text("int modified_variable = 1;\n")
+	(git_repo / "pkg_2" / "utils.py").unlink()
+	shas.append(_commit_all(git_repo, "Modify and delete files"))
+
+	git_url = git_repo.as_uri()
+	kwargs: Dict[str, Any] = {"exclude_words": ["def"], "exclude_dirs": ["pkg_3"]}
+
+	history = frequency_history(git_url, shas, **kwargs)
+	assert [sha for sha, _ in history] == shas
+
+	for sha, counts in history:
+		assert counts == frequency_from_git(git_url, sha=sha, checkout=False, **kwargs)
+
+	assert frequency_history(git_url, f"{shas[0]}..{shas[2]}", **kwargs) == history[1:]
+	assert frequency_history(git_url, "..HEAD", **kwargs) == history
+
+
+def test_frequency_history_bounded_memo(git_repo: PathPlus, monkeypatch):
+	shas = [_get_head(git_repo)]
+	(git_repo / "pkg_0" / "new.py").write_text("def brand_new_function(): pass\n")
+	shas.append(_commit_all(git_repo, "Add a file"))
+
+	expected = frequency_history(git_repo.as_uri(), shas)
+
+	monkeypatch.setattr(frequency, "_BLOB_MEMO_SIZE", 10)
+	tokenizers = []
+
+	class RecordingBlobTokenizer(frequency._BlobTokenizer):
+
+		def __init__(self, *args, **kwargs):
+			super().__init__(*args, **kwargs)
+			tokenizers.append(self)
+
+	monkeypatch.setattr(frequency, "_BlobTokenizer", RecordingBlobTokenizer)
+
+	assert frequency_history(git_repo.as_uri(), shas) == expected
+	assert 0 < tokenizers[0]._memo.size <= 10
+
+
+def test_frequency_from_repos(git_repo: PathPlus, tmp_pathplus: PathPlus, monkeypatch):
+	# A fork with one extra commit; all other blobs are shared with the original.
+	fork = tmp_pathplus / "fork"
+	with porcelain.clone(git_repo.as_uri(), str(fork)):
+		pass
+
+	(fork / "pkg_0" / "new.py").write_text("def brand_new_function(): pass\n")
+	_commit_all(fork, "Add a file")
+
+	git_urls = [git_repo.as_uri(), fork.as_uri()]
+	expected = frequency_from_git(git_urls[0], checkout=False) + frequency_from_git(git_urls[1], checkout=False)
+
+	tokenized = []
+	count_tokens = frequency._count_tokens
+
+	def counting_count_tokens(lex, source: str) -> Counter:
+		tokenized.append(source)
+		return count_tokens(lex, source)
+
+	monkeypatch.setattr(frequency, "_count_tokens", counting_count_tokens)
+	cache = TokenCache(tmp_pathplus / "cache")
+
+	counts = frequency_from_repos(git_urls, cache=cache)
+	assert counts == expected
+	assert counts["brand_new_function"] == 1
+
+	# Each distinct file is only tokenized once, even though it appears 10 times in each repository.
+	assert len(tokenized) == len(set(tokenized)) == len(list(examples_dir.glob("*.py"))) + 3
+
+	# Blobs in the cache are not tokenized again.
+	excluded = frequency_from_git(git_urls[0], exclude_dirs=["pkg_1"])
+	monkeypatch.setattr(frequency, "_count_tokens", _fail_tokenize)
+	assert frequency_from_repos(git_urls, cache=cache) == expected
+	assert frequency_from_repos(git_urls[:1], cache=cache, exclude_dirs=["pkg_1"]) == excluded
+
+
+@pytest.mark.parametrize("checkout", [True, False])
+def test_file_filter(git_repo: PathPlus, checkout: bool):
+	expected = frequency_from_git(git_repo.as_uri())
+
+	(git_repo / "pkg_0" / "generated.py").write_text("# This file is autogenerated.\ngenerated_name = 1\n")
+	(git_repo / "pkg_1" / "data.c").write_bytes(b"int binary_name;\0\0\0")
+	_commit_all(git_repo, "Add generated and binary files")
+
+	file_filter = SourceFilter()
+	assert frequency_from_git(git_repo.as_uri(), checkout=checkout, file_filter=file_filter) == expected
+	assert file_filter.skipped == {"pkg_0/generated.py": GENERATED, "pkg_1/data.c": BINARY}
+
+	file_filter = SourceFilter()
+	history = frequency_history(git_repo.as_uri(), "..HEAD", file_filter=file_filter)
+	assert history[-1][1] == expected
+	assert file_filter.skipped == {"pkg_0/generated.py": GENERATED, "pkg_1/data.c": BINARY}
+
+	file_filter = SourceFilter()
+	assert frequency_from_directory(git_repo, file_filter=file_filter) == expected
+	assert file_filter.skipped == {"pkg_0/generated.py": GENERATED, "pkg_1/data.c": BINARY}
+
+
+def test_file_filter_reads_blobs_once(git_repo: PathPlus, monkeypatch):
+	reads: typing.Counter[bytes] = Counter()
+	read = frequency._BlobTokenizer._read
+
+	def counting_read(self, repo_path: str, blob_id: bytes) -> bytes:
+		reads[blob_id] += 1
+		return read(self, repo_path, blob_id)
+
+	monkeypatch.setattr(frequency._BlobTokenizer, "_read", counting_read)
+
+	frequency_from_git(git_repo.as_uri(), checkout=False, file_filter=SourceFilter())
+	assert reads and set(reads.values()) == {1}
+
+	reads.clear()
+	frequency_history(git_repo.as_uri(), "..HEAD", file_filter=SourceFilter())
+	assert reads and set(reads.values()) == {1}
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_max_vocabulary(git_repo: PathPlus, workers: Optional[int], monkeypatch):
+	monkeypatch.setattr(frequency, "_PARALLEL_THRESHOLD", 0)
+
+	exact = frequency_from_directory(git_repo)
+	top_words = [word for word, _ in exact.most_common(4)]
+	error_bound = sum(exact.values()) / 51
+
+	results = [
+			frequency_from_directory(git_repo, workers=workers, max_vocabulary=50),
+			frequency_from_git(git_repo.as_uri(), workers=workers, checkout=False, max_vocabulary=50),
+			frequency_from_repos([git_repo.as_uri()], workers=workers, max_vocabulary=50),
+			]
+
+	for approximate in results:
+		assert len(approximate) <= 50
+		assert [word for word, _ in approximate.most_common(4)] == top_words
+		assert all(exact[word] - error_bound <= approximate[word] <= exact[word] for word in exact)
+
+	# A large enough capacity gives the exact counts.
+	assert frequency_from_directory(git_repo, workers=workers, max_vocabulary=len(exact)) == exact
+
+
+def test_max_vocabulary_manifest(source_tree: PathPlus, tmp_pathplus: PathPlus):
+	with pytest.raises(ValueError, match="'manifest' and 'max_vocabulary' cannot be used together"):
+		frequency_from_directory(source_tree, manifest=tmp_pathplus / "manifest.json", max_vocabulary=20)
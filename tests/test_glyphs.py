@@ -0,0 +1,73 @@
+# 3rd party
+import numpy
+from PIL import Image, ImageDraw, ImageFont  # type: ignore[import-untyped]
+from wordcloud.wordcloud import FONT_PATH  # type: ignore[import-untyped]
+
+# this package
+from wordle.glyphs import _TRANSPOSED_BBOX, GlyphCache, _LRUCache
+
+
+def test_lru_cache():
+	cache: _LRUCache[str] = _LRUCache(10, len)
+
+	assert cache.get("a", lambda: "aaaa") == "aaaa"
+	assert cache.get("b", lambda: "bbbb") == "bbbb"
+	assert cache.get("a", lambda: "????") == "aaaa"
+	assert (cache.hits, cache.misses, cache.size) == (1, 2, 8)
+
+	# "b" is the least recently used.
+	assert cache.get("c", lambda: "cccc") == "cccc"
+	assert len(cache) == 2
+	assert cache.get("b", lambda: "BBBB") == "BBBB"
+	assert cache.get("c", lambda: "????") == "cccc"
+
+	# Values larger than the cache are returned but not stored.
+	assert cache.get("d", lambda: 'd' * 11) == 'd' * 11
+	assert cache.size == 8
+
+	cache.clear()
+	assert (len(cache), cache.size, cache.hits, cache.misses) == (0, 0, 0, 0)
+
+
+def test_glyph_cache():
+	cache = GlyphCache()
+	draw = ImageDraw.Draw(Image.new('L', (1, 1)))
+
+	for orientation in [None, Image.ROTATE_90]:
+		font = ImageFont.TransposedFont(ImageFont.truetype(FONT_PATH, 37), orientation=orientation)
+		if _TRANSPOSED_BBOX:
+			expected_bbox = draw.textbbox((0, 0), "wordle", font, anchor="lt")
+		else:
+			# Pillow < 9.2
+			expected_bbox = (0, 0, *font.getsize("wordle"))
+
+		assert cache.bbox(FONT_PATH, 37, "wordle", orientation) == expected_bbox
+
+		expected = Image.new('L', (200, 200))
+		ImageDraw.Draw(expected).text((20, 30), "wordle", fill=255, font=font)
+
+		(left, top), mask = cache.glyph(FONT_PATH, 37, "wordle", orientation)
+		actual = Image.new('L', (200, 200))
+		actual.paste(mask, (20 + left, 30 + top))
+		assert (numpy.asarray(actual) == numpy.asarray(expected)).all()
+
+	misses = cache.misses
+	assert cache.glyph(FONT_PATH, 37, "wordle") is cache.glyph(FONT_PATH, 37, "wordle")
+	assert cache.font(FONT_PATH, 37) is cache.font(FONT_PATH, 37)
+	assert cache.misses == misses
+
+	assert cache.glyph(FONT_PATH, 37, ' ').mask is None
+
+	cache.clear()
+	assert cache.hits == cache.misses == 0
+
+
+def test_glyph_cache_bounded():
+	cache = GlyphCache(max_fonts=2, max_glyph_bytes=5000)
+
+	for size in range(10, 40):
+		cache.glyph(FONT_PATH, size, "wordle")
+
+	assert len(cache._fonts) == 2
+	assert 0 < cache._glyphs.size <= 5000
+	assert len(cache._glyphs) < 30
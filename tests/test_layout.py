@@ -0,0 +1,97 @@
+# stdlib
+import random
+
+# 3rd party
+import numpy
+import pytest
+
+# this package
+from wordle.layout import OccupancyMap
+
+
+def random_occupancy(seed: int, height: int = 90, width: int = 120) -> numpy.ndarray:
+	rng = numpy.random.RandomState(seed)
+	occupied = numpy.zeros((height, width), dtype=bool)
+
+	for _ in range(12):
+		x, y = rng.randint(0, height), rng.randint(0, width)
+		occupied[x:x + rng.randint(1, 30), y:y + rng.randint(1, 40)] = True
+
+	return occupied
+
+
+def free_positions(occupied: numpy.ndarray, size_x: int, size_y: int) -> numpy.ndarray:
+	# Position (i, j) covers rows i + 1 to i + size_x and columns j + 1 to j + size_y.
+	height, width = occupied.shape
+	free = numpy.zeros((max(height - size_x, 0), max(width - size_y, 0)), dtype=bool)
+
+	for i in range(free.shape[0]):
+		for j in range(free.shape[1]):
+			free[i, j] = not occupied[i + 1:i + size_x + 1, j + 1:j + size_y + 1].any()
+
+	return free
+
+
+def search(occupancy: OccupancyMap, size_x: int, size_y: int) -> numpy.ndarray:
+	expected_shape = (occupancy.height - size_x, occupancy.width - size_y)
+	free = numpy.zeros(expected_shape, dtype=bool)
+	found = occupancy._free_positions(size_x, size_y)
+
+	if found is not None:
+		area, row_offset, col_offset = found
+		free[row_offset:row_offset + area.shape[0], col_offset:col_offset + area.shape[1]] = area
+
+	return free
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+@pytest.mark.parametrize("size", [(1, 1), (3, 7), (10, 25), (24, 9), (40, 70)])
+def test_free_positions(seed: int, size):
+	occupied = random_occupancy(seed)
+	height, width = occupied.shape
+	occupancy = OccupancyMap(height, width, mask=occupied)
+	assert (search(occupancy, *size) == free_positions(occupied, *size)).all()
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_update(seed: int):
+	rng = numpy.random.RandomState(seed)
+	occupied = random_occupancy(seed)
+	height, width = occupied.shape
+	occupancy = OccupancyMap(height, width, mask=occupied)
+
+	for _ in range(20):
+		pixels = rng.random_sample((rng.randint(1, 30), rng.randint(1, 30))) > 0.5
+		x, y = rng.randint(-10, occupied.shape[0]), rng.randint(-10, occupied.shape[1])
+		occupancy.update(pixels, x, y)
+
+		# Place the pixels on a padded canvas, so they can be clipped by slicing.
+		padded = numpy.zeros((occupied.shape[0] + 60, occupied.shape[1] + 60), dtype=bool)
+		padded[x + 30:x + 30 + pixels.shape[0], y + 30:y + 30 + pixels.shape[1]] = pixels
+		occupied |= padded[30:-30, 30:-30]
+
+	assert (occupancy.occupied == occupied).all()
+	assert (occupancy.integral == occupied.cumsum(axis=1).cumsum(axis=0)).all()
+
+	for size in [(2, 2), (12, 30)]:
+		assert (search(occupancy, *size) == free_positions(occupied, *size)).all()
+
+
+@pytest.mark.parametrize("random_state", [random.Random(1234), numpy.random.RandomState(1234)])
+def test_sample_position(random_state):
+	occupied = random_occupancy(1)
+	height, width = occupied.shape
+	occupancy = OccupancyMap(height, width, mask=occupied)
+
+	for size in [(1, 1), (10, 25), (40, 70)]:
+		free = free_positions(occupied, *size)
+
+		for _ in range(10):
+			position = occupancy.sample_position(*size, random_state)
+			assert position is not None
+			assert free[position]
+
+	assert occupancy.sample_position(occupied.shape[0], 1, random_state) is None
+
+	occupancy.update(numpy.ones_like(occupied), 0, 0)
+	assert occupancy.sample_position(1, 1, random_state) is None
@@ -0,0 +1,93 @@
+# stdlib
+from collections import Counter
+
+# 3rd party
+import pytest
+from domdf_python_tools.paths import PathPlus
+from dulwich import porcelain
+from dulwich.repo import Repo
+
+# this package
+from wordle.frequency import frequency_from_directory, frequency_from_git
+from wordle.shard import main, run_shards
+from wordle.snapshot import Snapshot
+from wordle.utils import shard_of
+
+examples_dir = PathPlus(__file__).parent.parent / "examples"
+src_dir = PathPlus(__file__).parent.parent / "wordle"
+
+
+@pytest.fixture()
+def git_repo(tmp_pathplus: PathPlus) -> PathPlus:
+	root = tmp_pathplus / "src"
+
+	for idx in range(5):
+		subdir = root / f"pkg_{idx}"
+		subdir.maybe_make(parents=True)
+
+		for file in [*src_dir.glob("*.py"), *examples_dir.glob("*.py"), examples_dir / "example.c"]:
+			(subdir / file.name).write_bytes(file.read_bytes())
+
+	with porcelain.init(str(root)) as repo:
+		porcelain.add(repo, paths=[str(p) for p in root.rglob("*") if ".git" not in p.parts and p.is_file()])
+		porcelain.commit(repo, "Initial commit", author=b"A <a@b.c>", committer=b"A <a@b.c>")
+
+	return root
+
+
+def test_shard_of():
+	# The shard must not depend on the process or platform, e.g. through hash randomisation.
+	assert shard_of("wordle/__init__.py", 7) == 1
+	assert shard_of("wordle/__init__.py", 1) == 0
+
+	paths = [f"pkg_{idx}/file_{idx}.py" for idx in range(1000)]
+	sizes = Counter(shard_of(path, 4) for path in paths)
+	assert sorted(sizes) == [0, 1, 2, 3]
+	assert min(sizes.values()) > 200
+
+
+def test_shard(git_repo: PathPlus):
+	expected = frequency_from_directory(git_repo)
+
+	shards = [frequency_from_directory(git_repo, shard=(idx, 3)) for idx in range(3)]
+	assert all(shards)
+	assert sum(shards, Counter()) == expected
+
+	# The same files are in each shard when reading from the git object store.
+	for idx, shard_counts in enumerate(shards):
+		assert frequency_from_git(git_repo.as_uri(), checkout=False, shard=(idx, 3)) == shard_counts
+
+	with pytest.raises(ValueError, match="Invalid shard 3 of 3"):
+		frequency_from_directory(git_repo, shard=(3, 3))
+
+
+def test_shard_cli(git_repo: PathPlus, tmp_pathplus: PathPlus):
+	expected = frequency_from_directory(git_repo, exclude_words=["def"])
+
+	for idx in range(3):
+		args = ["map", str(git_repo), str(tmp_pathplus / f"{idx}.snap"), "--shard", str(idx), "--shards", '3']
+		assert main([*args, "--exclude-word", "def"]) == 0
+
+	shard_files = [str(tmp_pathplus / f"{idx}.snap") for idx in range(3)]
+	assert main(["reduce", str(tmp_pathplus / "merged.snap"), *shard_files]) == 0
+	assert Snapshot(tmp_pathplus / "merged.snap").to_counter() == expected
+
+
+def test_run_shards(git_repo: PathPlus, tmp_pathplus: PathPlus):
+	with Repo(str(git_repo)) as repo:
+		sha = repo.head().decode("UTF-8")
+
+	# Files which aren't committed aren't in the git tree.
+	(git_repo / "untracked.py").write_text("untracked_function = None\n")
+
+	run_shards(
+			git_repo.as_uri(),
+			tmp_pathplus / "merged.snap",
+			4,
+			processes=2,
+			map_args=["--git", "--sha", sha, "--include-extension", "py"],
+			)
+
+	expected = frequency_from_git(git_repo.as_uri(), checkout=False, include_extensions=[".py"])
+	assert Snapshot(tmp_pathplus / "merged.snap").to_counter() == expected
+	assert "untracked_function" not in expected
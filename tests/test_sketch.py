@@ -0,0 +1,95 @@
+# stdlib
+import random
+from collections import Counter
+from typing import List
+
+# 3rd party
+import pytest
+
+# this package
+from wordle.sketch import FrequencySketch
+
+
+def make_documents(seed: int = 1234, n_documents: int = 200) -> List[Counter]:
+	# Word frequencies in source code roughly follow Zipf's law.
+	rng = random.Random(seed)
+	vocabulary = [f"word{idx}" for idx in range(5000)]
+	weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+
+	return [Counter(rng.choices(vocabulary, weights, k=rng.randint(50, 500))) for _ in range(n_documents)]
+
+
+def check_guarantees(sketch: FrequencySketch, exact: Counter) -> None:
+	assert sketch.total == sum(exact.values())
+	assert sketch.error <= sketch.total / (sketch.capacity + 1)
+	assert len(sketch) <= 2 * sketch.capacity
+
+	for word, count in exact.items():
+		assert count - sketch.error <= sketch.get(word) <= count
+
+		if count > sketch.error:
+			assert sketch.get(word) > 0
+
+
+def test_sketch():
+	documents = make_documents()
+	exact: Counter = sum(documents, Counter())
+
+	sketch = FrequencySketch(100)
+	for document in documents:
+		sketch.update(document)
+
+	check_guarantees(sketch, exact)
+	assert sketch.error > 0
+
+	# The most frequent words are well separated, so are found exactly.
+	assert [word for word, _ in sketch.most_common(10)] == [word for word, _ in exact.most_common(10)]
+
+	counts = sketch.counts()
+	assert len(counts) <= 100
+	assert all(counts[word] == sketch.get(word) for word in counts)
+
+
+def test_sketch_exact():
+	documents = make_documents(n_documents=20)
+	exact: Counter = sum(documents, Counter())
+
+	sketch = FrequencySketch(len(exact))
+	for document in documents:
+		sketch.update(document)
+
+	assert sketch.error == 0
+	assert sketch.counts() == exact
+	assert sketch.most_common() == exact.most_common()
+
+
+def test_sketch_weight():
+	sketch = FrequencySketch(10).update({"foo": 2, "bar": 1}, weight=3)
+	assert sketch.total == 9
+	assert sketch.most_common() == [("foo", 6), ("bar", 3)]
+
+
+def test_sketch_merge():
+	documents = make_documents()
+	exact: Counter = sum(documents, Counter())
+
+	sketches = []
+	for idx in range(4):
+		sketch = FrequencySketch(100)
+		for document in documents[idx::4]:
+			sketch.update(document)
+		sketches.append(sketch)
+
+	merged = sketches[0]
+	for sketch in sketches[1:]:
+		merged.merge(sketch)
+
+	check_guarantees(merged, exact)
+
+	with pytest.raises(ValueError, match="Cannot merge sketches with capacities 100 and 50"):
+		merged.merge(FrequencySketch(50))
+
+
+def test_sketch_capacity():
+	with pytest.raises(ValueError, match="'capacity' must be at least 1"):
+		FrequencySketch(0)
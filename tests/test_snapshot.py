@@ -0,0 +1,84 @@
+# stdlib
+from collections import Counter
+
+# 3rd party
+import pytest
+from domdf_python_tools.paths import PathPlus
+
+# this package
+from wordle import Wordle
+from wordle.frequency import frequency_from_file
+from wordle.snapshot import Snapshot, merge_snapshots, write_snapshot
+
+examples_dir = PathPlus(__file__).parent.parent / "examples"
+src_dir = PathPlus(__file__).parent.parent / "wordle"
+
+
+def test_snapshot(tmp_pathplus: PathPlus):
+	counts = frequency_from_file(examples_dir / "example.c")
+	counts.update({"naïve": 3, "日本語": 2, "zero": 0})
+
+	write_snapshot(counts, tmp_pathplus / "example.snap")
+	snapshot = Snapshot(tmp_pathplus / "example.snap")
+
+	del counts["zero"]
+	assert len(snapshot) == len(counts)
+	assert snapshot.to_counter() == counts
+	assert list(snapshot.words()) == sorted(counts, key=lambda word: word.encode("UTF-8"))
+
+	assert snapshot.get("naïve") == 3
+	assert "日本語" in snapshot
+	assert "zero" not in snapshot
+	assert snapshot.get("zero") == 0
+
+	expected = sorted(counts.items(), key=lambda item: (-item[1], item[0].encode("UTF-8")))
+	assert snapshot.most_common() == expected
+
+	for n in range(len(counts) + 2):
+		assert snapshot.most_common(n) == expected[:n]
+
+
+def test_snapshot_empty(tmp_pathplus: PathPlus):
+	write_snapshot({}, tmp_pathplus / "empty.snap")
+	snapshot = Snapshot(tmp_pathplus / "empty.snap")
+
+	assert len(snapshot) == 0
+	assert snapshot.most_common(10) == []
+	assert snapshot.to_counter() == Counter()
+	assert "word" not in snapshot
+
+
+def test_snapshot_invalid(tmp_pathplus: PathPlus):
+	(tmp_pathplus / "not_a.snap").write_text("hello world")
+
+	with pytest.raises(ValueError, match="is not a wordle snapshot"):
+		Snapshot(tmp_pathplus / "not_a.snap")
+
+
+def test_merge_snapshots(tmp_pathplus: PathPlus, monkeypatch):
+	# Use small blocks so the merge crosses block boundaries.
+	monkeypatch.setattr("wordle.snapshot._BLOCK_SIZE", 7)
+
+	files = sorted(src_dir.glob("*.py"))
+	for idx, file in enumerate(files):
+		write_snapshot(frequency_from_file(file), tmp_pathplus / f"{idx}.snap")
+
+	merge_snapshots([tmp_pathplus / f"{idx}.snap" for idx in range(len(files))], tmp_pathplus / "merged.snap")
+
+	expected: Counter = sum((frequency_from_file(file) for file in files), Counter())
+	assert Snapshot(tmp_pathplus / "merged.snap").to_counter() == expected
+
+
+def test_generate_from_snapshot(tmp_pathplus: PathPlus):
+	counts = frequency_from_file(examples_dir / "example.c")
+	write_snapshot(counts, tmp_pathplus / "example.snap")
+
+	w = Wordle(random_state=5678, max_words=20)
+	w.generate_from_snapshot(tmp_pathplus / "example.snap", exclude_words=["int", "return"])
+
+	frequencies = dict(Snapshot(tmp_pathplus / "example.snap").most_common())
+	del frequencies["int"], frequencies["return"]
+	expected = Wordle(random_state=5678, max_words=20).generate_from_frequencies(frequencies)
+
+	assert len(w.layout_) == 20
+	assert w.layout_ == expected.layout_
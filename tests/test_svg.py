@@ -0,0 +1,71 @@
+# stdlib
+import io
+
+# 3rd party
+import fontTools.subset  # type: ignore[import-untyped]
+import pytest
+from domdf_python_tools.paths import PathPlus
+from wordcloud import WordCloud  # type: ignore[import-untyped]
+
+# this package
+from wordle import Wordle, export_wordcloud
+from wordle.svg import _font_faces, font_face_url, write_svg
+
+examples_dir = PathPlus(__file__).parent.parent / "examples"
+
+
+@pytest.fixture()
+def wordle() -> Wordle:
+	w = Wordle(random_state=5678, scale=1.5, prefer_horizontal=0.5)
+	return w.generate_from_file(examples_dir / "example.c")
+
+
+@pytest.mark.parametrize("embed_font", [True, False])
+@pytest.mark.parametrize("embed_image", [True, False])
+def test_to_svg(wordle: Wordle, embed_font: bool, embed_image: bool, monkeypatch):
+	# fontTools stamps the embedded font with the time it was saved, unless this is set.
+	monkeypatch.setenv("SOURCE_DATE_EPOCH", '0')
+	_font_faces.clear()
+
+	expected = WordCloud.to_svg(wordle, embed_font=embed_font, embed_image=embed_image)
+	assert wordle.to_svg(embed_font=embed_font, embed_image=embed_image) == expected
+
+	buffer = io.StringIO()
+	wordle.write_svg(buffer, embed_font=embed_font, embed_image=embed_image)
+	assert buffer.getvalue() == expected
+
+
+def test_write_svg_wordcloud(tmp_pathplus: PathPlus):
+	wc = WordCloud(random_state=5678).generate_from_frequencies({"hello": 3, "wörld": 2})
+
+	buffer = io.StringIO()
+	write_svg(wc, buffer)
+	assert buffer.getvalue() == wc.to_svg()
+
+	export_wordcloud(wc, tmp_pathplus / "wordcloud.svg")
+	assert (tmp_pathplus / "wordcloud.svg").read_text(encoding="UTF-8") == wc.to_svg()
+
+
+def test_font_face_url(wordle: Wordle, monkeypatch):
+	_font_faces.clear()
+	subsets = []
+	subset = fontTools.subset.Subsetter.subset
+
+	def counting_subset(self, font):  # noqa: MAN001,MAN002
+		subsets.append(1)
+		return subset(self, font)
+
+	monkeypatch.setattr(fontTools.subset.Subsetter, "subset", counting_subset)
+
+	url = font_face_url(wordle.font_path, "wordle")
+	assert url.startswith("data:application/font-woff;charset=utf-8;base64,")
+	assert font_face_url(wordle.font_path, "elwdro") == url
+	assert len(subsets) == 1
+
+	assert font_face_url(wordle.font_path, "wordle", optimize=False) != url
+	assert font_face_url(wordle.font_path, "wordles") != url
+	assert len(subsets) == 3
+
+	wordle.to_svg(embed_font=True)
+	wordle.to_svg(embed_font=True)
+	assert len(subsets) == 4
@@ -0,0 +1,222 @@
+# stdlib
+from typing import Dict, List, Tuple, Type
+
+# 3rd party
+import pygments  # type: ignore[import-untyped]
+import pygments.lexers  # type: ignore[import-untyped]
+import pytest
+from domdf_python_tools.paths import PathPlus
+from pygments.lexers.python import PythonLexer  # type: ignore[import-untyped]
+from pygments.token import Name  # type: ignore[import-untyped]
+
+# this package
+from wordle import tokenizers
+from wordle.frequency import _count_token_stream, _count_tokens, _finalise_counts, _iter_tokens
+from wordle.tokenizers import (
+		CppTokenizer,
+		CTokenizer,
+		JavaScriptTokenizer,
+		PythonTokenizer,
+		Tokenizer,
+		TypeScriptTokenizer,
+		Unsupported,
+		get_tokenizer,
+		lexer_fingerprint,
+		register_tokenizer,
+		unregister_tokenizer
+		)
+
+examples_dir = PathPlus(__file__).parent.parent / "examples"
+src_dir = PathPlus(__file__).parent.parent / "wordle"
+
+javascript_source = r"""#!/usr/bin/env node
+// A comment
+import { readFile } from "fs";
+
+const pattern = /ab+c/gi, half = total / 2;
+let greeting = `Hello ${name.trim()}, you have ${count > 1 ? "messages" : 'a message'}`;
+
+class Greeter extends Base {
+	#secret = 0x1F;
+	constructor() { super(); this.name = 'world\n'; }
+	async greet(...args) {
+		return await fetch(url).then(r => r.json()) ?? null;
+	}
+}
+
+export default function main() {
+	if (typeof window !== "undefined" && x instanceof Array) delete x[0];
+}
+"""
+
+typescript_source = r"""import type { Options } from "./options";
+
+declare module Foo.Bar {
+	export interface Point { x: number; y?: string }
+}
+
+@Component({ selector: "app" })
+export abstract class Shape<T extends object> implements Drawable {
+	private readonly sides: number = 4;
+	public area(scale: number): number { return this.sides * scale; }
+}
+
+enum Colour { Red, Green }
+let values: Array<string> = [];
+"""
+
+cpp_source = r"""#include <vector>
+#include "greet.hpp"
+
+#if 0
+This is never compiled.
+#endif
+
+namespace greet {
+
+template <typename T>
+class Greeter : public Base {
+public:
+	explicit Greeter(const std::string& name) : name_(name) {}
+
+	std::string greet() const {
+		auto raw = R"delim(Hello "world")delim";
+		return u8"Hello, " + name_ + '!';
+	}
+
+private:
+	std::string name_;
+};
+
+enum class Colour : char16_t { Red = -1, Green = 0x1F, Blue = 1'000 };
+
+}  // namespace greet
+
+int main(int argc, char** argv) {
+	switch (argc) {
+		case 1: break;
+		default: goto done;
+	}
+done:
+	return 0;
+}
+"""
+
+
+def pygments_counts(lexer_name: str, source: str) -> List[Tuple[str, int]]:
+	lex = pygments.lexers.get_lexer_by_name(lexer_name)
+	counts: Dict[str, int] = {}
+	_count_token_stream(_iter_tokens(lex, source), counts)
+	return list(_finalise_counts(counts).items())
+
+
+def tokenizer_counts(lexer_name: str, source: str) -> List[Tuple[str, int]]:
+	lex = pygments.lexers.get_lexer_by_name(lexer_name)
+	tokenizer = get_tokenizer(lex)
+	if tokenizer is None:
+		pytest.skip(f"The {lex.name} tokenizer wasn't written for Pygments {pygments.__version__}")
+
+	counts: Dict[str, int] = {}
+	tokenizer.count(lex._preprocess_lexer_input(source), counts)
+	return list(_finalise_counts(counts).items())
+
+
+@pytest.mark.parametrize(
+		"lexer_name, tokenizer",
+		[
+				pytest.param("python", PythonTokenizer, id="python"),
+				pytest.param("javascript", JavaScriptTokenizer, id="javascript"),
+				pytest.param("typescript", TypeScriptTokenizer, id="typescript"),
+				pytest.param('c', CTokenizer, id='c'),
+				pytest.param("cpp", CppTokenizer, id="cpp"),
+				]
+		)
+def test_get_tokenizer(lexer_name: str, tokenizer: Type[Tokenizer]):
+	lex = pygments.lexers.get_lexer_by_name(lexer_name)
+
+	if lexer_fingerprint(lex) == tokenizer.lexers[lex.name]:
+		assert isinstance(get_tokenizer(lex), tokenizer)
+	else:
+		# Other versions of Pygments change the lexer's rules, so Pygments is used instead.
+		assert get_tokenizer(lex) is None
+
+
+def test_get_tokenizer_unsupported():
+	assert get_tokenizer(pygments.lexers.get_lexer_by_name("rust")) is None
+
+	# Filters change the tokens.
+	assert get_tokenizer(pygments.lexers.get_lexer_by_name("python", filters=["keywordcase"])) is None
+
+	# As do changes to the lexer's rules.
+	class ModifiedPythonLexer(PythonLexer):
+		tokens = {**PythonLexer.tokens, "name": [(r"[a-z]+", Name)]}
+
+	assert lexer_fingerprint(ModifiedPythonLexer()) != lexer_fingerprint(PythonLexer())
+	assert get_tokenizer(ModifiedPythonLexer()) is None
+
+
+@pytest.mark.parametrize(
+		"filename",
+		[
+				*(pytest.param(file, id=file.name) for file in sorted(src_dir.glob("*.py"))),
+				*(pytest.param(file, id=file.name) for file in sorted(examples_dir.glob("*.py"))),
+				pytest.param(examples_dir / "example.c", id="example.c"),
+				]
+		)
+def test_parity_fixtures(filename: PathPlus):
+	lexer_name = 'c' if filename.suffix == ".c" else "python"
+	source = filename.read_text()
+	assert tokenizer_counts(lexer_name, source) == pygments_counts(lexer_name, source)
+
+
+@pytest.mark.parametrize(
+		"lexer_name, source",
+		[
+				pytest.param("javascript", javascript_source, id="javascript"),
+				pytest.param("typescript", typescript_source, id="typescript"),
+				pytest.param("cpp", cpp_source, id="cpp"),
+				pytest.param('c', "struct point { int x, y; };\nstatic int $dollar = '\\n';\n", id='c'),
+				pytest.param(
+						"python",
+						"match command:\n    case [x, *_]:\n        pass\n\nprint(f'{value!r:>{width}}', rb'\\d')\n",
+						id="python",
+						),
+				]
+		)
+def test_parity_snippets(lexer_name: str, source: str):
+	assert tokenizer_counts(lexer_name, source) == pygments_counts(lexer_name, source)
+
+
+class BrokenTokenizer(Tokenizer):
+	lexers = {"Rust": lexer_fingerprint(pygments.lexers.get_lexer_by_name("rust"))}
+
+	def count(self, source: str, counts: Dict[str, int]) -> None:
+		counts["partial"] = 1
+		raise Unsupported
+
+
+class UpperTokenizer(Tokenizer):
+	lexers = BrokenTokenizer.lexers
+
+	def count(self, source: str, counts: Dict[str, int]) -> None:
+		for word in source.split():
+			counts[word.upper()] = counts.get(word.upper(), 0) + 1
+
+
+def test_register_tokenizer():
+	lex = pygments.lexers.get_lexer_by_name("rust")
+	expected = _count_tokens(lex, "fn main() {}\n")
+
+	try:
+		register_tokenizer(UpperTokenizer())
+		assert isinstance(get_tokenizer(lex), UpperTokenizer)
+		assert _count_tokens(lex, "fn main() {}\n") == {"FN": 1, "MAIN()": 1}
+
+		# Falls back to Pygments, discarding the partial counts.
+		register_tokenizer(BrokenTokenizer())
+		assert _count_tokens(lex, "fn main() {}\n") == expected
+	finally:
+		unregister_tokenizer("Rust")
+
+	assert get_tokenizer(lex) is None
+	assert tokenizers._tokenizers["Python"].__class__ is PythonTokenizer
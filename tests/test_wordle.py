@@ -1,17 +1,26 @@
 # stdlib
-from typing import Mapping, Optional, Sequence, Union
+import copy
+import os
+import time
+from random import Random
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Union
 
 # 3rd party
+import numpy
 import PIL  # type: ignore[import-untyped]
 import pytest
 from apeye.requests_url import RequestsURL
 from coincidence.selectors import min_version, only_version
 from domdf_python_tools.paths import PathPlus
+from matplotlib.colors import LinearSegmentedColormap
+from PIL import Image, ImageColor, ImageDraw, ImageFont
 from pytest_regressions.data_regression import DataRegressionFixture
 from pytest_regressions.image_regression import ImageRegressionFixture
+from wordcloud import ImageColorGenerator, WordCloud, get_single_color_func  # type: ignore[import-untyped]
 
 # this package
-from wordle import Wordle, export_wordcloud, frequency_from_file
+from wordle import ExportTarget, Wordle, export_wordcloud, frequency_from_file
+from wordle.cache import LayoutCache
 from wordle.frequency import frequency_from_git
 
 examples_dir = PathPlus(__file__).parent.parent / "examples"
@@ -69,6 +78,20 @@ def test_c_source_file(
 	counter_regression.check(frequency_from_file(src_file))
 
 
+def test_top_frequencies():
+	# Plenty of ties, to check they are broken the same way as by WordCloud's full sort.
+	frequencies = {f"word{idx}": (idx * 7919) % 50 + 1 for idx in range(2000)}
+
+	w = Wordle(random_state=5678, max_words=30)
+	w.generate_from_frequencies(frequencies)
+
+	expected = WordCloud(random_state=5678, max_words=30)
+	expected.generate_from_frequencies(frequencies)
+
+	assert w.words_ == expected.words_
+	assert w.layout_ == expected.layout_
+
+
 @pillow_version_params
 @pytest.mark.usefixtures("pillow_version")
 def test_python_source_file(
@@ -179,3 +202,272 @@ def test_github_repo_frequency(counter_regression: CounterRegressionFixture):
 			exclude_words=["assert", "def", "self"],
 			)
 	counter_regression.check(frequency)
+
+
+def test_layout_cache(tmp_pathplus: PathPlus, monkeypatch):
+	cache = LayoutCache(tmp_pathplus / "cache")
+	frequencies = frequency_from_file(examples_dir / "example.c")
+
+	w = Wordle(random_state=5678, max_words=30, layout_cache=cache)
+	w.generate_from_frequencies(frequencies)
+	assert len(cache._entries()) == 1
+
+	def fail(*args, **kwargs):  # pragma: no cover
+		raise AssertionError("The layout should have been read from the cache")
+
+	with monkeypatch.context() as m:
+		m.setattr(WordCloud, "generate_from_frequencies", fail)
+
+		cached = Wordle(random_state=5678, max_words=30, layout_cache=cache)
+		cached.generate_from_frequencies(frequencies)
+
+	assert cached.layout_ == w.layout_
+	assert cached.words_ == w.words_
+	assert cached.random_state.getstate() == w.random_state.getstate()
+	assert cached.to_svg() == w.to_svg()
+	assert cached.to_array().tobytes() == w.to_array().tobytes()
+
+	# Changes to anything which affects the layout aren't served from the cache.
+	changes: List[Dict[str, Any]] = [
+			{"random_state": 1234},
+			{"width": 300},
+			{"max_words": 20},
+			{"colormap": "magma"},
+			]
+	for kwargs in changes:
+		options = {"random_state": 5678, "max_words": 30, **kwargs}
+		Wordle(**options, layout_cache=cache).generate_from_frequencies(frequencies)
+
+	assert len(cache._entries()) == 5
+
+	# Without a seed the layout is random, so isn't cached.
+	Wordle(max_words=30, layout_cache=cache).generate_from_frequencies(frequencies)
+	assert len(cache._entries()) == 5
+
+
+def test_layout_cache_color_func(tmp_pathplus: PathPlus):
+	cache = LayoutCache(tmp_pathplus / "cache")
+	frequencies = frequency_from_file(examples_dir / "example.c")
+
+	# Closures can't be told apart, so aren't cached.
+	colors = []
+	for color in ["red", "blue"]:
+		w = Wordle(random_state=5678, max_words=30, color_func=get_single_color_func(color), layout_cache=cache)
+		w.generate_from_frequencies(frequencies)
+		colors.append([ImageColor.getrgb(word_color) for *_, word_color in w.layout_])
+
+	assert all(r > 0 and g == b == 0 for r, g, b in colors[0])
+	assert all(b > 0 and r == g == 0 for r, g, b in colors[1])
+	assert len(cache._entries()) == 0
+
+	# Picklable colour functions are keyed on their state.
+	for color in ["red", "blue", "red"]:
+		rgb = ImageColor.getrgb(color)
+		image = numpy.array(rgb, dtype=numpy.uint8).reshape(1, 1, 3)
+		w = Wordle(
+				random_state=5678,
+				max_words=30,
+				mask=numpy.zeros((200, 400), dtype=numpy.uint8),
+				color_func=ImageColorGenerator(numpy.tile(image, (200, 400, 1))),
+				layout_cache=cache,
+				)
+		w.generate_from_frequencies(frequencies)
+		assert {word_color for *_, word_color in w.layout_} == {"rgb({}, {}, {})".format(*rgb)}
+
+	assert len(cache._entries()) == 2
+
+
+def test_layout_cache_eviction(tmp_pathplus: PathPlus):
+	cache = LayoutCache(tmp_pathplus / "cache", max_age=60)
+
+	for seed in range(3):
+		Wordle(random_state=seed, max_words=5, layout_cache=cache).generate_from_frequencies({"foo": 2, "bar": 1})
+
+	paths = [path for _, _, path in cache._entries()]
+	assert len(paths) == 3
+
+	# Entries which haven't been used for longer than max_age are evicted.
+	for path, age in zip(paths, [120, 30, 10]):
+		os.utime(path, (time.time() - age, time.time() - age))
+
+	cache.prune()
+	assert [path for _, _, path in cache._entries()] == paths[1:]
+
+	# Then the least recently used entries, until the cache is small enough.
+	cache.max_size = paths[2].stat().st_size
+	cache.prune()
+	assert [path for _, _, path in cache._entries()] == paths[2:]
+
+
+def test_time_budget(tmp_pathplus: PathPlus, monkeypatch):
+	frequencies = frequency_from_file(examples_dir / "example.c")
+
+	full = Wordle(random_state=5678, max_words=50).generate_from_frequencies(frequencies, time_budget=60)
+	assert full.layout_report_ == (len(full.layout_), len(full.words_) - len(full.layout_), False)
+
+	# Use a clock which advances by one second each time it's read, so the budget runs out part way through.
+	clock = iter(range(1000000))
+	monkeypatch.setattr(time, "monotonic", lambda: next(clock))
+
+	partial = Wordle(random_state=5678, max_words=50).generate_from_frequencies(frequencies, time_budget=20)
+	assert partial.layout_report_.timed_out
+	assert 0 < partial.layout_report_.placed < full.layout_report_.placed
+	assert partial.layout_report_.placed + partial.layout_report_.skipped == len(partial.words_)
+	assert partial.layout_ == full.layout_[:len(partial.layout_)]
+
+	# Layouts which run out of time aren't cached.
+	cache = LayoutCache(tmp_pathplus / "cache")
+	w = Wordle(random_state=5678, max_words=50, layout_cache=cache)
+	w.generate_from_file(examples_dir / "example.c", time_budget=0)
+	assert w.layout_report_ == (0, len(w.words_), True)
+	assert w.layout_ == []
+	assert cache._entries() == []
+
+
+def test_layout_engine_numpy():
+	frequencies = frequency_from_file(examples_dir / "example.c")
+
+	w = Wordle(random_state=5678, max_words=50, layout_engine="numpy").generate_from_frequencies(frequencies)
+	assert w.layout_report_.placed > 0
+	assert w.layout_ == Wordle(random_state=5678, max_words=50, layout_engine="numpy").generate_from_frequencies(
+			frequencies,
+			).layout_
+
+	reference = Wordle(random_state=5678, max_words=50).generate_from_frequencies(frequencies)
+	assert w.words_ == reference.words_
+
+	for ((word, freq), font_size, position, orientation, colour), expected in zip(w.layout_, reference.layout_):
+		assert (word, freq) in w.words_.items()
+		assert isinstance(font_size, int)
+		assert len(position) == 2
+		assert orientation in {None, Image.ROTATE_90}
+		assert type(colour) is type(expected[4])
+
+	# No two words overlap.
+	canvas = numpy.zeros((w.height, w.width), dtype=int)
+	for (word, _), font_size, (x, y), orientation, _ in w.layout_:
+		font = ImageFont.TransposedFont(ImageFont.truetype(w.font_path, font_size), orientation=orientation)
+		image = Image.new('L', (w.width, w.height))
+		ImageDraw.Draw(image).text((y, x), word, fill="white", font=font)
+		canvas += numpy.asarray(image) > 0
+	assert canvas.max() == 1
+
+	with pytest.raises(ValueError, match="Unknown layout engine 'fast'"):
+		Wordle(layout_engine="fast")
+
+
+@pytest.mark.parametrize("layout_engine", ["wordcloud", "numpy"])
+@pytest.mark.parametrize(
+		"color_func",
+		[
+				pytest.param(None, id="colormap"),
+				# Colour functions which can't be sent to worker processes are run in this process instead.
+				pytest.param(lambda *args, **kwargs: "white", id="lambda"),
+				],
+		)
+def test_layout_attempts(layout_engine: str, color_func: Optional[Callable]):
+	frequencies = frequency_from_file(examples_dir / "example.c")
+	kwargs: Dict[str, Any] = dict(
+			max_words=80, width=200, height=100, layout_engine=layout_engine, color_func=color_func
+			)
+
+	def score(w: Wordle) -> float:
+		return sum(freq for (_, freq), *_ in w.layout_)
+
+	w = Wordle(random_state=5678, layout_attempts=3, **kwargs).generate_from_frequencies(frequencies)
+
+	# Each attempt is seeded from the base random state.
+	random_state = Random(5678)
+	seeds = [random_state.randint(0, 2**31 - 1) for _ in range(3)]
+	attempts = [Wordle(random_state=seed, **kwargs).generate_from_frequencies(frequencies) for seed in seeds]
+	best = max(attempts, key=score)
+
+	assert score(w) == score(best)
+	assert w.layout_ == best.layout_
+	assert w.words_ == best.words_
+	assert w.layout_report_.placed == best.layout_report_.placed
+
+	with pytest.raises(ValueError, match="'layout_attempts' must be at least 1."):
+		Wordle(layout_attempts=0)
+
+
+@pytest.mark.parametrize("layout_engine", ["wordcloud", "numpy"])
+@pytest.mark.parametrize("scale", [1, 1.5])
+def test_to_image(layout_engine: str, scale: float):
+	# Drawing from the glyph cache gives exactly the same image as WordCloud.
+	w = Wordle(random_state=5678, scale=scale, layout_engine=layout_engine)
+	w.generate_from_file(examples_dir / "example.c")
+	assert (numpy.asarray(w.to_image()) == numpy.asarray(WordCloud.to_image(w))).all()
+
+
+def test_export(tmp_pathplus: PathPlus, monkeypatch):
+	w = Wordle(random_state=5678, mode="RGBA", background_color=None)
+	w.generate_from_file(examples_dir / "example.c")
+
+	to_image = w.to_image
+	calls = []
+
+	def counting_to_image() -> Image.Image:
+		calls.append(1)
+		return to_image()
+
+	monkeypatch.setattr(w, "to_image", counting_to_image)
+
+	w.export(
+			tmp_pathplus / "wordle.png",
+			tmp_pathplus / "wordle.jpg",
+			tmp_pathplus / "wordle.svg",
+			ExportTarget(tmp_pathplus / "thumbnail.webp", size=(100, 100)),
+			ExportTarget(tmp_pathplus / "thumbnail", size=(50, 50), format="png"),
+			)
+
+	# The image is only drawn once.
+	assert len(calls) == 1
+
+	with Image.open(tmp_pathplus / "wordle.png") as image:
+		assert image.format == "PNG"
+		assert image.mode == "RGBA"
+		assert (numpy.asarray(image) == numpy.asarray(to_image())).all()
+
+	with Image.open(tmp_pathplus / "wordle.jpg") as image:
+		assert (image.format, image.mode, image.size) == ("JPEG", "RGB", (400, 200))
+
+	with Image.open(tmp_pathplus / "thumbnail.webp") as image:
+		assert (image.format, image.size) == ("WEBP", (100, 50))
+
+	with Image.open(tmp_pathplus / "thumbnail") as image:
+		assert (image.format, image.size) == ("PNG", (50, 25))
+
+	assert (tmp_pathplus / "wordle.svg").read_text(encoding="UTF-8") == w.to_svg()
+
+
+@pytest.mark.parametrize(
+		"options",
+		[
+				pytest.param({}, id="RGB"),
+				pytest.param({"mode": "RGBA", "background_color": None}, id="transparent"),
+				pytest.param({"mode": "RGBA", "background_color": (10, 20, 30, 128), "scale": 1.3}, id="RGBA"),
+				pytest.param({"mode": 'L', "background_color": "white"}, id='L'),
+				pytest.param({"mode": "CMYK", "background_color": "white"}, id="CMYK"),
+				],
+		)
+def test_recolor_images(options: Dict[str, Any]):
+	w = Wordle(random_state=5678, prefer_horizontal=0.5, **options).generate_from_file(examples_dir / "example.c")
+	layout = list(w.layout_)
+
+	greens = LinearSegmentedColormap.from_list("greens", ["white", "green"])
+	themes: List[Any] = ["viridis", greens, lambda *args, **kwargs: "hsl(200, 50%, 40%)"]
+	images = w.recolor_images(themes, random_state=1234)
+	assert w.layout_ == layout
+
+	expected = [
+			copy.copy(w).recolor(random_state=1234, colormap="viridis").to_image(),
+			copy.copy(w).recolor(random_state=1234, colormap=greens).to_image(),
+			copy.copy(w).recolor(color_func=themes[2]).to_image(),
+			]
+
+	assert len(images) == 3
+
+	for image, expected_image in zip(images, expected):
+		assert image.mode == expected_image.mode
+		assert (numpy.asarray(image) == numpy.asarray(expected_image)).all()
@@ -31,35 +31,88 @@ Create wordclouds from git repositories, directories and source files.
 #
 
 # stdlib
+import copy
+import hashlib
+import heapq
+import io
+import math
 import os
 import pathlib
+import pickle
 import sys
 import time
 import typing
-from typing import TYPE_CHECKING, Callable, NoReturn, Optional, Sequence, Union
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+from random import Random
+from typing import IO, Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, NoReturn, Optional, Sequence, Tuple, Union
 
 # 3rd party
 import numpy
+import PIL  # type: ignore[import-untyped]
+import wordcloud  # type: ignore[import-untyped]
 from domdf_python_tools.typing import PathLike
 from matplotlib.colors import Colormap
 from numpy.random.mtrand import RandomState
-from wordcloud import WordCloud  # type: ignore[import-untyped]
+from PIL import Image, ImageColor, ImageDraw
+from wordcloud import WordCloud
+from wordcloud.wordcloud import colormap_color_func  # type: ignore[import-untyped]
 
 # this package
-from wordle.frequency import frequency_from_directory, frequency_from_file, get_tokens
+from wordle.cache import LayoutCache, MirrorCache
+from wordle.filters import SourceFilter
+from wordle.frequency import frequency_from_directory, frequency_from_file, frequency_from_git, get_tokens
+from wordle.glyphs import glyph_cache
+from wordle.layout import OccupancyMap
+from wordle.snapshot import Snapshot
+from wordle.svg import write_svg
 from wordle.utils import _TemporaryDirectory, clone_into_tmpdir
 
-if TYPE_CHECKING:
-	# 3rd party
-	from PIL import Image  # type: ignore[import-untyped]
-
 __author__: str = "Dominic Davis-Foster"
 __copyright__: str = "2020 Dominic Davis-Foster"
 __license__: str = "MIT License"
 __version__: str = "0.2.1"
 __email__: str = "dominic@davis-foster.co.uk"
 
-__all__ = ["Wordle", "export_wordcloud", "get_tokens"]
+__all__ = ["ExportTarget", "LayoutReport", "Wordle", "export_wordcloud", "get_tokens"]
+
+_LAYOUT_ENGINES = ("wordcloud", "numpy")
+
+
+class LayoutReport(NamedTuple):
+	"""
+	Summary of how many words were placed in a layout.
+
+	.. versionadded:: 0.3.0
+	"""
+
+	#: The number of distinct words which were placed.
+	placed: int
+
+	#: The number of words which were not placed, because they didn't fit or the time budget ran out.
+	skipped: int
+
+	#: Whether the layout was stopped early because the time budget ran out.
+	timed_out: bool
+
+
+class ExportTarget(NamedTuple):
+	"""
+	A file to export a wordle to with :meth:`Wordle.export`.
+
+	.. versionadded:: 0.3.0
+	"""
+
+	#: The file to write.
+	filename: PathLike
+
+	#: If given, the image is shrunk to fit within this ``(width, height)``, keeping its aspect ratio.
+	#: Ignored for SVG files.
+	size: Optional[Tuple[int, int]] = None
+
+	#: The format to write the file in, such as ``'PNG'``, ``'WEBP'`` or ``'SVG'``.
+	#: If :py:obj:`None` the format is determined from the file extension.
+	format: Optional[str] = None
 
 
 class Wordle(WordCloud):
@@ -134,6 +187,22 @@ class Wordle(WordCloud):
 	:param include_numbers: Whether to include numbers as phrases or not.
 	:param min_word_length: Minimum number of letters a word must have to be included.
 	:param random_state: Seed for the randomness that determines the colour and position of words.
+	:param layout_cache: An optional on-disk cache of layouts. If given, the layout is looked up in the cache
+		before any words are placed, and stored in the cache afterwards.
+		Layouts are only cached when ``random_state`` is given, as otherwise the layout is random.
+		Custom colour functions are identified by their pickled form,
+		so layouts made with colour functions which can't be pickled (such as closures and lambdas) aren't cached.
+	:param layout_engine: How to find space for each word. ``'wordcloud'`` uses :mod:`wordcloud`'s own layout code.
+		``'numpy'`` uses :class:`wordle.layout.OccupancyMap`, which is faster for large canvases and many words,
+		and produces a different (but equally random) layout.
+	:param layout_attempts: The number of layouts to try, each with its own seed drawn from ``random_state``.
+		The layouts are generated in parallel in a pool of worker processes,
+		and the one which places the greatest total frequency is kept.
+		If the colour function can't be pickled the layouts are generated one after another instead.
+
+	.. versionchanged:: 0.3.0
+
+		Added the ``layout_cache``, ``layout_engine`` and ``layout_attempts`` keyword-only arguments.
 
 	.. note::
 
@@ -151,6 +220,14 @@ class Wordle(WordCloud):
 	``font_path``, ``random_state`` which returns a PIL color for each word.
 	"""
 
+	layout_report_: LayoutReport
+	"""
+	How many words were placed by the last call to :meth:`~.generate_from_frequencies`
+	(or one of the other ``generate_from_*`` methods).
+
+	.. versionadded:: 0.3.0
+	"""
+
 	def to_html(self) -> NoReturn:  # noqa: D102
 		raise NotImplementedError
 
@@ -167,7 +244,7 @@ class Wordle(WordCloud):
 			min_font_size: int = 4,
 			font_step: int = 1,
 			max_words: int = 200,
-			background_color: str = "black",
+			background_color: Optional[str] = "black",
 			max_font_size: Optional[int] = None,
 			mode: str = "RGB",
 			relative_scaling: Union[str, float] = "auto",
@@ -181,8 +258,18 @@ class Wordle(WordCloud):
 			# margin=2,
 			# ranks_only=None,
 			random_state: Union[RandomState, int, None] = None,
+			*,
+			layout_cache: Optional[LayoutCache] = None,
+			layout_engine: str = "wordcloud",
+			layout_attempts: int = 1,
 			) -> None:
 
+		if layout_engine not in _LAYOUT_ENGINES:
+			raise ValueError(f"Unknown layout engine {layout_engine!r}. Expected one of {_LAYOUT_ENGINES}.")
+
+		if layout_attempts < 1:
+			raise ValueError("'layout_attempts' must be at least 1.")
+
 		super().__init__(
 				font_path=font_path,
 				width=width,
@@ -211,6 +298,34 @@ class Wordle(WordCloud):
 				random_state=random_state,
 				)
 
+		self.layout_cache = layout_cache
+		self.layout_engine = layout_engine
+		self.layout_attempts = layout_attempts
+		self._generating = False
+		self._probing = False
+		self._deadline: Optional[float] = None
+		self._timed_out = False
+
+	@property
+	def min_font_size(self) -> float:
+		"""
+		Smallest font size to use. Layout will stop when there is no more room in this size.
+		"""
+
+		# WordCloud stops placing words as soon as this is larger than the next font size,
+		# and checks it for every word, so it doubles as the deadline for time-budgeted layouts.
+		deadline = getattr(self, "_deadline", None)
+
+		if deadline is not None and not self._probing and time.monotonic() >= deadline:
+			self._timed_out = True
+			return math.inf
+
+		return self._min_font_size
+
+	@min_font_size.setter
+	def min_font_size(self, value: float) -> None:
+		self._min_font_size = value
+
 	def __array__(self) -> numpy.ndarray:  # pragma: no cover (typed wrapper)
 		"""
 		Returns the wordcloud image as numpy array.
@@ -218,6 +333,367 @@ class Wordle(WordCloud):
 
 		return super().__array__()
 
+	def generate_from_frequencies(
+			self,
+			frequencies: Mapping[str, float],
+			max_font_size: Optional[int] = None,
+			*,
+			time_budget: Optional[float] = None,
+			) -> "Wordle":
+		"""
+		Create a word_cloud from words and frequencies.
+
+		Only the :attr:`~Wordle.max_words` most frequent words are sorted, normalized and laid out.
+		They are selected with a heap, which avoids sorting the whole vocabulary.
+
+		How many words were placed is recorded in :attr:`~.layout_report_`.
+
+		:param frequencies: Mapping of words to their frequencies.
+		:param max_font_size: Use this font-size instead of :attr:`~Wordle.max_font_size`.
+		:param time_budget: The maximum time, in seconds, to spend placing words.
+			Once it runs out no more words are placed, and the layout built so far is kept.
+			Layouts which run out of time are not stored in :attr:`~.layout_cache`.
+
+		:returns: self
+
+		.. versionchanged:: 0.3.0
+
+			* The most frequent words are selected before sorting, rather than sorting every word.
+			* The layout is looked up in (and stored in) :attr:`~.layout_cache`, if set.
+			* Added the ``time_budget`` keyword-only argument.
+		"""
+
+		if len(frequencies) > self.max_words:
+			# heapq.nlargest is stable, so ties keep their order in ``frequencies``,
+			# exactly as with the full sort done by WordCloud.
+			frequencies = dict(heapq.nlargest(self.max_words, frequencies.items(), key=itemgetter(1)))
+
+		if self._generating:
+			# WordCloud calls this method again to lay out the first two words when picking the font size.
+			# That takes very little time, so isn't cut short by the time budget.
+			self._probing = True
+
+			try:
+				return super().generate_from_frequencies(frequencies, max_font_size=max_font_size)
+			finally:
+				self._probing = False
+
+		self._generating = True
+		self._timed_out = False
+		self._deadline = None if time_budget is None else time.monotonic() + time_budget
+
+		try:
+			self._generate_layout(frequencies, max_font_size)
+		finally:
+			self._generating = False
+			self._deadline = None
+
+		placed = len({word for (word, _), *_ in self.layout_})
+		self.layout_report_ = LayoutReport(placed, len(self.words_) - placed, self._timed_out)
+
+		return self
+
+	def _generate_layout(self, frequencies: Mapping[str, float], max_font_size: Optional[int]) -> None:
+		"""
+		Lay out the words, or restore the layout from :attr:`~.layout_cache`.
+
+		:param frequencies: The frequencies of the words to lay out.
+		:param max_font_size:
+		"""
+
+		if self.layout_cache is None or not isinstance(self.random_state, Random):
+			self._place_words(frequencies, max_font_size)
+			return
+
+		parameters = self._layout_parameters(frequencies, max_font_size)
+		if parameters is None:
+			self._place_words(frequencies, max_font_size)
+			return
+
+		digest = self.layout_cache.digest(parameters)
+		entry = self.layout_cache.get(digest)
+
+		if entry is not None:
+			self._load_layout(entry)
+			return
+
+		self._place_words(frequencies, max_font_size)
+
+		if not self._timed_out:
+			self.layout_cache.put(digest, self._dump_layout())
+
+	def _place_words(self, frequencies: Mapping[str, float], max_font_size: Optional[int]) -> None:
+		"""
+		Lay out the words with the selected :attr:`~.layout_engine`.
+
+		:param frequencies: The frequencies of the words to lay out.
+		:param max_font_size:
+		"""
+
+		if self.layout_attempts > 1:
+			self._place_words_best_of(frequencies, max_font_size)
+		elif self.layout_engine == "wordcloud":
+			super().generate_from_frequencies(frequencies, max_font_size=max_font_size)
+		else:
+			self._place_words_numpy(frequencies, max_font_size)
+
+	def _place_words_best_of(self, frequencies: Mapping[str, float], max_font_size: Optional[int]) -> None:
+		"""
+		Lay out the words :attr:`~.layout_attempts` times,
+		and keep the layout which places the greatest total frequency.
+
+		Each attempt is seeded from :attr:`~.random_state`, so the result is deterministic for a given seed.
+		Ties are resolved in favour of the earliest attempt.
+
+		:param frequencies: The frequencies of the words to lay out.
+		:param max_font_size:
+		"""
+
+		random_state = self.random_state if self.random_state is not None else Random()
+		seeds = [random_state.randint(0, 2**31 - 1) for _ in range(self.layout_attempts)]
+
+		# A copy which lays out a single attempt, with the same deadline as this instance.
+		template = copy.copy(self)
+		template.layout_cache = None
+		template.layout_attempts = 1
+		template.random_state = None
+		template._generating = True
+
+		try:
+			pickle.dumps(template)
+		except (pickle.PicklingError, AttributeError, TypeError):
+			# e.g. a lambda as the colour function.
+			_init_layout_attempts(template, frequencies, max_font_size)
+			attempts = list(map(_layout_attempt, seeds))
+		else:
+			# The template and frequency table are sent to each worker once, rather than with each attempt.
+			with ProcessPoolExecutor(
+					max_workers=min(len(seeds), os.cpu_count() or 1),
+					initializer=_init_layout_attempts,
+					initargs=(template, frequencies, max_font_size),
+					) as executor:
+				attempts = list(executor.map(_layout_attempt, seeds))
+
+		scores = [sum(freq for (_, freq), *_ in layout) for layout, _, _ in attempts]
+		self.layout_, self.words_, _ = attempts[scores.index(max(scores))]
+		self._timed_out = any(timed_out for _, _, timed_out in attempts)
+
+	def _place_words_numpy(self, frequencies: Mapping[str, float], max_font_size: Optional[int]) -> None:
+		"""
+		Lay out the words using :class:`wordle.layout.OccupancyMap`.
+
+		This follows :meth:`wordcloud.WordCloud.generate_from_frequencies` exactly, apart from how free space
+		is found, and that only the pixels of each word are rasterized to update the occupancy map.
+		Fonts, text sizes and rasterized words are looked up in :data:`wordle.glyphs.glyph_cache`.
+
+		:param frequencies: The frequencies of the words to lay out.
+		:param max_font_size:
+		"""
+
+		# make sure frequencies are sorted and normalized
+		sorted_frequencies = sorted(frequencies.items(), key=itemgetter(1), reverse=True)
+		if not sorted_frequencies:
+			raise ValueError("We need at least 1 word to plot a word cloud, got 0.")
+
+		max_frequency = float(sorted_frequencies[0][1])
+		words = [(word, freq / max_frequency) for word, freq in sorted_frequencies[:self.max_words]]
+
+		random_state = self.random_state if self.random_state is not None else Random()
+
+		if self.mask is not None:
+			height, width = self.mask.shape[:2]
+			occupancy = OccupancyMap(height, width, self._get_bolean_mask(self.mask))
+		else:
+			occupancy = OccupancyMap(self.height, self.width)
+
+		if max_font_size is None:
+			max_font_size = self.max_font_size
+
+		if max_font_size is not None:
+			font_size = max_font_size
+		elif len(words) == 1:
+			font_size = self.height
+		else:
+			# Pick the font size by laying out the first two words, as WordCloud does.
+			probing, self._probing = self._probing, True
+
+			try:
+				self._place_words_numpy(dict(words[:2]), max_font_size=self.height)
+			finally:
+				self._probing = probing
+
+			sizes = [font_size for _, font_size, *_ in self.layout_]
+			if not sizes:
+				raise ValueError(
+						"Couldn't find space to draw. "
+						"Either the Canvas size is too small or too much of the image is masked out."
+						)
+
+			font_size = int(2 * sizes[0] * sizes[1] / (sizes[0] + sizes[1])) if len(sizes) > 1 else sizes[0]
+
+		self.words_ = dict(words)
+
+		if self.repeat and len(words) < self.max_words:
+			# pad frequencies with repeating words.
+			times_extend = int(numpy.ceil(self.max_words / len(words))) - 1
+			downweight = words[-1][1]
+			words_org = list(words)
+			for i in range(times_extend):
+				words.extend((word, freq * downweight**(i + 1)) for word, freq in words_org)
+
+		layout = []
+		last_freq = 1.0
+
+		for word, freq in words:
+			if freq == 0:
+				continue
+
+			rs = self.relative_scaling
+			if rs != 0:
+				font_size = int(round((rs * (freq / float(last_freq)) + (1 - rs)) * font_size))
+
+			orientation = None if random_state.random() < self.prefer_horizontal else Image.ROTATE_90
+			tried_other_orientation = False
+
+			while True:
+				# min_font_size is checked every time, as it is also how the time budget is enforced.
+				if font_size < self.min_font_size:
+					break
+
+				box_size = glyph_cache.bbox(self.font_path, font_size, word, orientation)
+				result = occupancy.sample_position(
+						box_size[3] + self.margin,
+						box_size[2] + self.margin,
+						random_state,
+						)
+				if result is not None:
+					break
+
+				# Try rotating the word before making it smaller.
+				if not tried_other_orientation and self.prefer_horizontal < 1:
+					orientation = Image.ROTATE_90
+					tried_other_orientation = True
+				else:
+					font_size -= self.font_step
+					orientation = None
+
+			if font_size < self.min_font_size:
+				break
+
+			x, y = numpy.array(result) + self.margin // 2
+
+			# Only rasterize the word itself, rather than the whole canvas.
+			(left, top), mask = glyph_cache.glyph(self.font_path, font_size, word, orientation)
+			if mask is not None:
+				occupancy.update(numpy.asarray(mask) > 0, x + top, y + left)
+
+			color = self.color_func(
+					word,
+					font_size=font_size,
+					position=(x, y),
+					orientation=orientation,
+					random_state=random_state,
+					font_path=self.font_path,
+					)
+			layout.append(((word, freq), font_size, (x, y), orientation, color))
+			last_freq = freq
+
+		self.layout_ = layout
+
+	def _layout_parameters(
+			self,
+			frequencies: Mapping[str, float],
+			max_font_size: Optional[int],
+			) -> Optional[Dict[str, Any]]:
+		"""
+		Returns a JSON-serialisable mapping of everything which affects the layout,
+		or :py:obj:`None` if the colour function can't be identified reliably.
+
+		``scale``, ``mode``, ``background_color`` and the contour only affect how the layout is drawn,
+		so are not included.
+
+		:param frequencies: The frequencies of the words being laid out.
+		:param max_font_size:
+		"""
+
+		if isinstance(self.color_func, colormap_color_func):
+			color_func = f"colormap:{self.color_func.colormap.name}"
+		else:
+			# Closures and instances with different state must not share a key,
+			# so anything which can't be pickled isn't cached at all.
+			try:
+				color_func = hashlib.sha256(pickle.dumps(self.color_func, protocol=4)).hexdigest()
+			except (pickle.PicklingError, AttributeError, TypeError):
+				return None
+
+		if self.mask is None:
+			mask = None
+		else:
+			mask_array = numpy.ascontiguousarray(self.mask)
+			mask = [mask_array.shape, mask_array.dtype.str, hashlib.sha256(mask_array.tobytes()).hexdigest()]
+
+		with open(self.font_path, "rb") as fp:
+			font = hashlib.sha256(fp.read()).hexdigest()
+
+		return {
+				"frequencies": [[word, float(freq)] for word, freq in frequencies.items()],
+				"width": self.width,
+				"height": self.height,
+				"mask": mask,
+				"font": font,
+				"max_font_size": self.max_font_size if max_font_size is None else max_font_size,
+				"prefer_horizontal": self.prefer_horizontal,
+				"min_font_size": self._min_font_size,
+				"font_step": self.font_step,
+				"max_words": self.max_words,
+				"relative_scaling": self.relative_scaling,
+				"repeat": self.repeat,
+				"margin": self.margin,
+				"layout_engine": self.layout_engine,
+				"layout_attempts": self.layout_attempts,
+				"color_func": color_func,
+				"random_state": self.random_state.getstate(),
+				# Text metrics (and so the layout) differ between versions of these.
+				"pillow": PIL.__version__,
+				"wordcloud": wordcloud.__version__,
+				}
+
+	def _dump_layout(self) -> Dict[str, Any]:
+		"""
+		Returns a JSON-serialisable mapping describing the current layout, for :attr:`~.layout_cache`.
+		"""
+
+		layout = []
+
+		for (word, freq), font_size, position, orientation, color in self.layout_:
+			layout.append([
+					[word, freq],
+					int(font_size),
+					[int(position[0]), int(position[1])],
+					None if orientation is None else int(orientation),
+					color,
+					])
+
+		return {"layout": layout, "words": self.words_, "random_state": self.random_state.getstate()}
+
+	def _load_layout(self, entry: Mapping[str, Any]) -> None:
+		"""
+		Restore the layout (and the state of the random number generator) from an entry in :attr:`~.layout_cache`.
+
+		:param entry: A mapping returned by :meth:`~._dump_layout`.
+		"""
+
+		layout = []
+
+		for (word, freq), font_size, position, orientation, color in entry["layout"]:
+			layout.append(((word, freq), font_size, tuple(position), orientation, _as_color(color)))
+
+		version, internal_state, gauss_next = entry["random_state"]
+
+		self.layout_ = layout
+		self.words_ = dict(entry["words"])
+		self.random_state.setstate((version, tuple(internal_state), gauss_next))
+
 	def generate_from_file(
 			self,
 			filename: PathLike,
@@ -225,6 +701,7 @@ class Wordle(WordCloud):
 			*,
 			exclude_words: Sequence[str] = (),
 			max_font_size: Optional[int] = None,
+			time_budget: Optional[float] = None,
 			) -> "Wordle":
 		"""
 		Create a word_cloud from a source code file.
@@ -234,13 +711,17 @@ class Wordle(WordCloud):
 			If :py:obj:`None` the wordle is not saved
 		:param exclude_words: An optional list of words to exclude
 		:param max_font_size: Use this font-size instead of :attr:`~Wordle.max_font_size`.
+		:param time_budget: The maximum time, in seconds, to spend placing words.
+			See :meth:`~.generate_from_frequencies` for details.
 
 		.. versionchanged:: 0.2.1  ``exclude_words``, ``max_font_size`` are now keyword-only.
+
+		.. versionchanged:: 0.3.0  Added the ``time_budget`` keyword-only argument.
 		"""
 
 		word_counts = frequency_from_file(filename, exclude_words)
 
-		self.generate_from_frequencies(word_counts, max_font_size=max_font_size)
+		self.generate_from_frequencies(word_counts, max_font_size=max_font_size, time_budget=time_budget)
 
 		if outfile:
 			export_wordcloud(self, outfile)
@@ -255,6 +736,12 @@ class Wordle(WordCloud):
 			exclude_words: Sequence[str] = (),
 			exclude_dirs: Sequence[PathLike] = (),
 			max_font_size: Optional[int] = None,
+			workers: Optional[int] = None,
+			include_extensions: Optional[Sequence[str]] = None,
+			exclude_extensions: Sequence[str] = (),
+			file_filter: Optional[SourceFilter] = None,
+			max_vocabulary: Optional[int] = None,
+			time_budget: Optional[float] = None,
 			) -> "Wordle":
 		"""
 		Create a word_cloud from a directory of source code files.
@@ -266,17 +753,37 @@ class Wordle(WordCloud):
 		:param exclude_dirs: An optional list of directories to exclude.
 			Each entry is treated as a regular expression to match at the beginning of the relative path.
 		:param max_font_size: Use this font-size instead of :attr:`~Wordle.max_font_size`.
+		:param workers: The number of processes to tokenize files with.
+			See :func:`~wordle.frequency.frequency_from_directory` for details.
+		:param include_extensions: If given, only files with one of these extensions (e.g. ``.py``) are processed.
+		:param exclude_extensions: Files with any of these extensions (e.g. ``.min.js``) are not processed.
+		:param file_filter: An optional filter used to skip binary, minified and generated files.
+			See :func:`~wordle.frequency.frequency_from_directory` for details.
+		:param max_vocabulary: If given, the word frequencies are approximated in bounded memory.
+			See :func:`~wordle.frequency.frequency_from_directory` for details.
+		:param time_budget: The maximum time, in seconds, to spend placing words.
+			See :meth:`~.generate_from_frequencies` for details.
 
 		.. versionchanged:: 0.2.1  ``exclude_words``, ``exclude_dirs``, ``max_font_size`` are now keyword-only.
+
+		.. versionchanged:: 0.3.0
+
+			Added the ``workers``, ``include_extensions``, ``exclude_extensions``,
+			``file_filter``, ``max_vocabulary`` and ``time_budget`` keyword-only arguments.
 		"""
 
 		word_counts: typing.Counter[str] = frequency_from_directory(
 				directory,
 				exclude_words=exclude_words,
 				exclude_dirs=exclude_dirs,
+				workers=workers,
+				include_extensions=include_extensions,
+				exclude_extensions=exclude_extensions,
+				file_filter=file_filter,
+				max_vocabulary=max_vocabulary,
 				)
 
-		self.generate_from_frequencies(word_counts, max_font_size=max_font_size)
+		self.generate_from_frequencies(word_counts, max_font_size=max_font_size, time_budget=time_budget)
 
 		if outfile is not None:
 			export_wordcloud(self, outfile)
@@ -296,6 +803,14 @@ class Wordle(WordCloud):
 			exclude_words: Sequence[str] = (),
 			exclude_dirs: Sequence[PathLike] = (),
 			max_font_size: Optional[int] = None,
+			workers: Optional[int] = None,
+			include_extensions: Optional[Sequence[str]] = None,
+			exclude_extensions: Sequence[str] = (),
+			checkout: bool = True,
+			mirror_cache: Optional[MirrorCache] = None,
+			file_filter: Optional[SourceFilter] = None,
+			max_vocabulary: Optional[int] = None,
+			time_budget: Optional[float] = None,
 			) -> "Wordle":
 		"""
 		Create a word_cloud from a directory of source code files.
@@ -309,13 +824,60 @@ class Wordle(WordCloud):
 		:param exclude_words: An optional list of words to exclude.
 		:param exclude_dirs: An optional list of directories to exclude.
 		:param max_font_size: Use this font-size instead of self.max_font_size.
+		:param workers: The number of processes to tokenize files with.
+			See :func:`~wordle.frequency.frequency_from_directory` for details.
+		:param include_extensions: If given, only files with one of these extensions (e.g. ``.py``) are processed.
+		:param exclude_extensions: Files with any of these extensions (e.g. ``.min.js``) are not processed.
+		:param checkout: If :py:obj:`False` the files are read directly from the git object store
+			rather than from a checked out working tree. See :func:`~wordle.frequency.frequency_from_git` for details.
+		:param mirror_cache: An optional cache of local mirrors of git repositories.
+			See :func:`~wordle.frequency.frequency_from_git` for details.
+		:param file_filter: An optional filter used to skip binary, minified and generated files.
+			See :func:`~wordle.frequency.frequency_from_directory` for details.
+		:param max_vocabulary: If given, the word frequencies are approximated in bounded memory.
+			See :func:`~wordle.frequency.frequency_from_directory` for details.
+		:param time_budget: The maximum time, in seconds, to spend placing words.
+			See :meth:`~.generate_from_frequencies` for details.
 
 		.. versionchanged:: 0.2.1
 
 			* ``exclude_words``, ``exclude_dirs``, ``max_font_size`` are now keyword-only.
 			* Added the ``sha`` and ``depth`` keyword-only arguments.
+
+		.. versionchanged:: 0.3.0
+
+			Added the ``workers``, ``include_extensions``, ``exclude_extensions``, ``checkout``,
+			``mirror_cache``, ``file_filter``, ``max_vocabulary`` and ``time_budget`` keyword-only arguments.
 		"""
 
+		if not checkout:
+			word_counts = frequency_from_git(
+					git_url,
+					sha=sha,
+					depth=depth,
+					exclude_words=exclude_words,
+					exclude_dirs=exclude_dirs,
+					workers=workers,
+					include_extensions=include_extensions,
+					exclude_extensions=exclude_extensions,
+					checkout=False,
+					mirror_cache=mirror_cache,
+					file_filter=file_filter,
+					max_vocabulary=max_vocabulary,
+					)
+
+			self.generate_from_frequencies(word_counts, max_font_size=max_font_size, time_budget=time_budget)
+
+			if outfile is not None:
+				export_wordcloud(self, outfile)
+
+			return self
+
+		if mirror_cache is not None:
+			# Cloning from the local mirror only copies objects, so there's no need to limit the depth.
+			git_url = os.fspath(mirror_cache.mirror(git_url))
+			depth = None
+
 		with _TemporaryDirectory() as tmpdir:
 			clone_into_tmpdir(git_url, tmpdir, sha=sha, depth=depth)
 
@@ -325,6 +887,12 @@ class Wordle(WordCloud):
 					exclude_dirs=exclude_dirs,
 					exclude_words=exclude_words,
 					max_font_size=max_font_size,
+					workers=workers,
+					include_extensions=include_extensions,
+					exclude_extensions=exclude_extensions,
+					file_filter=file_filter,
+					max_vocabulary=max_vocabulary,
+					time_budget=time_budget,
 					)
 
 			if sys.platform == "win32":
@@ -332,6 +900,46 @@ class Wordle(WordCloud):
 
 		return self
 
+	def generate_from_snapshot(
+			self,
+			filename: PathLike,
+			outfile: Optional[PathLike] = None,
+			*,
+			exclude_words: Sequence[str] = (),
+			max_font_size: Optional[int] = None,
+			time_budget: Optional[float] = None,
+			) -> "Wordle":
+		"""
+		Create a word_cloud from a snapshot of word frequencies.
+
+		The snapshot is memory-mapped, and only the most frequent words are read from it.
+
+		:param filename: The snapshot file, as written by :func:`~wordle.snapshot.write_snapshot`
+			or :func:`~wordle.snapshot.merge_snapshots`.
+		:param outfile: The file to save the wordle as. Supported formats are ``PNG``, ``JPEG`` and SVG.
+			If :py:obj:`None` the wordle is not saved.
+		:param exclude_words: An optional list of words to exclude.
+		:param max_font_size: Use this font-size instead of :attr:`~Wordle.max_font_size`.
+		:param time_budget: The maximum time, in seconds, to spend placing words.
+			See :meth:`~.generate_from_frequencies` for details.
+
+		.. versionadded:: 0.3.0
+		"""
+
+		# Read enough words that there are still max_words left once the excluded words are removed.
+		word_counts = dict(Snapshot(filename).most_common(self.max_words + len(exclude_words)))
+
+		for word in exclude_words:
+			if word in word_counts:
+				del word_counts[word]
+
+		self.generate_from_frequencies(word_counts, max_font_size=max_font_size, time_budget=time_budget)
+
+		if outfile is not None:
+			export_wordcloud(self, outfile)
+
+		return self
+
 	def recolor(  # pragma: no cover (typed wrapper)
 		self,
 		random_state: Union[RandomState, int, None] = None,
@@ -356,6 +964,137 @@ class Wordle(WordCloud):
 
 		return super().recolor(random_state, color_func, colormap)
 
+	def recolor_images(
+			self,
+			themes: Iterable[Union[str, Colormap, Callable]],
+			random_state: Union[RandomState, int, None] = None,
+			) -> List[Image.Image]:
+		"""
+		Draw the existing layout once for each of several colour schemes.
+
+		Each word is rasterized once, and its colour for every scheme is blended in with NumPy,
+		rather than drawing all the text again for each scheme.
+		The layout and colours of this wordle are not changed.
+
+		:param themes: The colour schemes, each either a colormap (or its name)
+			or a function to generate the colour of each word, as with :meth:`~.recolor`.
+		:param random_state: If not :py:obj:`None`, a fixed random state is used.
+			If an :class:`int` is given, each scheme uses a new :class:`random.Random` state with that seed,
+			so gives the same image as ``recolor(random_state, ...).to_image()``.
+
+		:returns: One image for each colour scheme, in order.
+
+		.. versionadded:: 0.3.0
+		"""
+
+		self._check_generated()
+
+		color_funcs = [
+				colormap_color_func(theme) if isinstance(theme, (str, Colormap)) else theme for theme in themes
+				]
+
+		colors = []
+		for color_func in color_funcs:
+			variant_random_state = Random(random_state) if isinstance(random_state, int) else random_state
+			colors.append([
+					color_func(
+							word=word,
+							font_size=font_size,
+							position=position,
+							orientation=orientation,
+							random_state=variant_random_state,
+							font_path=self.font_path,
+							) for (word, _), font_size, position, orientation, _ in self.layout_
+					])
+
+		if self.mode not in _BLEND_MODES:
+			images = []
+			for variant_colors in colors:
+				variant = copy.copy(self)
+				variant.layout_ = [(*word[:4], color) for word, color in zip(self.layout_, variant_colors)]
+				images.append(variant.to_image())
+			return images
+
+		if self.mask is not None:
+			height, width = self.mask.shape[:2]
+		else:
+			height, width = self.height, self.width
+
+		size = (int(width * self.scale), int(height * self.scale))
+		background = numpy.asarray(Image.new(self.mode, (1, 1), self.background_color)).reshape(-1)
+
+		# Older versions of Pillow also colour the transparent pixels under the empty parts of each word's mask,
+		# so those pixels must be included too.
+		include_empty = len(background) in {2, 4} and _INKS_UNMASKED_PIXELS
+
+		# Rasterize each word once, as the canvas positions and opacity of the pixels it covers.
+		pixels, words, alphas = [], [], []
+		for idx, ((word, _), font_size, position, orientation, _) in enumerate(self.layout_):
+			(left, top), mask = glyph_cache.glyph(self.font_path, int(font_size * self.scale), word, orientation)
+			if mask is None:
+				continue
+
+			mask_array = numpy.asarray(mask)
+			if include_empty:
+				rows, cols = (indices.ravel() for indices in numpy.indices(mask_array.shape))
+			else:
+				rows, cols = numpy.nonzero(mask_array)
+
+			alpha = mask_array[rows, cols]
+			rows += int(position[0] * self.scale) + top
+			cols += int(position[1] * self.scale) + left
+
+			on_canvas = (rows >= 0) & (rows < size[1]) & (cols >= 0) & (cols < size[0])
+			pixels.append(rows[on_canvas] * size[0] + cols[on_canvas])
+			words.append(numpy.full(on_canvas.sum(), idx))
+			alphas.append(alpha[on_canvas])
+
+		layers = _overlap_layers(
+				numpy.concatenate(pixels) if pixels else numpy.empty(0, dtype=numpy.intp),
+				numpy.concatenate(words) if words else numpy.empty(0, dtype=numpy.intp),
+				numpy.concatenate(alphas) if alphas else numpy.empty(0, dtype=numpy.uint8),
+				)
+
+		# Pixels in the first layer are drawn onto the background, so there are only 256 possible results
+		# for each word. These are computed once for each variant and looked up by word and opacity.
+		if layers:
+			keys, first_layer = numpy.unique(layers[0][1] * 256 + layers[0][2], return_inverse=True)
+			key_words, key_opacities = numpy.divmod(keys, 256)
+			backgrounds = numpy.broadcast_to(background, (len(keys), len(background)))
+
+		# Each pixel is handled as a single integer, with RGB padded to four bytes.
+		bands = len(background)
+		padded_bands = 4 if bands == 3 else bands
+		pixel_dtype = numpy.dtype(f"u{padded_bands}")
+
+		blank_canvas = numpy.zeros((size[0] * size[1], padded_bands), dtype=numpy.uint8)
+		blank_canvas[:, :bands] = background
+
+		images = []
+		for variant_colors in colors:
+			inks = numpy.array([ImageColor.getcolor(color, self.mode) for color in variant_colors])
+			inks = inks.reshape(len(variant_colors), -1)
+
+			canvas = blank_canvas.copy()
+			flat_canvas = canvas.view(pixel_dtype)[:, 0]
+
+			if layers:
+				table = numpy.zeros((len(keys), padded_bands), dtype=numpy.uint8)
+				table[:, :bands] = _blend(backgrounds, key_opacities, inks[key_words])
+				flat_canvas[layers[0][0]] = table.view(pixel_dtype)[first_layer, 0]
+
+			for layer_pixels, layer_words, layer_alphas in layers[1:]:
+				blended = _blend(canvas[layer_pixels, :bands], layer_alphas, inks[layer_words])
+				canvas[layer_pixels, :bands] = blended
+
+			if bands == 3:
+				img = Image.frombytes(self.mode, size, canvas, "raw", "RGBX")
+			else:
+				img = Image.frombuffer(self.mode, size, canvas, "raw", self.mode, 0, 1)
+			images.append(self._draw_contour(img=img))
+
+		return images
+
 	def to_array(self) -> numpy.ndarray:  # pragma: no cover (typed wrapper)
 		"""
 		Returns the wordcloud image as numpy array.
@@ -374,12 +1113,79 @@ class Wordle(WordCloud):
 
 		return super().to_file(os.fspath(filename))
 
-	def to_image(self) -> "Image.Image":
+	def to_image(self) -> Image.Image:
 		"""
 		Returns the wordcloud as an image.
+
+		.. versionchanged:: 0.3.0
+
+			Words are drawn from rasterized glyphs in :data:`wordle.glyphs.glyph_cache`,
+			so drawing the same words again in the same font is faster.
 		"""
 
-		return super().to_image()
+		self._check_generated()
+
+		if self.mask is not None:
+			height, width = self.mask.shape[:2]
+		else:
+			height, width = self.height, self.width
+
+		img = Image.new(self.mode, (int(width * self.scale), int(height * self.scale)), self.background_color)
+		draw = ImageDraw.Draw(img)
+
+		for (word, _), font_size, position, orientation, color in self.layout_:
+			(left, top), mask = glyph_cache.glyph(self.font_path, int(font_size * self.scale), word, orientation)
+			if mask is not None:
+				pos = (int(position[1] * self.scale) + left, int(position[0] * self.scale) + top)
+				draw.bitmap(pos, mask, fill=color)
+
+		return self._draw_contour(img=img)
+
+	def export(self, *targets: Union[PathLike, ExportTarget]) -> "Wordle":
+		"""
+		Export the wordle to several files at once.
+
+		The image is only drawn once, and every raster output (including resized copies) is saved from it.
+
+		:param targets: The files to write, either as filenames or :class:`~.ExportTarget` objects.
+			Any format supported by Pillow can be used, as can SVG.
+
+		:returns: self
+
+		.. versionadded:: 0.3.0
+		"""
+
+		image: Optional[Image.Image] = None
+
+		for target in targets:
+			if not isinstance(target, ExportTarget):
+				target = ExportTarget(target)
+
+			filename = pathlib.Path(target.filename)
+			file_format = (target.format or filename.suffix.lstrip('.')).upper()
+			if file_format == "JPG":
+				file_format = "JPEG"
+
+			if file_format == "SVG":
+				with filename.open('w', encoding="UTF-8") as fp:
+					self.write_svg(fp)
+				continue
+
+			if image is None:
+				image = self.to_image()
+
+			output = image
+			if target.size is not None:
+				output = image.copy()
+				output.thumbnail(target.size)
+
+			if file_format == "JPEG" and output.mode != "RGB":
+				# JPEG has no transparency.
+				output = output.convert("RGB")
+
+			output.save(filename, format=file_format, optimize=True)
+
+		return self
 
 	def to_svg(
 			self,
@@ -399,9 +1205,180 @@ class Wordle(WordCloud):
 			Useful for debugging.
 
 		:returns: The content of the SVG image.
+
+		.. versionchanged:: 0.3.0  Embedded fonts are cached by :func:`wordle.svg.font_face_url`.
 		"""
 
-		return super().to_svg(embed_font, optimize_embedded_font, embed_image)
+		buffer = io.StringIO()
+		self.write_svg(
+				buffer,
+				embed_font=embed_font,
+				optimize_embedded_font=optimize_embedded_font,
+				embed_image=embed_image,
+				)
+		return buffer.getvalue()
+
+	def write_svg(
+			self,
+			fp: IO[str],
+			*,
+			embed_font: bool = False,
+			optimize_embedded_font: bool = True,
+			embed_image: bool = False,
+			) -> None:
+		"""
+		Write the wordle to a file as an SVG, without building the whole document in memory.
+
+		:param fp: The text file to write to.
+		:param embed_font: Whether to include font inside resulting SVG file.
+		:param optimize_embedded_font: Whether to be aggressive when embedding a font, to reduce size.
+			In particular, hinting tables are dropped, which may introduce slight
+			changes to character shapes (w.r.t. `to_image` baseline).
+		:param embed_image: Whether to include rasterized image inside resulting SVG file.
+			Useful for debugging.
+
+		.. versionadded:: 0.3.0
+		"""
+
+		write_svg(
+				self,
+				fp,
+				embed_font=embed_font,
+				optimize_embedded_font=optimize_embedded_font,
+				embed_image=embed_image,
+				)
+
+
+_attempt_template: Optional[Wordle] = None
+_attempt_frequencies: Mapping[str, float] = {}
+_attempt_max_font_size: Optional[int] = None
+
+
+def _init_layout_attempts(
+		template: Wordle,
+		frequencies: Mapping[str, float],
+		max_font_size: Optional[int],
+		) -> None:
+	"""
+	Store the instance and frequency table shared by each of the layout attempts in this process.
+
+	:param template: A copy of the :class:`~.Wordle` to lay out with :attr:`~.Wordle.layout_attempts` set to ``1``.
+	:param frequencies: The frequencies of the words to lay out.
+	:param max_font_size:
+	"""
+
+	global _attempt_template, _attempt_frequencies, _attempt_max_font_size
+
+	_attempt_template = template
+	_attempt_frequencies = frequencies
+	_attempt_max_font_size = max_font_size
+
+
+def _layout_attempt(seed: int) -> Tuple[List[Any], Dict[str, float], bool]:
+	"""
+	Lay out the words with the given seed.
+
+	:param seed:
+
+	:returns: The layout, the normalized frequencies, and whether the time budget ran out.
+	"""
+
+	assert _attempt_template is not None
+
+	wordle = copy.copy(_attempt_template)
+	wordle.random_state = Random(seed)
+	wordle._timed_out = False
+	wordle._place_words(_attempt_frequencies, _attempt_max_font_size)
+
+	return wordle.layout_, wordle.words_, wordle._timed_out
+
+
+#: Modes whose bands :meth:`Wordle.recolor_images` can blend with NumPy.
+_BLEND_MODES = {'L', "LA", "RGB", "RGBA"}
+
+
+def _inks_unmasked_pixels() -> bool:
+	"""
+	Returns whether Pillow colours fully transparent pixels where a bitmap's mask is empty.
+
+	Older versions of Pillow do, while newer ones leave those pixels untouched.
+	"""
+
+	image = Image.new("RGBA", (1, 1))
+	ImageDraw.Draw(image).bitmap((0, 0), Image.new('L', (1, 1)), fill=(255, 255, 255, 255))
+	return image.getpixel((0, 0)) != (0, 0, 0, 0)
+
+
+_INKS_UNMASKED_PIXELS = _inks_unmasked_pixels()
+
+
+def _overlap_layers(
+		pixels: numpy.ndarray,
+		words: numpy.ndarray,
+		alphas: numpy.ndarray,
+		) -> List[Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]]:
+	"""
+	Split the pixels covered by words into layers, in which each pixel is covered by at most one word.
+
+	Words rarely overlap, so there is usually only one layer.
+	Where they do, later words are drawn over earlier ones by blending the layers in order.
+
+	:param pixels: The index of each covered pixel in the flattened canvas, in the order the words are drawn.
+	:param words: The index of the word covering each pixel.
+	:param alphas: The opacity of each pixel.
+	"""
+
+	order = numpy.argsort(pixels, kind="stable")
+	sorted_pixels = pixels[order]
+	positions = numpy.arange(len(pixels))
+
+	# How many earlier words cover the same pixel.
+	first = numpy.ones(len(pixels), dtype=bool)
+	first[1:] = sorted_pixels[1:] != sorted_pixels[:-1]
+	depth = numpy.empty(len(pixels), dtype=numpy.intp)
+	depth[order] = positions - numpy.maximum.accumulate(numpy.where(first, positions, 0))
+
+	layers = []
+	for layer in range(int(depth.max()) + 1 if len(pixels) else 0):
+		selected = depth == layer
+		layers.append((pixels[selected], words[selected], alphas[selected]))
+
+	return layers
+
+
+def _blend(dest: numpy.ndarray, alpha: numpy.ndarray, inks: numpy.ndarray) -> numpy.ndarray:
+	"""
+	Blend solid colours onto pixels through a mask, in the same way as :meth:`PIL.ImageDraw.ImageDraw.bitmap`.
+
+	:param dest: The existing pixels, with shape ``(pixels, bands)``.
+	:param alpha: The opacity of the colour at each pixel.
+	:param inks: The colour to blend into each pixel, with shape ``(pixels, bands)``.
+
+	:returns: The blended pixels.
+	"""
+
+	canvas = dest.astype(numpy.int32)
+	mask = numpy.repeat(alpha.astype(numpy.int32)[:, None], canvas.shape[1], axis=1)
+
+	if canvas.shape[1] in {2, 4}:
+		# Pillow draws the colour at full strength onto fully transparent pixels, and only blends the alpha band.
+		transparent = canvas[:, -1] == 0
+		if not _INKS_UNMASKED_PIXELS:
+			transparent &= alpha != 0
+		mask[transparent, :-1] = 255
+
+	blended = canvas * (255 - mask) + inks * mask + 128
+	return (((blended >> 8) + blended) >> 8).astype(numpy.uint8)
+
+
+def _as_color(color: Any) -> Any:
+	"""
+	Convert a colour loaded from JSON back into the form returned by the colour function.
+
+	:param color: A colour name or string, or a list of RGB(A) values.
+	"""
+
+	return tuple(color) if isinstance(color, list) else color
 
 
 def export_wordcloud(word_cloud: WordCloud, outfile: PathLike) -> None:
@@ -410,11 +1387,14 @@ def export_wordcloud(word_cloud: WordCloud, outfile: PathLike) -> None:
 
 	:param word_cloud:
 	:param outfile: The file to export the wordcloud to.
+
+	.. versionchanged:: 0.3.0  SVG files are written with :func:`wordle.svg.write_svg`.
 	"""
 
 	outfile = pathlib.Path(outfile)
 
 	if outfile.suffix == ".svg":
-		outfile.write_text(word_cloud.to_svg())
+		with outfile.open('w', encoding="UTF-8") as fp:
+			write_svg(word_cloud, fp)
 	else:
 		word_cloud.to_file(str(outfile))
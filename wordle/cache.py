@@ -0,0 +1,450 @@
+#!/usr/bin/env python
+#
+#  cache.py
+"""
+Persistent caches used to avoid repeating expensive work between runs.
+
+.. versionadded:: 0.3.0
+"""
+#
+#  Copyright (c) 2020-2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+# stdlib
+import hashlib
+import io
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+import time
+import typing
+import zlib
+from collections import Counter
+from contextlib import suppress
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+# 3rd party
+from domdf_python_tools.typing import PathLike
+from dulwich.porcelain import fetch
+from dulwich.repo import Repo
+from southwark import clone, windows_clone_helper
+
+__all__ = ["LayoutCache", "MirrorCache", "TokenCache"]
+
+
+def _wordle_version() -> str:
+	# Imported here to avoid a circular import, as the package's __init__ imports this module.
+	# this package
+	from wordle import __version__
+
+	return __version__
+
+
+class _DirectoryCache:
+	"""
+	Base class for caches which store one file per entry in a directory.
+
+	Entries are evicted in least-recently-used order, using each file's modification time
+	(which is updated whenever the entry is read) as the time it was last used.
+
+	:param directory: The directory to store the cache in. Created if it does not exist.
+	:param max_size: The maximum total size of the cache, in bytes.
+	:param max_age: The maximum time, in seconds, since an entry was last used before it is evicted.
+		If :py:obj:`None` entries are only evicted based on the size of the cache.
+	"""
+
+	def __init__(self, directory: PathLike, max_size: int, max_age: Optional[float] = None):
+		self.directory = pathlib.Path(directory)
+		self.max_size = int(max_size)
+		self.max_age = max_age
+
+	def __repr__(self) -> str:
+		return f"{self.__class__.__name__}({os.fspath(self.directory)!r}, max_size={self.max_size})"
+
+	def _path_for_key(self, key: str) -> pathlib.Path:
+		return self.directory / key[:2] / key[2:]
+
+	def _read(self, key: str) -> Optional[bytes]:
+		path = self._path_for_key(key)
+
+		try:
+			data = path.read_bytes()
+		except OSError:
+			return None
+
+		with suppress(OSError):
+			os.utime(path)
+
+		return data
+
+	def _write(self, key: str, data: bytes) -> None:
+		path = self._path_for_key(key)
+		path.parent.mkdir(parents=True, exist_ok=True)
+
+		# Write to a temporary file and move it into place, so concurrent readers
+		# (e.g. other worker processes) never see a partially written entry.
+		fd, tmpname = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+
+		try:
+			with os.fdopen(fd, "wb") as fp:
+				fp.write(data)
+			os.replace(tmpname, path)
+		except BaseException:
+			with suppress(OSError):
+				os.unlink(tmpname)
+			raise
+
+	def _entries(self) -> List[Tuple[float, int, pathlib.Path]]:
+		entries: List[Tuple[float, int, pathlib.Path]] = []
+
+		if not self.directory.is_dir():
+			return entries
+
+		for subdir in self.directory.iterdir():
+			if not subdir.is_dir():
+				continue
+
+			for path in subdir.iterdir():
+				if path.name.startswith(".tmp-"):
+					continue
+
+				with suppress(OSError):
+					stat = path.stat()
+					entries.append((stat.st_mtime, stat.st_size, path))
+
+		return entries
+
+	def size(self) -> int:
+		"""
+		Returns the total size of the cache entries, in bytes.
+		"""
+
+		return sum(size for _, size, _ in self._entries())
+
+	def prune(self) -> None:
+		"""
+		Evict entries which have not been used for longer than :attr:`~.max_age`,
+		then the least recently used entries until the cache is no larger than :attr:`~.max_size`.
+		"""
+
+		entries = self._entries()
+		total_size = sum(size for _, size, _ in entries)
+		now = time.time()
+
+		for last_used, size, path in sorted(entries, key=lambda entry: entry[0]):
+			expired = self.max_age is not None and now - last_used > self.max_age
+
+			if not expired and total_size <= self.max_size:
+				break
+
+			with suppress(OSError):
+				path.unlink()
+				total_size -= size
+
+	def clear(self) -> None:
+		"""
+		Remove all entries from the cache.
+		"""
+
+		for _, _, path in self._entries():
+			with suppress(OSError):
+				path.unlink()
+
+
+class TokenCache(_DirectoryCache):
+	"""
+	An on-disk cache of the token counts of source files.
+
+	Entries are keyed by a hash of the file's content, the name of the Pygments lexer used,
+	and the version of ``wordle``, so unchanged files can be looked up without being lexed again.
+	Files read directly from a git object store are keyed by their blob SHA instead,
+	so they can be looked up without being read at all.
+	Each entry is stored as zlib-compressed JSON.
+
+	The cache is safe to share between processes, and can be passed to the
+	:mod:`wordle.frequency` functions as the ``cache`` argument.
+
+	:param directory: The directory to store the cache in. Created if it does not exist.
+	:param max_size: The maximum total size of the cache, in bytes.
+		When exceeded the least recently used entries are evicted by :meth:`~.prune`.
+	"""
+
+	def __init__(self, directory: PathLike, max_size: int = 256 * 1024 * 1024):
+		super().__init__(directory, max_size)
+
+	@staticmethod
+	def digest(data: bytes) -> str:
+		"""
+		Returns the content hash of ``data``, for use with :meth:`~.get` and :meth:`~.put`.
+
+		:param data: The raw content of a source file.
+		"""
+
+		return hashlib.sha256(data).hexdigest()
+
+	@staticmethod
+	def _key(digest: str, lexer_name: str) -> str:
+		key = '\0'.join([digest, lexer_name, _wordle_version()])
+		return hashlib.sha256(key.encode("UTF-8")).hexdigest()
+
+	def get(self, digest: str, lexer_name: str) -> Optional[typing.Counter[str]]:
+		"""
+		Returns the cached token counts for the given content, or :py:obj:`None` if they are not cached.
+
+		:param digest: The content hash of the file, as returned by :meth:`~.digest`,
+			or ``git-blob:<sha>`` for a git blob.
+		:param lexer_name: The name of the lexer used to tokenize the file.
+		"""
+
+		data = self._read(self._key(digest, lexer_name))
+
+		if data is None:
+			return None
+
+		try:
+			return Counter(dict(json.loads(zlib.decompress(data))))
+		except (ValueError, TypeError, zlib.error):
+			# Corrupt entry; it will be overwritten by the next put().
+			return None
+
+	def put(self, digest: str, lexer_name: str, tokens: typing.Counter[str]) -> None:
+		"""
+		Store the token counts for the given content.
+
+		:param digest: The content hash of the file, as returned by :meth:`~.digest`,
+			or ``git-blob:<sha>`` for a git blob.
+		:param lexer_name: The name of the lexer used to tokenize the file.
+		:param tokens:
+		"""
+
+		# A list of pairs (rather than an object) preserves the order of the counter.
+		data = json.dumps(list(tokens.items()), ensure_ascii=False, separators=(',', ':'))
+		self._write(self._key(digest, lexer_name), zlib.compress(data.encode("UTF-8")))
+
+
+class LayoutCache(_DirectoryCache):
+	"""
+	An on-disk cache of word cloud layouts, i.e. the size, position, orientation and colour of each word.
+
+	Entries are keyed by a digest of everything which affects the layout, including the words and their
+	frequencies, the size of the canvas, the mask, the font and the state of the random number generator.
+	A :class:`~wordle.Wordle` with a layout cache restores the layout from the cache rather than placing the words
+	again, after which it can be exported or recoloured as usual. Each entry is stored as zlib-compressed JSON.
+
+	The cache is safe to share between processes, and can be passed to :class:`~wordle.Wordle`
+	as the ``layout_cache`` argument.
+
+	:param directory: The directory to store the cache in. Created if it does not exist.
+	:param max_size: The maximum total size of the cache, in bytes.
+	:param max_age: The maximum time, in seconds, since an entry was last used before it is evicted.
+		If :py:obj:`None` entries are only evicted based on the size of the cache.
+		Entries are evicted by :meth:`~.prune`, which is called whenever an entry is added.
+	"""
+
+	def __init__(
+			self,
+			directory: PathLike,
+			max_size: int = 64 * 1024 * 1024,
+			max_age: Optional[float] = None,
+			):
+		super().__init__(directory, max_size, max_age)
+
+	@staticmethod
+	def digest(parameters: Mapping[str, Any]) -> str:
+		"""
+		Returns the key for a layout generated with the given parameters.
+
+		:param parameters: A JSON-serialisable mapping of everything which affects the layout.
+		"""
+
+		data = json.dumps([dict(parameters), _wordle_version()], sort_keys=True, separators=(',', ':'))
+		return hashlib.sha256(data.encode("UTF-8")).hexdigest()
+
+	def get(self, digest: str) -> Optional[Dict[str, Any]]:
+		"""
+		Returns the cached layout with the given key, or :py:obj:`None` if it is not cached.
+
+		:param digest: The key returned by :meth:`~.digest`.
+		"""
+
+		data = self._read(digest)
+
+		if data is None:
+			return None
+
+		try:
+			entry = json.loads(zlib.decompress(data))
+		except (ValueError, zlib.error):
+			# Corrupt entry; it will be overwritten by the next put().
+			return None
+
+		return entry if isinstance(entry, dict) else None
+
+	def put(self, digest: str, layout: Mapping[str, Any]) -> None:
+		"""
+		Store a layout, and evict any expired entries.
+
+		:param digest: The key returned by :meth:`~.digest`.
+		:param layout: A JSON-serialisable mapping describing the layout.
+		"""
+
+		data = json.dumps(dict(layout), ensure_ascii=False, separators=(',', ':'))
+		self._write(digest, zlib.compress(data.encode("UTF-8")))
+		self.prune()
+
+
+class MirrorCache:
+	"""
+	A local cache of bare mirrors of remote git repositories.
+
+	The first time a repository is requested a full bare clone is made.
+	Later requests only fetch objects which are new since the last request.
+
+	Mirrors which have not been used recently are evicted once the cache exceeds its size limit,
+	or once they have not been used for longer than ``max_age``.
+
+	The cache can be passed to :func:`wordle.frequency.frequency_from_git` and
+	:meth:`wordle.Wordle.generate_from_git` as the ``mirror_cache`` argument.
+
+	:param directory: The directory to store the mirrors in. Created if it does not exist.
+	:param max_size: The maximum total size of the mirrors, in bytes.
+	:param max_age: The maximum time, in seconds, since a mirror was last used before it is evicted.
+		If :py:obj:`None` mirrors are only evicted based on the size of the cache.
+
+	.. attention:: Updating the same mirror from several processes at once is not supported.
+	"""
+
+	#: The name of the file in each mirror which records the URL and when the mirror was last used.
+	marker_filename = "wordle-mirror"
+
+	def __init__(
+			self,
+			directory: PathLike,
+			max_size: int = 2 * 1024 * 1024 * 1024,
+			max_age: Optional[float] = None,
+			):
+		self.directory = pathlib.Path(directory)
+		self.max_size = int(max_size)
+		self.max_age = max_age
+
+	def __repr__(self) -> str:
+		return f"{self.__class__.__name__}({os.fspath(self.directory)!r}, max_size={self.max_size})"
+
+	def path_for(self, git_url: str) -> pathlib.Path:
+		"""
+		Returns the path of the mirror for the given URL. The mirror may not exist yet.
+
+		:param git_url:
+		"""
+
+		return self.directory / hashlib.sha256(git_url.encode("UTF-8")).hexdigest()[:32]
+
+	def mirror(self, git_url: str) -> pathlib.Path:
+		"""
+		Returns the path to an up-to-date bare mirror of the git repository at ``git_url``.
+
+		The repository is cloned if it is not already in the cache, or otherwise updated with any new objects.
+
+		:param git_url:
+		"""
+
+		path = self.path_for(git_url)
+		marker = path / self.marker_filename
+		errstream = io.BytesIO()
+
+		with windows_clone_helper():
+			if marker.is_file():
+				with Repo(os.fspath(path)) as repo:
+					fetch_result = fetch(repo, "origin", errstream=errstream)
+
+					head = fetch_result.refs.get(b"HEAD")
+					if head is not None:
+						repo.refs[b"HEAD"] = head
+
+			else:
+				# A partial mirror from an interrupted clone can't be trusted.
+				shutil.rmtree(path, ignore_errors=True)
+				self.directory.mkdir(parents=True, exist_ok=True)
+
+				with clone(git_url, target=os.fspath(path), bare=True, errstream=errstream):
+					pass
+
+		marker.write_text(git_url, encoding="UTF-8")
+
+		self.prune(keep=path)
+
+		return path
+
+	def _mirrors(self) -> List[Tuple[float, int, pathlib.Path]]:
+		mirrors: List[Tuple[float, int, pathlib.Path]] = []
+
+		if not self.directory.is_dir():
+			return mirrors
+
+		for path in self.directory.iterdir():
+			marker = path / self.marker_filename
+
+			try:
+				last_used = marker.stat().st_mtime
+			except OSError:
+				# Not a (complete) mirror
+				continue
+
+			size = 0
+			for dirpath, _, filenames in os.walk(path):
+				for filename in filenames:
+					with suppress(OSError):
+						size += os.path.getsize(os.path.join(dirpath, filename))
+
+			mirrors.append((last_used, size, path))
+
+		return mirrors
+
+	def size(self) -> int:
+		"""
+		Returns the total size of the mirrors, in bytes.
+		"""
+
+		return sum(size for _, size, _ in self._mirrors())
+
+	def prune(self, keep: Optional[pathlib.Path] = None) -> None:
+		"""
+		Evict mirrors which have not been used for longer than :attr:`~.max_age`,
+		then the least recently used mirrors until the cache is no larger than :attr:`~.max_size`.
+
+		:param keep: A mirror which should not be evicted, even if the cache is still too large.
+		"""
+
+		mirrors = self._mirrors()
+		total_size = sum(size for _, size, _ in mirrors)
+		now = time.time()
+
+		for last_used, size, path in sorted(mirrors, key=lambda mirror: mirror[0]):
+			if path == keep:
+				continue
+
+			expired = self.max_age is not None and now - last_used > self.max_age
+
+			if expired or total_size > self.max_size:
+				shutil.rmtree(path, ignore_errors=True)
+				total_size -= size
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+#
+#  filters.py
+"""
+Cheap checks to skip binary, minified and machine-generated files before they are lexed.
+
+.. versionadded:: 0.3.0
+"""
+#
+#  Copyright (c) 2020-2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+# stdlib
+import os
+import re
+from typing import Dict, Optional, Pattern, Sequence
+
+# 3rd party
+from domdf_python_tools.typing import PathLike
+
+__all__ = [
+		"BINARY",
+		"GENERATED",
+		"GENERATED_MARKERS",
+		"MINIFIED",
+		"TOO_LARGE",
+		"SourceFilter",
+		]
+
+#: The reason given for skipping a file which contains NUL bytes.
+BINARY = "binary"
+
+#: The reason given for skipping a file which is larger than :attr:`SourceFilter.max_size`.
+TOO_LARGE = "too large"
+
+#: The reason given for skipping a file whose lines are longer than :attr:`SourceFilter.max_line_length` on average.
+MINIFIED = "minified"
+
+#: The reason given for skipping a file which contains one of :attr:`SourceFilter.generated_markers`.
+GENERATED = "generated"
+
+#: Phrases which commonly mark a file as machine-generated. Matched case-insensitively.
+GENERATED_MARKERS = (
+		"@generated",
+		"do not edit",
+		"code generated by",
+		"this file is auto-generated",
+		"this file is autogenerated",
+		"this file is automatically generated",
+		"this file was auto-generated",
+		"this file was autogenerated",
+		"this file was automatically generated",
+		"this file was generated",
+		"generated by the protocol buffer compiler",
+		"generated by cython",
+		)
+
+
+class SourceFilter:
+	"""
+	Decides which files are worth lexing, based on their size and the first few kilobytes of their content.
+
+	Each check can be disabled by passing :py:obj:`None` (or :py:obj:`False` for ``binary``).
+	The paths of files which were skipped are recorded in :attr:`~.skipped`, along with the reason.
+
+	The filter can be passed to the :mod:`wordle.frequency` functions as the ``file_filter`` argument.
+
+	:param max_size: Files larger than this many bytes are skipped.
+	:param sniff_size: The number of bytes at the start of each file to examine.
+	:param binary: Skip files which contain a NUL byte in the first ``sniff_size`` bytes.
+	:param max_line_length: Skip files whose lines in the first ``sniff_size`` bytes are longer than this on average,
+		which usually indicates minified code.
+	:param generated_markers: Skip files which contain one of these phrases (case-insensitively)
+		in their first ``marker_lines`` lines.
+	:param marker_lines: The number of lines at the start of each file to search for ``generated_markers``.
+	"""
+
+	#: Mapping of paths of the files which have been skipped to the reason they were skipped,
+	#: which is one of :data:`~.BINARY`, :data:`~.TOO_LARGE`, :data:`~.MINIFIED` or :data:`~.GENERATED`.
+	skipped: Dict[str, str]
+
+	def __init__(
+			self,
+			*,
+			max_size: Optional[int] = None,
+			sniff_size: int = 8192,
+			binary: bool = True,
+			max_line_length: Optional[int] = 250,
+			generated_markers: Optional[Sequence[str]] = GENERATED_MARKERS,
+			marker_lines: int = 5,
+			):
+		self.max_size = max_size
+		self.sniff_size = int(sniff_size)
+		self.binary = binary
+		self.max_line_length = max_line_length
+		self.generated_markers = generated_markers
+		self.marker_lines = int(marker_lines)
+		self.skipped = {}
+
+		if generated_markers:
+			pattern = '|'.join(re.escape(marker) for marker in generated_markers)
+			self._generated_re: Optional[Pattern[bytes]] = re.compile(pattern.encode("UTF-8"), re.IGNORECASE)
+		else:
+			self._generated_re = None
+
+	def __repr__(self) -> str:
+		return (
+				f"{self.__class__.__name__}(max_size={self.max_size}, sniff_size={self.sniff_size}, "
+				f"binary={self.binary}, max_line_length={self.max_line_length})"
+				)
+
+	def check_data(self, head: bytes, size: Optional[int] = None) -> Optional[str]:
+		"""
+		Returns the reason a file should be skipped, or :py:obj:`None` if it should be lexed.
+
+		:param head: The content of the file. Only the first :attr:`~.sniff_size` bytes are examined.
+		:param size: The size of the file, in bytes. Defaults to the length of ``head``.
+		"""
+
+		if size is None:
+			size = len(head)
+
+		if self.max_size is not None and size > self.max_size:
+			return TOO_LARGE
+
+		head = head[:self.sniff_size]
+
+		if self.binary and b'\0' in head:
+			return BINARY
+
+		if self.max_line_length is not None and head:
+			if len(head) / (head.count(b'\n') + 1) > self.max_line_length:
+				return MINIFIED
+
+		if self._generated_re is not None:
+			header = b'\n'.join(head.split(b'\n', self.marker_lines)[:self.marker_lines])
+			if self._generated_re.search(header):
+				return GENERATED
+
+		return None
+
+	def check(
+			self,
+			filename: PathLike,
+			data: Optional[bytes] = None,
+			*,
+			name: Optional[str] = None,
+			) -> Optional[str]:
+		"""
+		Returns the reason a file should be skipped, or :py:obj:`None` if it should be lexed.
+
+		If the file should be skipped it is recorded in :attr:`~.skipped`.
+
+		:param filename:
+		:param data: The content of the file, if it has already been read.
+			Otherwise only the first :attr:`~.sniff_size` bytes are read from ``filename``.
+		:param name: The name to record the file under in :attr:`~.skipped`. Defaults to ``filename``.
+		"""
+
+		if data is None:
+			with open(filename, "rb") as fp:
+				reason = self.check_data(fp.read(self.sniff_size), os.fstat(fp.fileno()).st_size)
+		else:
+			reason = self.check_data(data)
+
+		if reason is not None:
+			self.skipped[os.fspath(filename) if name is None else name] = reason
+
+		return reason
@@ -29,111 +29,571 @@ Functions to determine word token frequency for wordclouds.
 #
 
 # stdlib
+import codecs
+import fnmatch
+import hashlib
+import json
+import os
 import pathlib
+import posixpath
 import re
+import stat
+import time
 import typing
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import repeat
 from string import punctuation
-from typing import Optional, Sequence
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Pattern, Sequence, Tuple, TypeVar, Union
 
 # 3rd party
+import pygments.lexer  # type: ignore[import-untyped]
 import pygments.lexers  # type: ignore[import-untyped]
 import pygments.token  # type: ignore[import-untyped]
 import pygments.util  # type: ignore[import-untyped]
 from domdf_python_tools.paths import PathPlus
 from domdf_python_tools.typing import PathLike
+from dulwich.diff_tree import tree_changes
+from dulwich.errors import NotBlobError, NotTreeError
+from dulwich.object_store import BaseObjectStore
+from dulwich.objects import Blob, Commit, Tag, Tree, TreeEntry
+from dulwich.repo import Repo
 
 # this package
-from wordle.utils import _TemporaryDirectory, clone_into_tmpdir
+from wordle.cache import MirrorCache, TokenCache, _wordle_version
+from wordle.filters import SourceFilter
+from wordle.glyphs import _LRUCache
+from wordle.sketch import FrequencySketch
+from wordle.tokenizers import Unsupported, get_tokenizer
+from wordle.utils import _TemporaryDirectory, clone_into_tmpdir, shard_of
 
-__all__ = ["frequency_from_directory", "frequency_from_file", "frequency_from_git", "get_tokens"]
+_T = TypeVar("_T")
+_C = TypeVar("_C")
 
+__all__ = [
+		"frequency_from_directory",
+		"frequency_from_file",
+		"frequency_from_git",
+		"frequency_from_repos",
+		"frequency_history",
+		"get_tokens",
+		]
 
-def get_tokens(filename: PathLike) -> typing.Counter[str]:
+
+def get_tokens(
+		filename: PathLike,
+		*,
+		cache: Optional[TokenCache] = None,
+		chunk_size: Optional[int] = None,
+		) -> typing.Counter[str]:
 	"""
 	Returns a :class:`collections.Counter` of the tokens in a file.
 
+	Python, JavaScript, TypeScript, C and C++ files are counted by the fast tokenizers in
+	:mod:`wordle.tokenizers`, which give the same counts as Pygments; other languages are lexed with Pygments.
+	Files read in chunks (see ``chunk_size``) are always lexed with Pygments.
+
 	:param filename: The file to parse.
+	:param cache: An optional cache of token counts.
+		If the file's content is in the cache it is not lexed again.
+	:param chunk_size: If given, files larger than this many bytes are read and lexed in chunks of roughly this size,
+		so the memory used depends on the chunk size rather than the size of the file.
+		Chunks are split at line breaks outside of strings and comments, and the lexer restarts from its
+		initial state at each split. For most languages this gives the same counts as lexing the file whole,
+		but constructs which span a split and change how later lines are lexed may be counted differently.
 
 	:return: A count of words etc. in the file.
-	"""
 
-	total: typing.Counter[str] = Counter()
+	.. versionchanged:: 0.3.0  Added the ``cache`` and ``chunk_size`` keyword-only arguments.
+	"""
 
 	filename = PathPlus(filename)
 
-	try:
-		lex = pygments.lexers.get_lexer_for_filename(filename)
-	except pygments.util.ClassNotFound:
-		return total
+	lex = _get_lexer(filename.name)
+	if lex is None:
+		return Counter()
 
-	for token in lex.get_tokens(filename.read_text()):
-		if token[0] in pygments.token.Comment:
-			continue
+	if chunk_size is not None and filename.stat().st_size > chunk_size:
+		return _count_file_chunked(lex, filename, chunk_size, cache=cache)
 
-		if token[0] in pygments.token.Text:
-			if token[1] == '\n':
-				continue
-			if token[1] == ' ':
-				continue
-			if re.match(r"^\t*$", token[1]):
-				continue
-			if re.match(r"^\s*$", token[1]):
-				continue
+	if cache is None:
+		return _count_tokens(lex, filename.read_text())
 
-		if token[0] in pygments.token.String:
-			if token[1] == '"':
-				continue
+	return _count_data(lex, filename.read_bytes(), cache=cache)
 
-			if token[0] in pygments.token.String.Escape:
-				if re.match(r"\\*", token[1]):
-					continue
 
-		if token[0] in pygments.token.String.Double:
-			if token[1] == '\n':
-				continue
-			if re.match(r'^"*$', token[1]):
-				continue
+def _count_file_chunked(
+		lex: pygments.lexer.Lexer,
+		filename: pathlib.Path,
+		chunk_size: int,
+		cache: Optional[TokenCache] = None,
+		) -> typing.Counter[str]:
+	"""
+	Returns a :class:`collections.Counter` of the tokens in the UTF-8 encoded file ``filename``,
+	reading and lexing it in chunks of roughly ``chunk_size`` bytes.
 
-		if token[0] in pygments.token.String.Single:
-			if token[1] == '\n':
-				continue
-			if re.match(r"^'*$", token[1]):
-				continue
+	:param lex: The lexer to tokenize the source with.
+	:param filename:
+	:param chunk_size:
+	:param cache: An optional cache of token counts.
+	"""
+
+	digest = None
+
+	if cache is not None:
+		hasher = hashlib.sha256()
+
+		with open(filename, "rb") as fp:
+			for data in iter(partial(fp.read, chunk_size), b''):
+				hasher.update(data)
+
+		# The counts could differ from those for the whole file, so are cached separately.
+		digest = f"{hasher.hexdigest()}:{chunk_size}"
+		cached = cache.get(digest, lex.name)
+		if cached is not None:
+			return cached
+
+	counts: Dict[str, int] = {}
+	_count_token_stream(_iter_file_tokens(lex, filename, chunk_size), counts)
+	tokens = _finalise_counts(counts)
+
+	if cache is not None and digest is not None:
+		cache.put(digest, lex.name, tokens)
+
+	return tokens
+
+
+def _iter_file_tokens(lex: pygments.lexer.Lexer, filename: pathlib.Path, chunk_size: int) -> Iterator[Tuple[Any, str]]:
+	"""
+	Returns an iterator over the ``(tokentype, value)`` pairs in the UTF-8 encoded file ``filename``,
+	which is read in blocks of ``chunk_size`` bytes.
+
+	Text is buffered until there is at least ``chunk_size`` characters. Tokens are then emitted up to a line break
+	found by :func:`_lex_to_boundary`, and the rest of the buffer is kept and lexed again with the next block.
 
-		if token[0] in pygments.token.Punctuation and token[1] in "[],{}:();":
+	:param lex: The lexer to tokenize the source with.
+	:param filename:
+	:param chunk_size:
+	"""
+
+	if not _lexes_unprocessed(lex) or lex.tabsize > 0:
+		# Fall back to lexing the whole file at once.
+		yield from _iter_tokens(lex, PathPlus(filename).read_text())
+		return
+
+	pending = ''
+
+	for source in _iter_decoded_blocks(filename, chunk_size):
+		if not pending:
+			# The equivalent of the start of Lexer._preprocess_lexer_input
+			if source.startswith("\ufeff"):
+				source = source[1:]
+			if lex.stripall:
+				source = source.lstrip()
+			elif lex.stripnl:
+				source = source.lstrip('\n')
+
+		pending += source
+
+		if len(pending) < chunk_size:
 			continue
 
-		if token[0] in pygments.token.Operator:
+		boundary = _lex_to_boundary(lex, pending)
+
+		if boundary is not None:
+			tokens, cut = boundary
+			yield from tokens
+		elif len(pending) >= 4 * chunk_size:
+			# No safe place to split (e.g. inside a huge string literal), so split anyway to bound memory use.
+			cut = pending.rfind('\n', 0, len(pending) // 2) + 1 or len(pending) // 2
+			for _, ttype, value in lex.get_tokens_unprocessed(pending[:cut]):
+				yield ttype, value
+		else:
 			continue
 
-		if token[0] in pygments.token.String.Affix:
+		pending = pending[cut:]
+
+	# The equivalent of the end of Lexer._preprocess_lexer_input
+	if lex.stripall:
+		pending = pending.rstrip()
+	elif lex.stripnl:
+		pending = pending.rstrip('\n')
+	if lex.ensurenl and not pending.endswith('\n'):
+		pending += '\n'
+
+	for _, ttype, value in lex.get_tokens_unprocessed(pending):
+		yield ttype, value
+
+
+def _lex_to_boundary(
+		lex: pygments.lexer.Lexer,
+		text: str,
+		) -> Optional[Tuple[List[Tuple[Any, str]], int]]:
+	"""
+	Find a line break in ``text`` at which lexing can be restarted from the lexer's initial state
+	without changing the tokens produced.
+
+	Returns the ``(tokentype, value)`` pairs before the line break and its index,
+	or :py:obj:`None` if no such line break was found.
+
+	``text`` is lexed up to seven eighths of its length, leaving the rest so the lexer can look ahead.
+	Starting with the last, the newlines which were lexed as whitespace (and so are not inside a string or comment)
+	are tried in turn: ``text`` is lexed again from the newline, and the newline is accepted if the tokens
+	match those from the first pass for at least a sixteenth of the length of ``text``.
+
+	:param lex:
+	:param text:
+	"""
+
+	limit = len(text) - len(text) // 8
+	window = len(text) // 16
+
+	tokens: List[Tuple[int, Any, str]] = []
+	for token in lex.get_tokens_unprocessed(text):
+		if token[0] >= limit:
+			break
+		tokens.append(token)
+
+	attempts = 0
+
+	for idx in range(len(tokens) - 1, 0, -1):
+		start, ttype, value = tokens[idx]
+
+		if start > limit - window or '\n' not in value or ttype not in pygments.token.Text:
 			continue
 
-		if token[0] in pygments.token.String.Interpol and token[1] in "{}":
+		restarted = lex.get_tokens_unprocessed(text[start:])
+
+		if all(
+				(index + start, ttype, value) == expected
+				for (index, ttype, value), expected in zip(restarted, tokens[idx:])
+				):
+			return [(ttype, value) for _, ttype, value in tokens[:idx]], start
+
+		attempts += 1
+		if attempts == _BOUNDARY_ATTEMPTS:
+			break
+
+	return None
+
+
+#: The number of line breaks :func:`_lex_to_boundary` tries before giving up.
+_BOUNDARY_ATTEMPTS = 8
+
+
+def _iter_decoded_blocks(filename: pathlib.Path, chunk_size: int) -> Iterator[str]:
+	"""
+	Read the UTF-8 encoded file ``filename`` in blocks of ``chunk_size`` bytes, yielding the decoded text
+	with newlines normalised to ``\\n``.
+
+	:param filename:
+	:param chunk_size:
+	"""
+
+	decoder = codecs.getincrementaldecoder("UTF-8")()
+	carriage_return = False
+
+	with open(filename, "rb") as fp:
+		while True:
+			data = fp.read(chunk_size)
+			text = decoder.decode(data, final=not data)
+
+			if carriage_return:
+				text = '\r' + text
+
+			# Keep back a trailing carriage return in case the next block starts with a line feed.
+			carriage_return = bool(data) and text.endswith('\r')
+			if carriage_return:
+				text = text[:-1]
+
+			if text:
+				yield text.replace("\r\n", '\n').replace('\r', '\n')
+
+			if not data:
+				break
+
+
+def _count_data(
+		lex: pygments.lexer.Lexer,
+		data: bytes,
+		cache: Optional[TokenCache] = None,
+		digest: Optional[str] = None,
+		) -> typing.Counter[str]:
+	"""
+	Returns a :class:`collections.Counter` of the tokens in the UTF-8 encoded source code ``data``.
+
+	:param lex: The lexer to tokenize the source with.
+	:param data:
+	:param cache: An optional cache of token counts.
+	:param digest: The key to look up ``data`` in the cache with. Defaults to :meth:`TokenCache.digest(data) <.TokenCache.digest>`.
+	"""
+
+	if cache is None:
+		return _count_tokens(lex, data.decode("UTF-8"))
+
+	if digest is None:
+		digest = cache.digest(data)
+
+	cached = cache.get(digest, lex.name)
+	if cached is not None:
+		return cached
+
+	tokens = _count_tokens(lex, data.decode("UTF-8"))
+	cache.put(digest, lex.name, tokens)
+
+	return tokens
+
+
+#: Cache of lexer instances, keyed by either a filename or a ``*.ext`` pattern. See :func:`_get_lexer`.
+_lexer_cache: Dict[str, Optional[pygments.lexer.Lexer]] = {}
+
+_special_filenames_re: Optional[Pattern[str]] = None
+
+
+def _get_special_filenames_re() -> Pattern[str]:
+	"""
+	Returns a pattern matching filenames for which a lexer can't be chosen from the extension alone.
+
+	These are the filenames matched by any Pygments lexer filename pattern which isn't of the simple form
+	``*.ext``, such as ``Makefile``, ``CMakeLists.txt`` or ``*.tar.gz``.
+	"""
+
+	global _special_filenames_re
+
+	if _special_filenames_re is None:
+		patterns = set()
+
+		for _, _, filenames, _ in pygments.lexers.get_all_lexers():
+			for pattern in filenames:
+				if not re.fullmatch(r"\*\.[^*?\[\].]+", pattern):
+					patterns.add(fnmatch.translate(pattern))
+
+		_special_filenames_re = re.compile('|'.join(sorted(patterns)) or "(?!)")
+
+	return _special_filenames_re
+
+
+def _get_lexer(filename: str) -> Optional[pygments.lexer.Lexer]:
+	"""
+	Returns a lexer for the file with the given name, or :py:obj:`None` if there isn't one.
+
+	Lexer instances are cached and reused. Files are looked up by their extension, so the Pygments
+	lexer registry is only searched once per extension, unless the name matches a pattern which
+	can't be decided by extension alone (see :func:`_get_special_filenames_re`).
+	The result is the same as :func:`pygments.lexers.get_lexer_for_filename`.
+
+	:param filename: The name of the file, without any directory components.
+	"""
+
+	if '.' in filename and not _get_special_filenames_re().match(filename):
+		key = "*." + filename.rpartition('.')[2]
+	else:
+		key = filename
+
+	try:
+		return _lexer_cache[key]
+	except KeyError:
+		pass
+
+	try:
+		lex = pygments.lexers.get_lexer_for_filename(filename)
+	except pygments.util.ClassNotFound:
+		lex = None
+
+	_lexer_cache[key] = lex
+	return lex
+
+
+def _count_tokens(lex: pygments.lexer.Lexer, source: str) -> typing.Counter[str]:
+	"""
+	Returns a :class:`collections.Counter` of the tokens in ``source``.
+
+	If a :class:`~wordle.tokenizers.Tokenizer` is registered for the lexer it is used in place of Pygments.
+
+	:param lex: The lexer to tokenize the source with.
+	:param source:
+	"""
+
+	counts: Dict[str, int] = {}
+
+	if _lexes_unprocessed(lex):
+		tokenizer = get_tokenizer(lex)
+
+		if tokenizer is not None:
+			try:
+				tokenizer.count(lex._preprocess_lexer_input(source), counts)
+				return _finalise_counts(counts)
+			except Unsupported:
+				counts = {}
+
+	_count_token_stream(_iter_tokens(lex, source), counts)
+	return _finalise_counts(counts)
+
+
+def _iter_tokens(lex: pygments.lexer.Lexer, source: str) -> Iterator[Tuple[Any, str]]:
+	"""
+	Returns an iterator over the ``(tokentype, value)`` pairs in ``source``.
+
+	Equivalent to :meth:`pygments.lexer.Lexer.get_tokens`, but avoids its extra generator layer
+	when that would make no difference (i.e. the lexer has no filters and doesn't override it).
+
+	:param lex: The lexer to tokenize the source with.
+	:param source:
+	"""
+
+	if _lexes_unprocessed(lex):
+		source = lex._preprocess_lexer_input(source)
+		return ((ttype, value) for _, ttype, value in lex.get_tokens_unprocessed(source))
+
+	return lex.get_tokens(source)
+
+
+def _lexes_unprocessed(lex: pygments.lexer.Lexer) -> bool:
+	"""
+	Returns whether the output of ``lex.get_tokens_unprocessed()`` is equivalent to that of ``lex.get_tokens()``,
+	once the input has been preprocessed.
+
+	:param lex:
+	"""
+
+	return (
+			not lex.filters and type(lex).get_tokens is pygments.lexer.Lexer.get_tokens
+			and hasattr(lex, "_preprocess_lexer_input")
+			)
+
+
+# How each token type is handled by _count_token_stream.
+_SKIP = 0  # Never counted.
+_WORD = 1  # Counted unless it consists only of colons.
+_TEXT = 2  # Counted unless whitespace.
+_STRING = 3  # Counted unless a double quote.
+_STRING_DOUBLE = 4  # Counted unless a newline or only double quotes.
+_STRING_SINGLE = 5  # Counted unless a double quote, a newline or only single quotes.
+_STRING_INTERPOL = 6  # Counted unless a double quote or a brace.
+_PUNCTUATION = 7  # Counted unless one of "[],{}:();".
+
+#: Cache of token type -> action, populated by :func:`_token_action`.
+_token_actions: Dict[Any, int] = {}
+
+_colons_re = re.compile("^:*$")
+_double_quotes_re = re.compile(r'^"*$')
+_single_quotes_re = re.compile(r"^'*$")
+_split_re = re.compile("[ \n\t]")
+_punctuation_re = re.compile(f"^[{punctuation}]+$")
+
+
+def _token_action(ttype: Any) -> int:
+	"""
+	Returns the action to take for tokens of the given type.
+
+	:param ttype: A Pygments token type.
+	"""
+
+	action = _token_actions.get(ttype)
+
+	if action is not None:
+		return action
+
+	token = pygments.token
+
+	if ttype in token.Comment or ttype in token.Operator:
+		action = _SKIP
+	elif ttype in token.Text:
+		action = _TEXT
+	elif ttype in token.String.Escape or ttype in token.String.Affix:
+		action = _SKIP
+	elif ttype in token.String.Double:
+		action = _STRING_DOUBLE
+	elif ttype in token.String.Single:
+		action = _STRING_SINGLE
+	elif ttype in token.String.Interpol:
+		action = _STRING_INTERPOL
+	elif ttype in token.String:
+		action = _STRING
+	elif ttype in token.Punctuation:
+		action = _PUNCTUATION
+	else:
+		action = _WORD
+
+	_token_actions[ttype] = action
+	return action
+
+
+def _count_token_stream(tokens: Iterable[Tuple[Any, str]], counts: Dict[str, int]) -> None:
+	"""
+	Count the words in the given ``(tokentype, value)`` pairs, ignoring comments, whitespace, operators etc.
+
+	:param tokens:
+	:param counts: The dictionary to add the counts to. Modified in place.
+	"""
+
+	actions = _token_actions
+	get_action = _token_action
+	count = counts.get
+	split = _split_re.split
+	colons_match = _colons_re.match
+	double_quotes_match = _double_quotes_re.match
+	single_quotes_match = _single_quotes_re.match
+
+	for ttype, value in tokens:
+		action = actions.get(ttype)
+		if action is None:
+			action = get_action(ttype)
+
+		if action == _SKIP:
+			continue
+		elif action == _WORD:
+			pass
+		elif action == _TEXT:
+			if not value or value.isspace():
+				continue
+		elif action == _PUNCTUATION:
+			if value in "[],{}:();":
+				continue
+		elif value == '"':
 			continue
+		elif action == _STRING_DOUBLE:
+			if value == '\n' or double_quotes_match(value):
+				continue
+		elif action == _STRING_SINGLE:
+			if value == '\n' or single_quotes_match(value):
+				continue
+		elif action == _STRING_INTERPOL:
+			if value in "{}":
+				continue
 
-		if re.match("^:*$", token[1]):
+		# Empty, a newline, or only colons (optionally followed by a newline).
+		if not value or (value[0] in ":\n" and colons_match(value)):
 			continue
 
-		total += Counter(re.split("[ \n\t]", token[1]))
+		if ' ' in value or '\n' in value or '\t' in value:
+			for word in split(value):
+				counts[word] = count(word, 0) + 1
+		else:
+			counts[value] = count(value, 0) + 1
 
-	punctuation_to_delete = ['', ' ']
 
-	for word in total:
-		if re.match(f"^[{punctuation}]+$", word):
-			punctuation_to_delete.append(word)
+def _finalise_counts(counts: Dict[str, int]) -> typing.Counter[str]:
+	"""
+	Remove words consisting only of punctuation from ``counts``, and strip trailing colons from the remainder.
 
-	for word in punctuation_to_delete:
-		del total[word]
+	:param counts: The raw counts from :func:`_count_token_stream`.
+	"""
 
+	punctuation_match = _punctuation_re.match
 	all_words: typing.Counter[str] = Counter()
 
-	for word in total:
-		if word.endswith(':'):
-			all_words[word.rstrip(':')] = total[word]
+	for word, word_count in counts.items():
+		if not word or word == ' ' or punctuation_match(word):
+			continue
+
+		# If both "word" and "word:" are present the count of whichever was seen last wins,
+		# but the word keeps the position of whichever was seen first.
+		if word[-1] == ':':
+			all_words[word.rstrip(':')] = word_count
 		else:
-			all_words[word] = total[word]
+			all_words[word] = word_count
 
 	return all_words
 
@@ -141,19 +601,27 @@ def get_tokens(filename: PathLike) -> typing.Counter[str]:
 def frequency_from_file(
 		filename: PathLike,
 		exclude_words: Sequence[str] = (),
+		*,
+		cache: Optional[TokenCache] = None,
+		chunk_size: Optional[int] = None,
 		) -> Counter:
 	"""
 	Returns a dictionary mapping the words in the file to their frequencies.
 
 	:param filename: The file to process
 	:param exclude_words: An optional list of words to exclude
+	:param cache: An optional cache of token counts. See :func:`~.get_tokens` for details.
+	:param chunk_size: If given, large files are lexed in chunks of roughly this many bytes.
+		See :func:`~.get_tokens` for details.
 
 	.. versionadded:: 0.2.0
 
+	.. versionchanged:: 0.3.0  Added the ``cache`` and ``chunk_size`` keyword-only arguments.
+
 	.. seealso:: func:`~.get_tokens`
 	"""
 
-	word_counts = get_tokens(filename)
+	word_counts = get_tokens(filename, cache=cache, chunk_size=chunk_size)
 
 	for word in exclude_words:
 		if word in word_counts:
@@ -166,6 +634,16 @@ def frequency_from_directory(
 		directory: PathLike,
 		exclude_words: Sequence[str] = (),
 		exclude_dirs: Sequence[PathLike] = (),
+		*,
+		workers: Optional[int] = None,
+		cache: Optional[TokenCache] = None,
+		manifest: Optional[PathLike] = None,
+		include_extensions: Optional[Sequence[str]] = None,
+		exclude_extensions: Sequence[str] = (),
+		chunk_size: Optional[int] = None,
+		file_filter: Optional[SourceFilter] = None,
+		max_vocabulary: Optional[int] = None,
+		shard: Optional[Tuple[int, int]] = None,
 		) -> Counter:
 	"""
 	Returns a dictionary mapping the words in files in ``directory`` to their frequencies.
@@ -173,35 +651,93 @@ def frequency_from_directory(
 	:param directory: The directory to process
 	:param exclude_words: An optional list of words to exclude
 	:param exclude_dirs: An optional list of directories to exclude.
+		Each entry is treated as a regular expression to match at the beginning of the relative path.
+		Directories which match are not descended into.
+	:param workers: The number of processes to tokenize files with.
+		If :py:obj:`None` or less than ``2`` the files are processed serially in the current process.
+		Small directories are always processed serially.
+	:param cache: An optional cache of token counts. Files whose content is in the cache are not lexed again.
+		Entries exceeding the cache's size limit are evicted once all files have been processed.
+	:param manifest: An optional file to record the modification time, size and word counts of each file in.
+		If the file exists from a previous run only files which have been added, modified or deleted since
+		are tokenized, and their counts are applied to the saved totals. The file is created if it does not exist.
+	:param include_extensions: If given, only files with one of these extensions (e.g. ``.py``) are processed.
+	:param exclude_extensions: Files with any of these extensions (e.g. ``.min.js``) are not processed.
+		Extensions are compared case-insensitively, and files are rejected by name before being read.
+	:param chunk_size: If given, files larger than this many bytes are lexed in chunks of roughly this size,
+		limiting the memory used by each worker. See :func:`~.get_tokens` for details.
+	:param file_filter: An optional filter which is used to skip binary, minified and generated files
+		before they are read in full. Files which are skipped are recorded in its :attr:`~.SourceFilter.skipped`
+		attribute, by their path relative to ``directory``.
+	:param max_vocabulary: If given, the frequencies are approximated in bounded memory with a
+		:class:`~.FrequencySketch` of this capacity, and at most this many words are returned.
+		Each worker process builds its own sketch, and the sketches are merged,
+		so the approximate frequencies may differ slightly depending on the number of workers.
+		See :class:`~.FrequencySketch` for the accuracy of the frequencies.
+		Cannot be used with ``manifest``.
+	:param shard: An optional ``(index, count)`` tuple. If given, only the files in shard ``index``
+		(counting from zero) of ``count`` shards are processed. Files are assigned to shards by a hash of their
+		path relative to ``directory`` (see :func:`~wordle.utils.shard_of`), so the frequencies of each shard
+		can be computed separately (e.g. on different machines) and added together afterwards.
+		See :mod:`wordle.shard` for details.
 
 	.. versionadded:: 0.2.0
+
+	.. versionchanged:: 0.3.0
+
+		Added the ``workers``, ``cache``, ``manifest``, ``include_extensions``, ``exclude_extensions``,
+		``chunk_size``, ``file_filter``, ``max_vocabulary`` and ``shard`` keyword-only arguments.
 	"""
 
-	# TODO: only certain file extensions
+	if manifest is not None and max_vocabulary is not None:
+		# The manifest records the exact counts for every file.
+		raise ValueError("'manifest' and 'max_vocabulary' cannot be used together.")
 
-	directory = pathlib.Path(directory).absolute()
+	_check_shard(shard)
 
-	exclude_dirs_list = [".git"]
+	directory = pathlib.Path(directory).absolute()
 
-	for d in exclude_dirs:
-		d = pathlib.Path(d)
+	exclude_pattern = _compile_exclude_pattern(exclude_dirs, directory)
+	include = None if include_extensions is None else _normalise_extensions(include_extensions)
+	exclude = _normalise_extensions(exclude_extensions)
+	files = list(
+			_walk_directory(directory, exclude_pattern, include_extensions=include, exclude_extensions=exclude)
+			)
 
-		if d.is_absolute():
-			d = d.relative_to(directory)
+	if shard is not None:
+		files = [path for path in files if shard_of(path.relative_to(directory).as_posix(), shard[1]) == shard[0]]
 
-		exclude_dirs_list.append(str(d))
+	if file_filter is not None:
+		files = [
+				path for path in files
+				if file_filter.check(path, name=path.relative_to(directory).as_posix()) is None
+				]
 
-	def is_excluded(path: pathlib.Path) -> bool:
-		for dir_name in exclude_dirs_list:
-			if re.match(dir_name, path.relative_to(directory).as_posix()):
-				return True
-		return False
+	tokenize = partial(get_tokens, cache=cache, chunk_size=chunk_size)
 
-	word_counts: typing.Counter[str] = Counter()
+	if manifest is None:
+		word_counts = _count_files(files, tokenize, workers=workers, max_vocabulary=max_vocabulary)
+	else:
+		# A manifest made with different options can't be updated incrementally.
+		options = {
+				"chunk_size": chunk_size,
+				"include_extensions": None if include is None else sorted(include),
+				"exclude_extensions": sorted(exclude),
+				"file_filter": None if file_filter is None else _filter_options(file_filter),
+				"max_vocabulary": max_vocabulary,
+				"pygments": pygments.__version__,
+				}
+		word_counts = _count_files_incremental(
+				directory,
+				files,
+				manifest,
+				tokenize,
+				workers=workers,
+				options=options,
+				)
 
-	for file in directory.rglob("**/*.*"):
-		if file.is_file() and not is_excluded(file):
-			word_counts += get_tokens(file)
+	if cache is not None:
+		cache.prune()
 
 	for word in exclude_words:
 		if word in word_counts:
@@ -216,6 +752,16 @@ def frequency_from_git(
 		depth: Optional[int] = None,
 		exclude_words: Sequence[str] = (),
 		exclude_dirs: Sequence[PathLike] = (),
+		*,
+		workers: Optional[int] = None,
+		cache: Optional[TokenCache] = None,
+		include_extensions: Optional[Sequence[str]] = None,
+		exclude_extensions: Sequence[str] = (),
+		checkout: bool = True,
+		mirror_cache: Optional[MirrorCache] = None,
+		file_filter: Optional[SourceFilter] = None,
+		max_vocabulary: Optional[int] = None,
+		shard: Optional[Tuple[int, int]] = None,
 		) -> Counter:
 	"""
 	Returns a dictionary mapping the words in files in ``directory`` to their frequencies.
@@ -226,15 +772,1138 @@ def frequency_from_git(
 		If :py:obj:`None` and ``sha`` is given the depth is unlimited.
 	:param exclude_words: An optional list of words to exclude.
 	:param exclude_dirs: An optional list of directories to exclude.
+	:param workers: The number of processes to tokenize files with.
+		See :func:`~.frequency_from_directory` for details.
+	:param cache: An optional cache of token counts. See :func:`~.frequency_from_directory` for details.
+	:param include_extensions: If given, only files with one of these extensions (e.g. ``.py``) are processed.
+	:param exclude_extensions: Files with any of these extensions (e.g. ``.min.js``) are not processed.
+	:param checkout: If :py:obj:`False` the repository is cloned without a working tree,
+		and the files are read directly from the git object store.
+		Symbolic links are not followed in this mode.
+	:param mirror_cache: An optional cache of local mirrors of git repositories.
+		If given, the repository is fetched into its mirror (only downloading new objects if it has been
+		fetched before) and ``sha`` is looked up in the mirror. ``depth`` is ignored.
+	:param file_filter: An optional filter used to skip binary, minified and generated files.
+		See :func:`~.frequency_from_directory` for details.
+	:param max_vocabulary: If given, the frequencies are approximated in bounded memory.
+		See :func:`~.frequency_from_directory` for details.
+	:param shard: An optional ``(index, count)`` tuple. If given, only the files in that shard are processed.
+		Files are assigned to the same shards whether or not ``checkout`` is :py:obj:`True`.
+		See :func:`~.frequency_from_directory` for details.
 
 	.. versionadded:: 0.2.0
+
+	.. versionchanged:: 0.3.0
+
+		Added the ``workers``, ``cache``, ``include_extensions``, ``exclude_extensions``, ``checkout``,
+		``mirror_cache``, ``file_filter``, ``max_vocabulary`` and ``shard`` keyword-only arguments.
 	"""
 
+	_check_shard(shard)
+
+	if mirror_cache is not None:
+		mirror = mirror_cache.mirror(git_url)
+
+		if not checkout:
+			return _frequency_from_tree(
+					mirror,
+					sha=sha,
+					exclude_dirs=exclude_dirs,
+					exclude_words=exclude_words,
+					workers=workers,
+					cache=cache,
+					include_extensions=include_extensions,
+					exclude_extensions=exclude_extensions,
+					file_filter=file_filter,
+					max_vocabulary=max_vocabulary,
+					shard=shard,
+					)
+
+		# Cloning from the local mirror only copies objects, so there's no need to limit the depth.
+		git_url = os.fspath(mirror)
+		depth = None
+
 	with _TemporaryDirectory() as tmpdir:
+		if not checkout:
+			clone_into_tmpdir(git_url, tmpdir, sha=sha, depth=depth, bare=True)
+
+			return _frequency_from_tree(
+					tmpdir,
+					sha=sha,
+					exclude_dirs=exclude_dirs,
+					exclude_words=exclude_words,
+					workers=workers,
+					cache=cache,
+					include_extensions=include_extensions,
+					exclude_extensions=exclude_extensions,
+					file_filter=file_filter,
+					max_vocabulary=max_vocabulary,
+					shard=shard,
+					)
+
 		clone_into_tmpdir(git_url, tmpdir, sha=sha, depth=depth)
 
 		return frequency_from_directory(
 				tmpdir,
 				exclude_dirs=exclude_dirs,
 				exclude_words=exclude_words,
+				workers=workers,
+				cache=cache,
+				include_extensions=include_extensions,
+				exclude_extensions=exclude_extensions,
+				file_filter=file_filter,
+				max_vocabulary=max_vocabulary,
+				shard=shard,
+				)
+
+
+def frequency_from_repos(
+		git_urls: Iterable[str],
+		exclude_words: Sequence[str] = (),
+		exclude_dirs: Sequence[PathLike] = (),
+		*,
+		workers: Optional[int] = None,
+		cache: Optional[TokenCache] = None,
+		include_extensions: Optional[Sequence[str]] = None,
+		exclude_extensions: Sequence[str] = (),
+		mirror_cache: Optional[MirrorCache] = None,
+		file_filter: Optional[SourceFilter] = None,
+		max_vocabulary: Optional[int] = None,
+		) -> typing.Counter[str]:
+	"""
+	Returns a dictionary mapping the words in the files of several git repositories to their combined frequencies.
+
+	The ``HEAD`` commit of each repository is read directly from the git object store.
+	Files are identified by their git blob SHA, so content which appears more than once
+	(for example in forks, or in vendored copies of the same library) is only tokenized once,
+	although it is counted every time it appears.
+
+	:param git_urls: The urls of the git repositories to process.
+	:param exclude_words: An optional list of words to exclude.
+	:param exclude_dirs: An optional list of directories to exclude, relative to the root of each repository.
+	:param workers: The number of processes to tokenize files with.
+		See :func:`~.frequency_from_directory` for details.
+	:param cache: An optional cache of token counts. If given, the counts for each blob are stored in the cache
+		keyed by its SHA, so blobs seen in a previous run are neither read nor tokenized again.
+	:param include_extensions: If given, only files with one of these extensions (e.g. ``.py``) are processed.
+	:param exclude_extensions: Files with any of these extensions (e.g. ``.min.js``) are not processed.
+	:param mirror_cache: An optional cache of local mirrors of git repositories.
+		See :func:`~.frequency_from_git` for details.
+	:param file_filter: An optional filter used to skip binary, minified and generated files.
+		See :func:`~.frequency_from_directory` for details.
+	:param max_vocabulary: If given, the frequencies are approximated in bounded memory.
+		See :func:`~.frequency_from_directory` for details.
+
+	.. versionadded:: 0.3.0
+	"""
+
+	exclude_pattern = _compile_exclude_pattern(exclude_dirs)
+	include = None if include_extensions is None else _normalise_extensions(include_extensions)
+	exclude = _normalise_extensions(exclude_extensions)
+
+	with _TemporaryDirectory() as tmpdir:
+		blobs: List[Tuple[str, str, bytes]] = []
+
+		for idx, git_url in enumerate(git_urls):
+			if mirror_cache is None:
+				repo_path = clone_into_tmpdir(git_url, os.path.join(tmpdir, str(idx)), bare=True)
+			else:
+				repo_path = mirror_cache.mirror(git_url)
+
+			blobs.extend(_list_blobs(repo_path, None, exclude_pattern, include, exclude))
+
+		word_counts = _count_blobs(
+				blobs,
+				cache=cache,
+				workers=workers,
+				max_vocabulary=max_vocabulary,
+				file_filter=file_filter,
+				)
+
+	if cache is not None:
+		cache.prune()
+
+	for word in exclude_words:
+		if word in word_counts:
+			del word_counts[word]
+
+	return word_counts
+
+
+def frequency_history(
+		git_url: str,
+		commits: Union[str, Sequence[str]],
+		exclude_words: Sequence[str] = (),
+		exclude_dirs: Sequence[PathLike] = (),
+		*,
+		cache: Optional[TokenCache] = None,
+		include_extensions: Optional[Sequence[str]] = None,
+		exclude_extensions: Sequence[str] = (),
+		mirror_cache: Optional[MirrorCache] = None,
+		file_filter: Optional[SourceFilter] = None,
+		) -> List[Tuple[str, typing.Counter[str]]]:
+	"""
+	Returns the word frequencies of a git repository at each of several commits.
+
+	The first commit is tokenized in full. For each subsequent commit only the files which changed
+	since the previous commit are tokenized, and their counts are applied to the running totals.
+	The files are read directly from the git object store.
+
+	:param git_url: The url of the git repository to process.
+	:param commits: Either a sequence of commit SHA hashes, in the order the snapshots should be produced,
+		or a range of the form ``"<start>..<end>"``. A range includes the commits reachable from
+		``<end>`` but not from ``<start>``, oldest first. ``<start>`` may be omitted to begin from the root commit.
+	:param exclude_words: An optional list of words to exclude.
+	:param exclude_dirs: An optional list of directories to exclude.
+	:param cache: An optional cache of token counts. See :func:`~.frequency_from_directory` for details.
+	:param include_extensions: If given, only files with one of these extensions (e.g. ``.py``) are processed.
+	:param exclude_extensions: Files with any of these extensions (e.g. ``.min.js``) are not processed.
+	:param mirror_cache: An optional cache of local mirrors of git repositories.
+		See :func:`~.frequency_from_git` for details.
+	:param file_filter: An optional filter used to skip binary, minified and generated files.
+		See :func:`~.frequency_from_directory` for details.
+
+	:returns: A list of ``(sha, frequencies)`` tuples, one per commit.
+
+	.. versionadded:: 0.3.0
+	"""
+
+	if mirror_cache is not None:
+		return _frequency_history(
+				mirror_cache.mirror(git_url),
+				commits,
+				exclude_words=exclude_words,
+				exclude_dirs=exclude_dirs,
+				cache=cache,
+				include_extensions=include_extensions,
+				exclude_extensions=exclude_extensions,
+				file_filter=file_filter,
+				)
+
+	with _TemporaryDirectory() as tmpdir:
+		# Passing a sha ensures the full history is fetched.
+		clone_into_tmpdir(git_url, tmpdir, sha="HEAD", bare=True)
+
+		return _frequency_history(
+				tmpdir,
+				commits,
+				exclude_words=exclude_words,
+				exclude_dirs=exclude_dirs,
+				cache=cache,
+				include_extensions=include_extensions,
+				exclude_extensions=exclude_extensions,
+				file_filter=file_filter,
 				)
+
+
+def _frequency_history(
+		repo_path: PathLike,
+		commits: Union[str, Sequence[str]],
+		exclude_words: Sequence[str] = (),
+		exclude_dirs: Sequence[PathLike] = (),
+		*,
+		cache: Optional[TokenCache] = None,
+		include_extensions: Optional[Sequence[str]] = None,
+		exclude_extensions: Sequence[str] = (),
+		file_filter: Optional[SourceFilter] = None,
+		) -> List[Tuple[str, typing.Counter[str]]]:
+	"""
+	Returns the word frequencies of the git repository at ``repo_path`` at each of several commits.
+
+	:param repo_path: The path to the (possibly bare) git repository.
+
+	See :func:`~.frequency_history` for the other arguments.
+	"""
+
+	exclude_pattern = _compile_exclude_pattern(exclude_dirs)
+	include = None if include_extensions is None else _normalise_extensions(include_extensions)
+	exclude = _normalise_extensions(exclude_extensions)
+
+	def included(path: str, mode: int) -> bool:
+		return _tree_path_included(path, mode, exclude_pattern, include, exclude)
+
+	repo_path = os.fspath(repo_path)
+	tokenize = _BlobTokenizer(cache=cache, file_filter=file_filter)
+
+	# The counts for each file in the previous commit, so they can be subtracted when it changes.
+	path_counts: Dict[str, typing.Counter[str]] = {}
+	word_counts: typing.Counter[str] = Counter()
+	history: List[Tuple[str, typing.Counter[str]]] = []
+
+	try:
+		with Repo(repo_path) as repo:
+			previous_tree: Optional[bytes] = None
+
+			for sha in _resolve_commits(repo, commits):
+				tree = _resolve_tree(repo, sha)
+
+				for change in tree_changes(repo.object_store, previous_tree, tree):
+					old_path = _tree_entry_path(change.old)
+					new_path = _tree_entry_path(change.new)
+
+					if old_path in path_counts:
+						word_counts.subtract(path_counts.pop(old_path))
+
+					new_entry = change.new
+					if new_path is None or new_entry is None or not included(new_path, new_entry.mode):
+						continue
+
+					reason, counts = tokenize.filtered((repo_path, new_path, new_entry.sha))
+					if file_filter is not None and reason is not None:
+						file_filter.skipped[new_path] = reason
+						continue
+
+					path_counts[new_path] = counts
+					word_counts.update(counts)
+
+				snapshot = Counter({word: count for word, count in word_counts.items() if count > 0})
+
+				for word in exclude_words:
+					if word in snapshot:
+						del snapshot[word]
+
+				history.append((sha, snapshot))
+				previous_tree = tree
+
+	finally:
+		tokenize.close()
+
+	if cache is not None:
+		cache.prune()
+
+	return history
+
+
+def _resolve_commits(repo: Repo, commits: Union[str, Sequence[str]]) -> List[str]:
+	"""
+	Returns the list of commit SHA hashes for ``commits``.
+
+	:param repo:
+	:param commits: A sequence of commit SHA hashes, or a range of the form ``"<start>..<end>"``.
+	"""
+
+	if not isinstance(commits, str):
+		return list(commits)
+
+	start, sep, end = commits.partition("..")
+
+	if not sep:
+		return [commits]
+
+	walker = repo.get_walker(
+			include=[repo[(end or "HEAD").encode("UTF-8")].id],
+			exclude=[repo[start.encode("UTF-8")].id] if start else None,
+			reverse=True,
+			)
+
+	return [entry.commit.id.decode("UTF-8") for entry in walker]
+
+
+def _tree_entry_path(entry: Optional[TreeEntry]) -> Optional[str]:
+	"""
+	Returns the path of one side of a :class:`dulwich.diff_tree.TreeChange`,
+	or :py:obj:`None` if the file doesn't exist on that side.
+
+	:param entry:
+	"""
+
+	# Older versions of dulwich use an entry with all fields set to None rather than None itself.
+	if entry is None or entry.path is None:
+		return None
+
+	return entry.path.decode("UTF-8", errors="surrogateescape")
+
+
+def _tree_path_included(
+		path: str,
+		mode: int,
+		exclude_pattern: Pattern[str],
+		include_extensions: Optional[Tuple[str, ...]] = None,
+		exclude_extensions: Tuple[str, ...] = (),
+		) -> bool:
+	"""
+	Returns whether the file at ``path`` in a git tree would be yielded by :func:`_iter_tree`.
+
+	:param path: The path of the file relative to the root of the tree.
+	:param mode: The file's mode in the tree.
+	:param exclude_pattern:
+	:param include_extensions:
+	:param exclude_extensions:
+	"""
+
+	name = posixpath.basename(path)
+
+	if not stat.S_ISREG(mode) or '.' not in name:
+		return False
+	if not _extension_allowed(name, include_extensions, exclude_extensions):
+		return False
+	if exclude_pattern.match(path):
+		return False
+
+	# _iter_tree doesn't descend into excluded directories.
+	parent = path.find('/')
+	while parent != -1:
+		if exclude_pattern.match(path[:parent + 1]):
+			return False
+		parent = path.find('/', parent + 1)
+
+	return True
+
+
+def _check_shard(shard: Optional[Tuple[int, int]]) -> None:
+	"""
+	Raises a :exc:`ValueError` if ``shard`` is not a valid ``(index, count)`` tuple.
+
+	:param shard:
+	"""
+
+	if shard is not None and not 0 <= shard[0] < shard[1]:
+		raise ValueError(f"Invalid shard {shard[0]} of {shard[1]}. The index must be between 0 and count - 1.")
+
+
+def _compile_exclude_pattern(
+		exclude_dirs: Sequence[PathLike],
+		directory: Optional[pathlib.Path] = None,
+		) -> Pattern[str]:
+	"""
+	Combine ``.git`` and the given directory patterns into a single regular expression.
+
+	:param exclude_dirs:
+	:param directory: If given, absolute paths in ``exclude_dirs`` are made relative to this directory.
+	"""
+
+	exclude_dirs_list = [".git"]
+
+	for d in exclude_dirs:
+		d = pathlib.Path(d)
+
+		if directory is not None and d.is_absolute():
+			d = d.relative_to(directory)
+
+		exclude_dirs_list.append(str(d))
+
+	return re.compile('|'.join(f"(?:{dir_name})" for dir_name in exclude_dirs_list))
+
+
+def _normalise_extensions(extensions: Iterable[str]) -> Tuple[str, ...]:
+	"""
+	Normalise a list of file extensions to lowercase with a leading ``.``.
+
+	:param extensions:
+	"""
+
+	return tuple(ext.lower() if ext.startswith('.') else f".{ext.lower()}" for ext in extensions)
+
+
+def _walk_directory(
+		directory: pathlib.Path,
+		exclude_pattern: Pattern[str],
+		include_extensions: Optional[Tuple[str, ...]] = None,
+		exclude_extensions: Tuple[str, ...] = (),
+		) -> Iterator[pathlib.Path]:
+	"""
+	Yields the files in ``directory`` (recursively) which have a file extension and are not excluded.
+
+	Files are yielded in the same order as ``directory.rglob("**/*.*")``, but excluded directories
+	are pruned before being descended into rather than having each of their files filtered afterwards.
+	Symbolic links to directories are not followed.
+
+	:param directory:
+	:param exclude_pattern: Pattern matched against the beginning of each path relative to ``directory``.
+		Directories are matched with a trailing ``/``.
+	:param include_extensions: If not :py:obj:`None`, only files ending with one of these extensions are yielded.
+		Must be normalised with :func:`_normalise_extensions`.
+	:param exclude_extensions: Files ending with one of these extensions are not yielded.
+		Must be normalised with :func:`_normalise_extensions`.
+	"""
+
+	check_extension = include_extensions is not None or bool(exclude_extensions)
+
+	stack = [(os.fspath(directory), '')]
+
+	while stack:
+		path, relative_path = stack.pop()
+		subdirs = []
+
+		try:
+			with os.scandir(path) as it:
+				entries = list(it)
+		except PermissionError:
+			continue
+
+		for entry in entries:
+			name = entry.name
+
+			try:
+				if entry.is_dir(follow_symlinks=False):
+					if not exclude_pattern.match(f"{relative_path}{name}/"):
+						subdirs.append((entry.path, f"{relative_path}{name}/"))
+				elif '.' in name:
+					if check_extension and not _extension_allowed(name, include_extensions, exclude_extensions):
+						continue
+					if entry.is_file() and not exclude_pattern.match(f"{relative_path}{name}"):
+						yield pathlib.Path(entry.path)
+			except OSError:
+				continue
+
+		stack.extend(reversed(subdirs))
+
+
+def _extension_allowed(
+		filename: str,
+		include_extensions: Optional[Tuple[str, ...]],
+		exclude_extensions: Tuple[str, ...],
+		) -> bool:
+	"""
+	Returns whether the file with the given name should be processed, based on its extension.
+
+	:param filename:
+	:param include_extensions:
+	:param exclude_extensions:
+	"""
+
+	filename = filename.lower()
+
+	if include_extensions is not None and not filename.endswith(include_extensions):
+		return False
+
+	return not filename.endswith(exclude_extensions)
+
+
+def _iter_tree(
+		object_store: BaseObjectStore,
+		tree_id: bytes,
+		exclude_pattern: Pattern[str],
+		include_extensions: Optional[Tuple[str, ...]] = None,
+		exclude_extensions: Tuple[str, ...] = (),
+		) -> Iterator[Tuple[str, bytes]]:
+	"""
+	The git tree counterpart to :func:`_walk_directory`.
+
+	Yields ``(path, blob_id)`` pairs for regular files in the tree (recursively) which have a file extension
+	and are not excluded. Symbolic links and submodules are skipped.
+
+	:param object_store:
+	:param tree_id: The ID of the tree object to walk.
+	:param exclude_pattern: Pattern matched against the beginning of each path relative to the root of the tree.
+		Directories are matched with a trailing ``/``.
+	:param include_extensions: If not :py:obj:`None`, only files ending with one of these extensions are yielded.
+	:param exclude_extensions: Files ending with one of these extensions are not yielded.
+
+	:raises dulwich.errors.NotTreeError: If ``tree_id`` is not the ID of a tree.
+	"""
+
+	check_extension = include_extensions is not None or bool(exclude_extensions)
+	stack = [(tree_id, '')]
+
+	while stack:
+		tree_id, relative_path = stack.pop()
+		subtrees = []
+
+		tree = object_store[tree_id]
+		if not isinstance(tree, Tree):
+			raise NotTreeError(tree_id)
+
+		for entry in tree.iteritems():
+			name = entry.path.decode("UTF-8", errors="surrogateescape")
+
+			if stat.S_ISDIR(entry.mode):
+				if not exclude_pattern.match(f"{relative_path}{name}/"):
+					subtrees.append((entry.sha, f"{relative_path}{name}/"))
+			elif stat.S_ISREG(entry.mode) and '.' in name:
+				if check_extension and not _extension_allowed(name, include_extensions, exclude_extensions):
+					continue
+				if not exclude_pattern.match(f"{relative_path}{name}"):
+					yield f"{relative_path}{name}", entry.sha
+
+		stack.extend(reversed(subtrees))
+
+
+#: The size of the counts a :class:`_BlobTokenizer` remembers, as one per blob plus the number of distinct words.
+_BLOB_MEMO_SIZE = 1_000_000
+
+
+class _BlobTokenizer:
+	"""
+	Tokenizes ``(repo_path, path, blob_id)`` triples, reading each blob from the (possibly bare)
+	git repository at ``repo_path``.
+
+	Blobs are identified by their SHA, so the counts for a blob are remembered and reused whenever
+	the same blob is seen again with the same lexer, e.g. in a later commit or in a fork of the repository.
+	The least recently used counts are forgotten once they hold more than about :data:`~._BLOB_MEMO_SIZE` words.
+	If a :class:`~.TokenCache` is given the counts are also looked up in (and stored in) the cache,
+	keyed by the blob's SHA, so a blob which is already cached is not even read from the object store.
+
+	If a :class:`~.SourceFilter` is given :meth:`~.filtered` checks each blob with it,
+	using the same bytes that are then tokenized.
+
+	Instances can be pickled and sent to worker processes, each of which opens the repositories itself.
+
+	:param cache: An optional cache of token counts.
+	:param memo: Whether to remember the counts for each blob, in case it is seen again.
+	:param file_filter: An optional filter to check the content of each blob with.
+	"""
+
+	def __init__(
+			self,
+			cache: Optional[TokenCache] = None,
+			memo: bool = True,
+			file_filter: Optional[SourceFilter] = None,
+			):
+		self.cache = cache
+		self.memo = memo
+		self.file_filter = file_filter
+		self._repos: Dict[str, Repo] = {}
+		self._memo: _LRUCache[Tuple[Optional[str], typing.Counter[str]]] = _LRUCache(
+				_BLOB_MEMO_SIZE,
+				lambda value: 1 + len(value[1]),
+				)
+
+	def __reduce__(self) -> Tuple[Any, ...]:
+		return self.__class__, (self.cache, self.memo, self.file_filter)
+
+	def __call__(self, item: Tuple[str, str, bytes]) -> typing.Counter[str]:
+		"""
+		Returns the token counts for the given blob.
+
+		The returned counter may be shared with other calls and must not be modified.
+		"""
+
+		return self.filtered(item)[1]
+
+	def filtered(self, item: Tuple[str, str, bytes]) -> Tuple[Optional[str], typing.Counter[str]]:
+		"""
+		Returns the reason the given blob is skipped by :attr:`~.file_filter` (or :py:obj:`None`),
+		and its token counts.
+
+		Blobs which are skipped, or which have no lexer, have no counts.
+		Skipped blobs are not recorded in the filter's :attr:`~.SourceFilter.skipped`,
+		as this may be a worker process.
+
+		The returned counter may be shared with other calls and must not be modified.
+		"""
+
+		repo_path, path, blob_id = item
+
+		lex = _get_lexer(posixpath.basename(path))
+		if lex is None and self.file_filter is None:
+			return None, Counter()
+
+		if not self.memo:
+			return self._tokenize(lex, repo_path, blob_id)
+
+		key = (None if lex is None else lex.name, blob_id)
+		return self._memo.get(key, lambda: self._tokenize(lex, repo_path, blob_id))
+
+	def _tokenize(
+			self,
+			lex: Optional[pygments.lexer.Lexer],
+			repo_path: str,
+			blob_id: bytes,
+			) -> Tuple[Optional[str], typing.Counter[str]]:
+		"""
+		Checks the given blob with the filter, then returns its token counts from the cache
+		or by tokenizing it. The blob is read at most once.
+		"""
+
+		data = None
+
+		if self.file_filter is not None:
+			data = self._read(repo_path, blob_id)
+			reason = self.file_filter.check_data(data)
+			if reason is not None or lex is None:
+				return reason, Counter()
+
+		assert lex is not None
+
+		digest = f"git-blob:{blob_id.decode('ASCII')}"
+		tokens = None if self.cache is None else self.cache.get(digest, lex.name)
+
+		if tokens is None:
+			if data is None:
+				data = self._read(repo_path, blob_id)
+
+			tokens = _count_tokens(lex, data.decode("UTF-8"))
+
+			if self.cache is not None:
+				self.cache.put(digest, lex.name, tokens)
+
+		return None, tokens
+
+	def _read(self, repo_path: str, blob_id: bytes) -> bytes:
+		"""
+		Returns the content of the given blob.
+		"""
+
+		if repo_path not in self._repos:
+			self._repos[repo_path] = Repo(repo_path)
+
+		blob = self._repos[repo_path][blob_id]
+		if not isinstance(blob, Blob):
+			raise NotBlobError(blob_id)
+
+		return blob.data
+
+	def close(self) -> None:
+		"""
+		Close any repositories which have been opened.
+		"""
+
+		for repo in self._repos.values():
+			repo.close()
+
+		self._repos.clear()
+
+
+def _count_blobs(
+		blobs: Sequence[Tuple[str, str, bytes]],
+		cache: Optional[TokenCache] = None,
+		workers: Optional[int] = None,
+		max_vocabulary: Optional[int] = None,
+		file_filter: Optional[SourceFilter] = None,
+		) -> typing.Counter[str]:
+	"""
+	Tokenize the given ``(repo_path, path, blob_id)`` triples and return the combined word counts.
+
+	Each distinct blob is tokenized only once, however many times it appears,
+	and the result (including the order of the keys) is identical to tokenizing every file in turn.
+
+	:param blobs:
+	:param cache: An optional cache of token counts.
+	:param workers: The number of worker processes.
+	:param max_vocabulary: If given, the counts are approximated with a :class:`~.FrequencySketch`
+		of this capacity, rather than counted exactly.
+	:param file_filter: An optional filter to check the content of each blob with.
+		Each blob is checked on the same bytes that are then tokenized.
+	"""
+
+	# Map each file to the first file with the same content and lexer.
+	unique: List[Tuple[str, str, bytes]] = []
+	first_seen: Dict[Tuple[Optional[str], bytes], int] = {}
+	counted: List[Tuple[str, str, bytes]] = []
+	references: List[int] = []
+
+	for blob in blobs:
+		lex = _get_lexer(posixpath.basename(blob[1]))
+
+		# Files without a lexer are only read to report whether the filter would skip them.
+		if lex is None and file_filter is None:
+			continue
+
+		key = (None if lex is None else lex.name, blob[2])
+		if key not in first_seen:
+			first_seen[key] = len(unique)
+			unique.append(blob)
+
+		counted.append(blob)
+		references.append(first_seen[key])
+
+	# Each blob in ``unique`` is only tokenized once, so there's no need to remember the counts.
+	tokenize = _BlobTokenizer(cache=cache, memo=False, file_filter=file_filter)
+	reasons: List[Optional[str]] = []
+	blob_counts: List[typing.Counter[str]] = []
+	sketch = None if max_vocabulary is None else FrequencySketch(max_vocabulary)
+	multiplicity = Counter(references)
+
+	try:
+		for idx, (reason, counts) in enumerate(_map_files(unique, tokenize.filtered, workers=workers)):
+			reasons.append(reason)
+			if sketch is None:
+				blob_counts.append(counts)
+			else:
+				sketch.update(counts, weight=multiplicity[idx])
+	finally:
+		tokenize.close()
+
+	if file_filter is not None:
+		for (_, path, _), idx in zip(counted, references):
+			reason = reasons[idx]
+			if reason is not None:
+				file_filter.skipped[path] = reason
+
+	if sketch is not None:
+		return sketch.counts()
+
+	word_counts: typing.Counter[str] = Counter()
+
+	for idx in references:
+		word_counts.update(blob_counts[idx])
+
+	return word_counts
+
+
+def _resolve_tree(repo: Repo, sha: Optional[str] = None) -> bytes:
+	"""
+	Returns the ID of the tree for the given commit (or ``HEAD``) in the repository.
+
+	:param repo:
+	:param sha: The SHA hash of the commit, or another name resolvable in the repository.
+	"""
+
+	obj = repo[repo.head() if sha is None else sha.encode("UTF-8")]
+
+	while isinstance(obj, Tag):
+		obj = repo[obj.object[1]]
+
+	if isinstance(obj, Commit):
+		return obj.tree
+
+	return obj.id
+
+
+def _list_blobs(
+		repo_path: PathLike,
+		sha: Optional[str],
+		exclude_pattern: Pattern[str],
+		include_extensions: Optional[Tuple[str, ...]] = None,
+		exclude_extensions: Tuple[str, ...] = (),
+		shard: Optional[Tuple[int, int]] = None,
+		) -> List[Tuple[str, str, bytes]]:
+	"""
+	Returns ``(repo_path, path, blob_id)`` triples for the files in the given commit, for :func:`_count_blobs`.
+
+	:param repo_path: The path to the (possibly bare) git repository.
+	:param sha: The SHA hash of the commit. Defaults to ``HEAD``.
+	:param exclude_pattern:
+	:param include_extensions:
+	:param exclude_extensions:
+	:param shard: An optional ``(index, count)`` tuple. If given, only the files in that shard are returned.
+
+	See :func:`_iter_tree` for details of the other arguments.
+	"""
+
+	repo_path = os.fspath(repo_path)
+
+	with Repo(repo_path) as repo:
+		tree = _iter_tree(
+				repo.object_store,
+				_resolve_tree(repo, sha),
+				exclude_pattern,
+				include_extensions=include_extensions,
+				exclude_extensions=exclude_extensions,
+				)
+
+		if shard is not None:
+			tree = ((path, blob_id) for path, blob_id in tree if shard_of(path, shard[1]) == shard[0])
+
+		return [(repo_path, path, blob_id) for path, blob_id in tree]
+
+
+def _frequency_from_tree(
+		repo_path: PathLike,
+		sha: Optional[str] = None,
+		exclude_words: Sequence[str] = (),
+		exclude_dirs: Sequence[PathLike] = (),
+		*,
+		workers: Optional[int] = None,
+		cache: Optional[TokenCache] = None,
+		include_extensions: Optional[Sequence[str]] = None,
+		exclude_extensions: Sequence[str] = (),
+		file_filter: Optional[SourceFilter] = None,
+		max_vocabulary: Optional[int] = None,
+		shard: Optional[Tuple[int, int]] = None,
+		) -> typing.Counter[str]:
+	"""
+	Returns a dictionary mapping the words in files in a git commit to their frequencies.
+
+	The files are read directly from the repository's object store, so a working tree is not needed.
+
+	:param repo_path: The path to the (possibly bare) git repository.
+	:param sha: The SHA hash of the commit. Defaults to ``HEAD``.
+
+	See :func:`~.frequency_from_directory` for the other arguments.
+	"""
+
+	blobs = _list_blobs(
+			repo_path,
+			sha,
+			exclude_pattern=_compile_exclude_pattern(exclude_dirs),
+			include_extensions=None if include_extensions is None else _normalise_extensions(include_extensions),
+			exclude_extensions=_normalise_extensions(exclude_extensions),
+			shard=shard,
+			)
+
+	word_counts = _count_blobs(
+			blobs,
+			cache=cache,
+			workers=workers,
+			max_vocabulary=max_vocabulary,
+			file_filter=file_filter,
+			)
+
+	if cache is not None:
+		cache.prune()
+
+	for word in exclude_words:
+		if word in word_counts:
+			del word_counts[word]
+
+	return word_counts
+
+
+#: Directories containing fewer files than this are always tokenized in the current process,
+#: as the cost of starting worker processes would outweigh any gain.
+_PARALLEL_THRESHOLD = 64
+
+
+def _count_chunk(
+		files: Sequence[_T],
+		tokenize: Callable[[_T], typing.Counter[str]],
+		) -> typing.Counter[str]:
+	"""
+	Tokenize each of the given files and return the combined word counts.
+
+	:param files: The files to tokenize.
+	:param tokenize: The function used to tokenize each file.
+	"""
+
+	word_counts: typing.Counter[str] = Counter()
+
+	for file in files:
+		word_counts += tokenize(file)
+
+	return word_counts
+
+
+def _sketch_chunk(
+		files: Sequence[_T],
+		tokenize: Callable[[_T], typing.Counter[str]],
+		capacity: int,
+		) -> FrequencySketch:
+	"""
+	Tokenize each of the given files and return a sketch of the combined word counts.
+
+	:param files: The files to tokenize.
+	:param tokenize: The function used to tokenize each file.
+	:param capacity: The capacity of the sketch.
+	"""
+
+	sketch = FrequencySketch(capacity)
+
+	for file in files:
+		sketch.update(tokenize(file))
+
+	return sketch
+
+
+def _count_files(
+		files: Sequence[_T],
+		tokenize: Callable[[_T], typing.Counter[str]],
+		workers: Optional[int] = None,
+		max_vocabulary: Optional[int] = None,
+		) -> typing.Counter[str]:
+	"""
+	Tokenize the given files, optionally spreading them across a pool of worker processes.
+
+	The files are split into contiguous chunks and the per-chunk counts are combined in order,
+	so the result (including the order of the keys) is identical to processing the files serially.
+	Approximate counts are deterministic, but depend on how the files were split into chunks.
+
+	:param files:
+	:param tokenize: The function used to tokenize each file. Must be picklable.
+	:param workers: The number of worker processes.
+	:param max_vocabulary: If given, the counts are approximated with a :class:`~.FrequencySketch`
+		of this capacity, rather than counted exactly.
+	"""
+
+	if max_vocabulary is not None:
+		sketch = FrequencySketch(max_vocabulary)
+
+		for chunk_sketch in _map_chunks(files, partial(_sketch_chunk, capacity=max_vocabulary), tokenize, workers):
+			sketch.merge(chunk_sketch)
+
+		return sketch.counts()
+
+	word_counts: typing.Counter[str] = Counter()
+
+	for chunk_counts in _map_chunks(files, _count_chunk, tokenize, workers):
+		word_counts += chunk_counts
+
+	return word_counts
+
+
+def _map_chunks(
+		files: Sequence[_T],
+		count_chunk: Callable[[Sequence[_T], Callable[[_T], typing.Counter[str]]], _C],
+		tokenize: Callable[[_T], typing.Counter[str]],
+		workers: Optional[int] = None,
+		) -> Iterator[_C]:
+	"""
+	Split the given files into contiguous chunks and count each chunk, optionally using a pool of worker processes.
+
+	The results for each chunk are yielded in order. When processing serially all files are in a single chunk.
+
+	:param files:
+	:param count_chunk: The function used to count each chunk. Must be picklable.
+	:param tokenize: The function used to tokenize each file. Must be picklable.
+	:param workers: The number of worker processes.
+	"""
+
+	if workers is None or workers < 2 or len(files) < _PARALLEL_THRESHOLD:
+		yield count_chunk(files, tokenize)
+		return
+
+	# Several chunks per worker keeps the pool busy when file sizes are uneven.
+	chunksize = max(1, len(files) // (workers * 4))
+	chunks: List[Sequence[_T]] = [files[i:i + chunksize] for i in range(0, len(files), chunksize)]
+
+	with ProcessPoolExecutor(max_workers=workers) as executor:
+		yield from executor.map(count_chunk, chunks, repeat(tokenize))
+
+
+def _map_files(
+		files: Sequence[_T],
+		tokenize: Callable[[_T], _C],
+		workers: Optional[int] = None,
+		) -> Iterator[_C]:
+	"""
+	Tokenize the given files, optionally using a pool of worker processes, yielding the counts for each file in turn.
+
+	:param files:
+	:param tokenize: The function used to tokenize each file. Must be picklable.
+	:param workers: The number of worker processes.
+	"""
+
+	if workers is None or workers < 2 or len(files) < _PARALLEL_THRESHOLD:
+		yield from map(tokenize, files)
+		return
+
+	chunksize = max(1, len(files) // (workers * 4))
+
+	with ProcessPoolExecutor(max_workers=workers) as executor:
+		yield from executor.map(tokenize, files, chunksize=chunksize)
+
+
+def _filter_options(file_filter: SourceFilter) -> List[Any]:
+	"""
+	Returns a JSON-serialisable list of the settings of ``file_filter``, for the manifest.
+
+	:param file_filter:
+	"""
+
+	return [
+			file_filter.max_size,
+			file_filter.sniff_size,
+			file_filter.binary,
+			file_filter.max_line_length,
+			None if file_filter.generated_markers is None else list(file_filter.generated_markers),
+			file_filter.marker_lines,
+			]
+
+
+def _load_manifest(
+		directory: pathlib.Path,
+		manifest: pathlib.Path,
+		options: Optional[Dict[str, Any]] = None,
+		) -> Optional[Dict]:
+	"""
+	Load the manifest for ``directory`` from the given file.
+
+	Returns :py:obj:`None` if the manifest does not exist, cannot be read,
+	or was created for another directory, version of wordle or set of options.
+
+	:param directory:
+	:param manifest:
+	:param options: The options which affect the counts.
+	"""
+
+	try:
+		data = json.loads(manifest.read_text(encoding="UTF-8"))
+	except (OSError, ValueError):
+		return None
+
+	if not isinstance(data, dict):
+		return None
+	if data.get("version") != _wordle_version() or data.get("directory") != directory.as_posix():
+		return None
+	if data.get("options") != options:
+		return None
+
+	return data
+
+
+def _count_files_incremental(
+		directory: pathlib.Path,
+		files: Sequence[pathlib.Path],
+		manifest: PathLike,
+		tokenize: Callable[[pathlib.Path], typing.Counter[str]],
+		workers: Optional[int] = None,
+		options: Optional[Dict[str, Any]] = None,
+		) -> typing.Counter[str]:
+	"""
+	Tokenize the given files, reusing the counts recorded in ``manifest`` for files which have not changed.
+
+	Files are considered unchanged if their modification time and size match those in the manifest.
+	As with git's index, files modified at or after the time the manifest was last written are always
+	tokenized again, since a change within the filesystem's timestamp resolution would otherwise be missed.
+
+	:param directory:
+	:param files:
+	:param manifest: The file the manifest is stored in.
+	:param tokenize: The function used to tokenize each file. Must be picklable.
+	:param workers: The number of worker processes.
+	:param options: A JSON-serialisable mapping of the options which affect the counts.
+		If they differ from those the manifest was made with every file is tokenized again.
+	"""
+
+	manifest = pathlib.Path(manifest)
+	scan_time = time.time_ns()
+
+	previous = _load_manifest(directory, manifest, options)
+	old_entries: Dict[str, list]
+	word_counts: typing.Counter[str]
+
+	if previous is None:
+		old_entries = {}
+		word_counts = Counter()
+		last_scan = 0
+	else:
+		old_entries = previous["files"]
+		word_counts = Counter(dict(previous["total"]))
+		last_scan = previous["timestamp"]
+
+	entries: Dict[str, list] = {}
+	changed: List[pathlib.Path] = []
+
+	for file in files:
+		relative_path = file.relative_to(directory).as_posix()
+		file_stat = file.stat()
+		entry = old_entries.pop(relative_path, None)
+
+		if entry is not None:
+			mtime, size, counts = entry
+
+			if mtime == file_stat.st_mtime_ns and size == file_stat.st_size and mtime < last_scan:
+				entries[relative_path] = entry
+				continue
+
+			word_counts.subtract(dict(counts))
+
+		entries[relative_path] = [file_stat.st_mtime_ns, file_stat.st_size, []]
+		changed.append(file)
+
+	# Anything left over has been deleted or is now excluded.
+	for _, _, counts in old_entries.values():
+		word_counts.subtract(dict(counts))
+
+	for file, file_counts in zip(changed, _map_files(changed, tokenize, workers=workers)):
+		entries[file.relative_to(directory).as_posix()][2] = list(file_counts.items())
+		word_counts.update(file_counts)
+
+	# Drop words which no longer appear in any file.
+	word_counts = +word_counts
+
+	data = {
+			"version": _wordle_version(),
+			"directory": directory.as_posix(),
+			"options": options,
+			"timestamp": scan_time,
+			"files": entries,
+			"total": list(word_counts.items()),
+			}
+
+	tmp_manifest = manifest.with_name(f".{manifest.name}.{os.getpid()}.tmp")
+	tmp_manifest.write_text(json.dumps(data, ensure_ascii=False, separators=(',', ':')), encoding="UTF-8")
+	os.replace(tmp_manifest, manifest)
+
+	return word_counts
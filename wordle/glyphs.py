@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+#
+#  glyphs.py
+"""
+A process-wide, in-memory cache of fonts, text sizes and rasterized words.
+
+.. versionadded:: 0.3.0
+"""
+#
+#  Copyright (c) 2020-2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+
+# stdlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, NamedTuple, Optional, Tuple, TypeVar
+
+# 3rd party
+from PIL import Image, ImageDraw, ImageFont  # type: ignore[import-untyped]
+
+__all__ = ["Glyph", "GlyphCache", "glyph_cache"]
+
+_V = TypeVar("_V")
+
+# Before Pillow 9.2 rotated fonts can't be measured with textbbox, and are drawn without an offset.
+_TRANSPOSED_BBOX = hasattr(ImageFont.TransposedFont, "getbbox")
+
+
+class _LRUCache(Generic[_V]):
+	"""
+	A least-recently-used mapping, bounded by the total size of its values.
+
+	:param max_size: The maximum total size of the values.
+	:param sizeof: Function returning the size of a value. By default each value has a size of ``1``.
+	"""
+
+	def __init__(self, max_size: int, sizeof: Optional[Callable[[_V], int]] = None):
+		self.max_size = int(max_size)
+		self.size = 0
+		self.hits = 0
+		self.misses = 0
+		self._sizeof = sizeof or (lambda value: 1)
+		self._entries: "OrderedDict[Hashable, Tuple[_V, int]]" = OrderedDict()
+		self._lock = threading.Lock()
+
+	def get(self, key: Hashable, compute: Callable[[], _V]) -> _V:
+		"""
+		Returns the value for ``key``, computing and storing it if it isn't in the cache.
+
+		:param key:
+		:param compute: Function called to compute the value.
+		"""
+
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is not None:
+				self._entries.move_to_end(key)
+				self.hits += 1
+				return entry[0]
+
+			self.misses += 1
+
+		value = compute()
+		size = self._sizeof(value)
+
+		with self._lock:
+			if key not in self._entries and size <= self.max_size:
+				self._entries[key] = (value, size)
+				self.size += size
+
+				while self.size > self.max_size:
+					_, (_, evicted_size) = self._entries.popitem(last=False)
+					self.size -= evicted_size
+
+		return value
+
+	def clear(self) -> None:
+		"""
+		Remove all entries from the cache.
+		"""
+
+		with self._lock:
+			self._entries.clear()
+			self.size = self.hits = self.misses = 0
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+
+class Glyph(NamedTuple):
+	"""
+	A word rasterized in a given font.
+
+	.. versionadded:: 0.3.0
+	"""
+
+	#: The offset of the top-left corner of :attr:`~.mask` from the position the word is drawn at,
+	#: as ``(x, y)`` in PIL's coordinates.
+	offset: Tuple[int, int]
+
+	#: Greyscale image of the word, which is ``255`` where the word is fully opaque.
+	#: :py:obj:`None` if the word has no visible pixels.
+	mask: Optional[Image.Image]
+
+
+class GlyphCache:
+	"""
+	A bounded, least-recently-used cache of fonts, text bounding boxes and rasterized words.
+
+	Laying out and drawing a word cloud opens the same fonts, and measures and draws the same words,
+	many times over. The cache is keyed on the font file, font size, word and orientation,
+	so it can be shared by any number of :class:`~wordle.Wordle` instances.
+
+	:param max_fonts: The maximum number of fonts to keep open.
+	:param max_boxes: The maximum number of text bounding boxes to keep.
+	:param max_glyph_bytes: The maximum total size, in bytes, of the rasterized words to keep.
+	"""
+
+	def __init__(self, max_fonts: int = 256, max_boxes: int = 65536, max_glyph_bytes: int = 64 * 1024 * 1024):
+		self._fonts: _LRUCache[ImageFont.TransposedFont] = _LRUCache(max_fonts)
+		self._boxes: _LRUCache[Tuple[int, int, int, int]] = _LRUCache(max_boxes)
+		self._glyphs: _LRUCache[Glyph] = _LRUCache(
+				max_glyph_bytes,
+				lambda glyph: 0 if glyph.mask is None else glyph.mask.width * glyph.mask.height,
+				)
+		self._draw = ImageDraw.Draw(Image.new('L', (1, 1)))
+
+	def font(self, font_path: str, font_size: int, orientation: Optional[int] = None) -> ImageFont.TransposedFont:
+		"""
+		Returns the font at the given size, optionally rotated.
+
+		:param font_path: The font file.
+		:param font_size:
+		:param orientation: The rotation to apply to the font, such as :py:data:`PIL.Image.ROTATE_90`.
+		"""
+
+		def compute() -> ImageFont.TransposedFont:
+			return ImageFont.TransposedFont(ImageFont.truetype(font_path, font_size), orientation=orientation)
+
+		return self._fonts.get((font_path, font_size, orientation), compute)
+
+	def bbox(
+			self,
+			font_path: str,
+			font_size: int,
+			word: str,
+			orientation: Optional[int] = None,
+			) -> Tuple[int, int, int, int]:
+		"""
+		Returns the bounding box of the word, anchored at its top-left corner, as used to find space for it.
+
+		:param font_path: The font file.
+		:param font_size:
+		:param word:
+		:param orientation: The rotation to apply to the font, such as :py:data:`PIL.Image.ROTATE_90`.
+
+		:returns: A ``(left, top, right, bottom)`` tuple, as returned by :meth:`PIL.ImageDraw.ImageDraw.textbbox`.
+		"""
+
+		def compute() -> Tuple[int, int, int, int]:
+			font = self.font(font_path, font_size, orientation)
+
+			if not _TRANSPOSED_BBOX:
+				width, height = font.getsize(word)
+				return 0, 0, width, height
+
+			return self._draw.textbbox((0, 0), word, font=font, anchor="lt")
+
+		return self._boxes.get((font_path, font_size, word, orientation), compute)
+
+	def glyph(self, font_path: str, font_size: int, word: str, orientation: Optional[int] = None) -> Glyph:
+		"""
+		Returns the word rasterized in the given font, as drawn by :meth:`PIL.ImageDraw.ImageDraw.text`.
+
+		:param font_path: The font file.
+		:param font_size:
+		:param word:
+		:param orientation: The rotation to apply to the font, such as :py:data:`PIL.Image.ROTATE_90`.
+		"""
+
+		def compute() -> Glyph:
+			font = self.font(font_path, font_size, orientation)
+
+			if _TRANSPOSED_BBOX:
+				left, top, right, bottom = self._draw.textbbox((0, 0), word, font=font)
+			else:
+				left, top = 0, 0
+				right, bottom = font.getmask(word, 'L').size
+
+			if right <= left or bottom <= top:
+				return Glyph((left, top), None)
+
+			# Text is drawn at whole-pixel positions, so it is rasterized the same wherever it is drawn.
+			mask = Image.new('L', (right - left, bottom - top))
+			ImageDraw.Draw(mask).text((-left, -top), word, fill=255, font=font)
+			return Glyph((left, top), mask)
+
+		return self._glyphs.get((font_path, font_size, word, orientation), compute)
+
+	def clear(self) -> None:
+		"""
+		Remove everything from the cache.
+		"""
+
+		self._fonts.clear()
+		self._boxes.clear()
+		self._glyphs.clear()
+
+	@property
+	def hits(self) -> int:
+		"""
+		The number of lookups which were answered from the cache.
+		"""
+
+		return self._fonts.hits + self._boxes.hits + self._glyphs.hits
+
+	@property
+	def misses(self) -> int:
+		"""
+		The number of lookups which had to be computed.
+		"""
+
+		return self._fonts.misses + self._boxes.misses + self._glyphs.misses
+
+
+#: The cache shared by all :class:`~wordle.Wordle` instances in this process.
+glyph_cache = GlyphCache()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+#
+#  layout.py
+"""
+A faster occupancy map for placing words, used by :class:`~wordle.Wordle` with ``layout_engine="numpy"``.
+
+.. versionadded:: 0.3.0
+"""
+#
+#  Copyright (c) 2020-2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+
+# stdlib
+from typing import Any, Optional, Tuple
+
+# 3rd party
+import numpy
+
+__all__ = ["OccupancyMap"]
+
+#: The number of random positions to try before searching the whole map for a free position.
+_CANDIDATES = 32
+
+#: The largest block size used to rule out parts of the map before searching them in full.
+_MAX_BLOCK_SIZE = 32
+
+
+class OccupancyMap:
+	"""
+	Records which pixels of the canvas are occupied, and finds free positions for new words.
+
+	The map keeps an integral image of the occupied pixels, like :class:`wordcloud.wordcloud.IntegralOccupancyMap`,
+	but differs in how it is searched and updated:
+
+	* A free position is first looked for by checking a few random positions, which usually succeeds
+	  while the canvas is still fairly empty.
+	* Otherwise the map is divided into blocks, and blocks in which every box of the requested size would
+	  overlap an occupied pixel are ruled out with a single vectorised lookup.
+	  Only the area around the remaining blocks is searched pixel by pixel.
+	* Placing a word only recomputes the integral image from the pixels the word covers,
+	  rather than from everything below and to the right of it.
+
+	Positions are chosen uniformly at random from all free positions, as with :mod:`wordcloud`,
+	but the random numbers are consumed differently so the layouts are not identical.
+
+	:param height: The height of the canvas, in pixels.
+	:param width: The width of the canvas, in pixels.
+	:param mask: An optional boolean array, the size of the canvas, which is :py:obj:`True` for masked out pixels.
+	"""
+
+	#: Boolean array which is :py:obj:`True` for each occupied pixel.
+	occupied: numpy.ndarray
+
+	#: The integral image of :attr:`~.occupied`, i.e. the number of occupied pixels above and to the left
+	#: of each pixel, inclusive.
+	integral: numpy.ndarray
+
+	def __init__(self, height: int, width: int, mask: Optional[numpy.ndarray] = None) -> None:
+		self.height = int(height)
+		self.width = int(width)
+
+		if mask is None:
+			self.occupied = numpy.zeros((self.height, self.width), dtype=bool)
+		else:
+			self.occupied = numpy.array(mask, dtype=bool)
+
+		self.integral = self.occupied.cumsum(axis=1, dtype=numpy.uint32).cumsum(axis=0, dtype=numpy.uint32)
+
+	def _box_is_free(self, i: int, j: int, size_x: int, size_y: int) -> bool:
+		integral = self.integral
+		area = int(integral[i, j]) + int(integral[i + size_x, j + size_y])
+		return area == int(integral[i + size_x, j]) + int(integral[i, j + size_y])
+
+	def sample_position(self, size_x: int, size_y: int, random_state: Any) -> Optional[Tuple[int, int]]:
+		"""
+		Returns a random position where a box of the given size is free, or :py:obj:`None` if there is none.
+
+		As with :class:`wordcloud.wordcloud.IntegralOccupancyMap`, position ``(i, j)`` means the box covers rows
+		``i + 1`` to ``i + size_x`` and columns ``j + 1`` to ``j + size_y``.
+
+		:param size_x: The height of the box.
+		:param size_y: The width of the box.
+		:param random_state: A :class:`random.Random` or :class:`numpy.random.RandomState` instance.
+		"""
+
+		n_rows = self.height - size_x
+		n_cols = self.width - size_y
+
+		if n_rows <= 0 or n_cols <= 0:
+			return None
+
+		for _ in range(_CANDIDATES):
+			i = int(random_state.random() * n_rows)
+			j = int(random_state.random() * n_cols)
+			if self._box_is_free(i, j, size_x, size_y):
+				return i, j
+
+		found = self._free_positions(size_x, size_y)
+		if found is None:
+			return None
+
+		free, row_offset, col_offset = found
+		hits = numpy.flatnonzero(free)
+
+		if not len(hits):
+			return None
+
+		i, j = divmod(int(hits[int(random_state.random() * len(hits))]), free.shape[1])
+		return i + row_offset, j + col_offset
+
+	def _free_positions(self, size_x: int, size_y: int) -> Optional[Tuple[numpy.ndarray, int, int]]:
+		"""
+		Returns a boolean array of the positions where a box of the given size is free,
+		covering every free position, and the row and column the array starts at.
+
+		Returns :py:obj:`None` if there are certainly no free positions.
+
+		:param size_x:
+		:param size_y:
+		"""
+
+		integral = self.integral
+		n_rows = self.height - size_x
+		n_cols = self.width - size_y
+		row_start, row_stop, col_start, col_stop = 0, n_rows, 0, n_cols
+
+		# Every box starting in a block covers the region from the block's last position to the end of the box
+		# starting at its first position. If that region is occupied the whole block is ruled out.
+		block = min(_MAX_BLOCK_SIZE, size_x // 2, size_y // 2)
+
+		if block >= 2:
+			block_rows = numpy.arange(0, n_rows, block)
+			block_cols = numpy.arange(0, n_cols, block)
+			last_rows = numpy.minimum(block_rows + block, n_rows)[:, None] - 1
+			last_cols = numpy.minimum(block_cols + block, n_cols)[None, :] - 1
+			end_rows = block_rows[:, None] + size_x
+			end_cols = block_cols[None, :] + size_y
+
+			area = integral[last_rows, last_cols] + integral[end_rows, end_cols]
+			area -= integral[end_rows, last_cols]
+			area -= integral[last_rows, end_cols]
+			candidates = numpy.argwhere(area == 0)
+
+			if not len(candidates):
+				return None
+
+			row_start = int(block_rows[candidates[:, 0].min()])
+			row_stop = int(min(block_rows[candidates[:, 0].max()] + block, n_rows))
+			col_start = int(block_cols[candidates[:, 1].min()])
+			col_stop = int(min(block_cols[candidates[:, 1].max()] + block, n_cols))
+
+		top = integral[row_start:row_stop]
+		bottom = integral[row_start + size_x:row_stop + size_x]
+
+		# The true area is never negative, so wrapping around in unsigned arithmetic gives the right answer.
+		area = top[:, col_start:col_stop] + bottom[:, col_start + size_y:col_stop + size_y]
+		area -= bottom[:, col_start:col_stop]
+		area -= top[:, col_start + size_y:col_stop + size_y]
+
+		return area == 0, row_start, col_start
+
+	def update(self, pixels: numpy.ndarray, pos_x: int, pos_y: int) -> None:
+		"""
+		Mark the given pixels as occupied.
+
+		:param pixels: A boolean array which is :py:obj:`True` for each pixel covered by the word.
+			It may extend beyond the edges of the canvas.
+		:param pos_x: The row of the canvas which the first row of ``pixels`` corresponds to.
+		:param pos_y: The column of the canvas which the first column of ``pixels`` corresponds to.
+		"""
+
+		# Clip to the canvas.
+		top, left = max(pos_x, 0), max(pos_y, 0)
+		bottom = min(pos_x + pixels.shape[0], self.height)
+		right = min(pos_y + pixels.shape[1], self.width)
+
+		if top >= bottom or left >= right:
+			return
+
+		pixels = pixels[top - pos_x:bottom - pos_x, left - pos_y:right - pos_y]
+		region = self.occupied[top:bottom, left:right]
+
+		added = pixels & ~region
+		region |= added
+
+		# The integral image only changes by the newly occupied pixels above and to the left of each pixel.
+		delta = added.cumsum(axis=1, dtype=numpy.uint32).cumsum(axis=0, dtype=numpy.uint32)
+		integral = self.integral
+
+		integral[top:bottom, left:right] += delta
+		integral[top:bottom, right:] += delta[:, -1:]
+		integral[bottom:, left:right] += delta[-1:, :]
+		integral[bottom:, right:] += delta[-1, -1]
@@ -0,0 +1,314 @@
+#!/usr/bin/env python
+#
+#  shard.py
+"""
+Split the computation of word frequencies into shards, which can run on different machines.
+
+Each file is assigned to a shard by a hash of its path (see :func:`~wordle.utils.shard_of`),
+so every invocation agrees on which files belong to which shard without needing to communicate.
+Each shard writes its frequencies to a :mod:`snapshot <wordle.snapshot>`,
+and the snapshots are then merged into one.
+
+The steps can be run from the command line, for example by a batch scheduler:
+
+.. prompt:: bash
+
+	python -m wordle.shard map https://github.com/domdfcoding/wordle shard-0.snap --git --shard 0 --shards 4
+	python -m wordle.shard map https://github.com/domdfcoding/wordle shard-1.snap --git --shard 1 --shards 4
+	...
+	python -m wordle.shard reduce wordle.snap shard-0.snap shard-1.snap shard-2.snap shard-3.snap
+
+or all together on the local machine, with each shard in its own process:
+
+.. prompt:: bash
+
+	python -m wordle.shard run https://github.com/domdfcoding/wordle wordle.snap --git --shards 4
+
+.. versionadded:: 0.3.0
+"""
+#
+#  Copyright (c) 2020-2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+
+# stdlib
+import argparse
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Sequence
+
+# 3rd party
+from domdf_python_tools.typing import PathLike
+
+# this package
+from wordle.frequency import frequency_from_directory, frequency_from_git
+from wordle.snapshot import merge_snapshots, write_snapshot
+from wordle.utils import _TemporaryDirectory
+
+__all__ = ["main", "map_shard", "reduce_shards", "run_shards"]
+
+
+def map_shard(
+		source: str,
+		outfile: PathLike,
+		shard: int,
+		n_shards: int,
+		*,
+		git: bool = False,
+		sha: Optional[str] = None,
+		exclude_words: Sequence[str] = (),
+		exclude_dirs: Sequence[str] = (),
+		include_extensions: Optional[Sequence[str]] = None,
+		exclude_extensions: Sequence[str] = (),
+		workers: Optional[int] = None,
+		max_vocabulary: Optional[int] = None,
+		) -> None:
+	"""
+	Compute the word frequencies of one shard of a directory or git repository, and write them to a snapshot.
+
+	:param source: The directory, or the url of the git repository if ``git`` is :py:obj:`True`.
+	:param outfile: The snapshot file to write.
+	:param shard: The index of the shard to process, from ``0`` to ``n_shards - 1``.
+	:param n_shards: The total number of shards.
+	:param git: Whether ``source`` is the url of a git repository. The files are read directly from
+		the git object store. See :func:`~wordle.frequency.frequency_from_git` for details.
+	:param sha: An optional SHA hash of the commit to process, if ``git`` is :py:obj:`True`.
+		Every shard must use the same commit.
+	:param exclude_words: An optional list of words to exclude.
+	:param exclude_dirs: An optional list of directories to exclude.
+	:param include_extensions: If given, only files with one of these extensions (e.g. ``.py``) are processed.
+	:param exclude_extensions: Files with any of these extensions (e.g. ``.min.js``) are not processed.
+	:param workers: The number of processes to tokenize this shard's files with.
+	:param max_vocabulary: If given, the frequencies of the shard are approximated in bounded memory.
+		See :func:`~wordle.frequency.frequency_from_directory` for details.
+	"""
+
+	if git:
+		word_counts = frequency_from_git(
+				source,
+				sha=sha,
+				exclude_words=exclude_words,
+				exclude_dirs=exclude_dirs,
+				workers=workers,
+				include_extensions=include_extensions,
+				exclude_extensions=exclude_extensions,
+				checkout=False,
+				max_vocabulary=max_vocabulary,
+				shard=(shard, n_shards),
+				)
+	else:
+		word_counts = frequency_from_directory(
+				source,
+				exclude_words=exclude_words,
+				exclude_dirs=exclude_dirs,
+				workers=workers,
+				include_extensions=include_extensions,
+				exclude_extensions=exclude_extensions,
+				max_vocabulary=max_vocabulary,
+				shard=(shard, n_shards),
+				)
+
+	write_snapshot(word_counts, outfile)
+
+
+def reduce_shards(filenames: Iterable[PathLike], outfile: PathLike) -> None:
+	"""
+	Combine the snapshots written by :func:`~.map_shard` into a single snapshot.
+
+	:param filenames: The snapshot for each shard.
+	:param outfile: The snapshot file to write.
+	"""
+
+	merge_snapshots(filenames, outfile)
+
+
+def run_shards(
+		source: str,
+		outfile: PathLike,
+		n_shards: int,
+		*,
+		processes: Optional[int] = None,
+		map_args: Sequence[str] = (),
+		) -> None:
+	"""
+	Compute the word frequencies of a directory or git repository by running each shard
+	as a separate ``python -m wordle.shard map`` process on this machine, and then combining the results.
+
+	:param source: The directory, or the url of the git repository.
+	:param outfile: The snapshot file to write.
+	:param n_shards: The total number of shards.
+	:param processes: The maximum number of shards to run at once. Defaults to the number of CPUs.
+	:param map_args: Additional command line arguments for each ``map`` process, e.g. ``["--git"]``.
+
+	:raises subprocess.CalledProcessError: If any of the shards fails.
+	"""
+
+	with _TemporaryDirectory() as tmpdir:
+		shard_files = [os.path.join(tmpdir, f"shard-{shard}.snap") for shard in range(n_shards)]
+
+		def run(shard: int) -> None:
+			command = [
+					sys.executable,
+					"-m",
+					"wordle.shard",
+					"map",
+					source,
+					shard_files[shard],
+					"--shard",
+					str(shard),
+					"--shards",
+					str(n_shards),
+					*map_args,
+					]
+			subprocess.run(command, check=True)  # nosec: B603
+
+		# Each shard runs in its own process, so threads are enough to wait for them.
+		with ThreadPoolExecutor(max_workers=processes or os.cpu_count()) as executor:
+			list(executor.map(run, range(n_shards)))
+
+		reduce_shards(shard_files, outfile)
+
+
+def _add_map_arguments(parser: argparse.ArgumentParser) -> None:
+	parser.add_argument("source", help="The directory, or the url of the git repository with --git.")
+	parser.add_argument("outfile", help="The snapshot file to write.")
+	parser.add_argument("--git", action="store_true", help="Read the files from a git repository.")
+	parser.add_argument("--sha", help="The commit to process, with --git. Defaults to HEAD.")
+	parser.add_argument(
+			"--exclude-word",
+			dest="exclude_words",
+			action="append",
+			default=[],
+			help="A word to exclude. May be given more than once.",
+			)
+	parser.add_argument(
+			"--exclude-dir",
+			dest="exclude_dirs",
+			action="append",
+			default=[],
+			help="A directory to exclude, as a regular expression. May be given more than once.",
+			)
+	parser.add_argument(
+			"--include-extension",
+			dest="include_extensions",
+			action="append",
+			help="Only process files with this extension. May be given more than once.",
+			)
+	parser.add_argument(
+			"--exclude-extension",
+			dest="exclude_extensions",
+			action="append",
+			default=[],
+			help="Don't process files with this extension. May be given more than once.",
+			)
+	parser.add_argument("--workers", type=int, help="The number of processes to use for each shard.")
+	parser.add_argument(
+			"--max-vocabulary",
+			type=int,
+			help="Approximate the frequencies of each shard, keeping at most this many words.",
+			)
+
+
+def _map_args(args: argparse.Namespace) -> List[str]:
+	"""
+	Returns the command line arguments for ``map`` which correspond to the options in ``args``.
+
+	:param args:
+	"""
+
+	map_args = []
+
+	if args.git:
+		map_args.append("--git")
+	if args.sha is not None:
+		map_args.extend(["--sha", args.sha])
+	for word in args.exclude_words:
+		map_args.extend(["--exclude-word", word])
+	for directory in args.exclude_dirs:
+		map_args.extend(["--exclude-dir", directory])
+	for extension in args.include_extensions or ():
+		map_args.extend(["--include-extension", extension])
+	for extension in args.exclude_extensions:
+		map_args.extend(["--exclude-extension", extension])
+	if args.workers is not None:
+		map_args.extend(["--workers", str(args.workers)])
+	if args.max_vocabulary is not None:
+		map_args.extend(["--max-vocabulary", str(args.max_vocabulary)])
+
+	return map_args
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+	"""
+	Entry point for ``python -m wordle.shard``.
+
+	:param argv: The command line arguments. Defaults to :py:data:`sys.argv`.
+	"""
+
+	parser = argparse.ArgumentParser(
+			prog="python -m wordle.shard",
+			description="Compute word frequencies in shards, which can run on different machines.",
+			)
+	subparsers = parser.add_subparsers(dest="command", required=True)
+
+	map_parser = subparsers.add_parser("map", help="Compute the word frequencies of one shard.")
+	_add_map_arguments(map_parser)
+	map_parser.add_argument("--shard", type=int, required=True, help="The shard to process, counting from 0.")
+	map_parser.add_argument("--shards", type=int, required=True, help="The total number of shards.")
+
+	reduce_parser = subparsers.add_parser("reduce", help="Combine the word frequencies of several shards.")
+	reduce_parser.add_argument("outfile", help="The snapshot file to write.")
+	reduce_parser.add_argument("infiles", nargs='+', help="The snapshot for each shard.")
+
+	run_parser = subparsers.add_parser("run", help="Run every shard on this machine, then combine them.")
+	_add_map_arguments(run_parser)
+	run_parser.add_argument("--shards", type=int, required=True, help="The total number of shards.")
+	run_parser.add_argument("--processes", type=int, help="The number of shards to run at once.")
+
+	args = parser.parse_args(argv)
+
+	if args.command == "map":
+		map_shard(
+				args.source,
+				args.outfile,
+				args.shard,
+				args.shards,
+				git=args.git,
+				sha=args.sha,
+				exclude_words=args.exclude_words,
+				exclude_dirs=args.exclude_dirs,
+				include_extensions=args.include_extensions,
+				exclude_extensions=args.exclude_extensions,
+				workers=args.workers,
+				max_vocabulary=args.max_vocabulary,
+				)
+	elif args.command == "reduce":
+		reduce_shards(args.infiles, args.outfile)
+	else:
+		run_shards(args.source, args.outfile, args.shards, processes=args.processes, map_args=_map_args(args))
+
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+#
+#  sketch.py
+"""
+Approximate word frequencies in bounded memory, for corpora too large to count exactly.
+
+.. versionadded:: 0.3.0
+"""
+#
+#  Copyright (c) 2020-2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+
+# stdlib
+import heapq
+import typing
+from collections import Counter
+from typing import Dict, List, Mapping, Optional, Tuple
+
+__all__ = ["FrequencySketch"]
+
+
+class FrequencySketch:
+	"""
+	A mergeable Misra-Gries summary of word frequencies, which stores at most ``2 * capacity`` words.
+
+	Counts are added with :meth:`~.update`, and sketches built from different parts of a corpus
+	(for example in different worker processes) can be combined with :meth:`~.merge`.
+	Whenever more than ``2 * capacity`` words are stored the sketch is compacted:
+	the count of the word ranked ``capacity + 1`` is subtracted from every word,
+	and words whose count falls to zero are discarded.
+
+	The sketch makes the following guarantees, where ``total`` is the sum of every count added:
+
+	* The estimated count of a word is never more than its true count,
+	  and never less than its true count minus :attr:`~.error`.
+	* :attr:`~.error` is never more than ``total / (capacity + 1)``.
+	* Any word whose true count is more than :attr:`~.error` is kept in the sketch.
+
+	So to find the ``k`` most frequent words, ``capacity`` should be several times larger than ``k``
+	(a factor of ten is usually plenty for source code, where word frequencies fall off steeply).
+	The top ``k`` words are then exact whenever the gap between each of their counts and the count of
+	the next word is larger than :attr:`~.error`.
+
+	:param capacity: The number of words to keep when the sketch is compacted.
+	"""
+
+	#: The number of words to keep when the sketch is compacted.
+	capacity: int
+
+	#: The sum of every count added to the sketch.
+	total: int
+
+	#: The largest amount by which the count of any word may have been underestimated.
+	error: int
+
+	def __init__(self, capacity: int):
+		if capacity < 1:
+			raise ValueError("'capacity' must be at least 1")
+
+		self.capacity = int(capacity)
+		self.total = 0
+		self.error = 0
+		self._counts: Dict[str, int] = {}
+
+	def __repr__(self) -> str:
+		return f"{self.__class__.__name__}(capacity={self.capacity}, total={self.total}, error={self.error})"
+
+	def __len__(self) -> int:
+		return len(self._counts)
+
+	def update(self, counts: Mapping[str, int], weight: int = 1) -> "FrequencySketch":
+		"""
+		Add the given word counts to the sketch.
+
+		:param counts: Mapping of words to the number of times they appear.
+		:param weight: The number of times to add ``counts``, e.g. for a file which appears several times.
+
+		:returns: self
+		"""
+
+		self.total += self._add(counts, weight)
+		return self
+
+	def merge(self, other: "FrequencySketch") -> "FrequencySketch":
+		"""
+		Add the counts from another sketch to this one.
+
+		The guarantees above hold for the merged sketch, with ``total`` being the combined total of both sketches.
+
+		:param other: A sketch with the same :attr:`~.capacity`.
+
+		:returns: self
+		"""
+
+		if other.capacity != self.capacity:
+			raise ValueError(f"Cannot merge sketches with capacities {self.capacity} and {other.capacity}")
+
+		self._add(other._counts)
+		self.total += other.total
+		self.error += other.error
+
+		return self
+
+	def _add(self, counts: Mapping[str, int], weight: int = 1) -> int:
+		"""
+		Add the given word counts to the sketch, compacting it if it has grown too large.
+
+		Returns the sum of the counts added.
+
+		:param counts:
+		:param weight:
+		"""
+
+		sketch_counts = self._counts
+		added = 0
+
+		for word, count in counts.items():
+			count *= weight
+			sketch_counts[word] = sketch_counts.get(word, 0) + count
+			added += count
+
+		if len(sketch_counts) > 2 * self.capacity:
+			self._compact()
+
+		return added
+
+	def _compact(self) -> None:
+		"""
+		Subtract the count of the word ranked ``capacity + 1`` from every word, leaving at most ``capacity`` words.
+		"""
+
+		if len(self._counts) <= self.capacity:
+			return
+
+		threshold = heapq.nlargest(self.capacity + 1, self._counts.values())[-1]
+
+		self._counts = {word: count - threshold for word, count in self._counts.items() if count > threshold}
+		self.error += threshold
+
+	def get(self, word: str) -> int:
+		"""
+		Returns the estimated count of ``word``, which is ``0`` if it is not in the sketch.
+
+		:param word:
+		"""
+
+		return self._counts.get(word, 0)
+
+	def most_common(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+		"""
+		Returns a list of the ``n`` words with the highest estimated counts, and their counts.
+
+		Words with equal counts are ordered by when they were first added to the sketch.
+
+		:param n: If :py:obj:`None` every word in the sketch is returned.
+		"""
+
+		return Counter(self._counts).most_common(n)
+
+	def counts(self) -> typing.Counter[str]:
+		"""
+		Returns the estimated counts of the words in the sketch, after compacting it to at most ``capacity`` words.
+		"""
+
+		self._compact()
+		return Counter(self._counts)
@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+#
+#  snapshot.py
+"""
+A compact binary file format for word frequencies, which can be memory-mapped and merged.
+
+A snapshot file contains the following, with all integers being little-endian:
+
+* A 32 byte header: the magic bytes ``WRDLSNAP``, the format version and a reserved field (both 32-bit),
+  then the number of words and the size of the vocabulary in bytes (both 64-bit).
+* The vocabulary: every word encoded as UTF-8 and concatenated, sorted by their encoded bytes.
+  This is padded with NUL bytes to a multiple of 8 bytes.
+* The offset of each word within the vocabulary, plus the size of the vocabulary, as unsigned 64-bit integers.
+* The count of each word, as signed 64-bit integers.
+
+As the words are sorted any number of snapshots can be merged in a single pass,
+without loading any of them into memory in full.
+
+.. versionadded:: 0.3.0
+"""
+#
+#  Copyright (c) 2020-2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+
+# stdlib
+import heapq
+import os
+import struct
+import typing
+from collections import Counter
+from itertools import groupby, islice
+from operator import itemgetter
+from typing import BinaryIO, Iterable, Iterator, List, Mapping, Tuple
+
+# 3rd party
+import numpy
+from domdf_python_tools.typing import PathLike
+
+__all__ = ["Snapshot", "merge_snapshots", "write_snapshot"]
+
+_MAGIC = b"WRDLSNAP"
+_VERSION = 1
+_HEADER = struct.Struct("<8sIIQQ")
+
+#: The number of words read from a snapshot at a time when iterating over it.
+_BLOCK_SIZE = 65536
+
+
+class Snapshot:
+	"""
+	Read-only access to a snapshot file, which is memory-mapped rather than read into memory.
+
+	Looking up a word is a binary search over the sorted vocabulary,
+	and only the words which are returned by :meth:`~.most_common` are decoded.
+
+	:param filename:
+
+	:raises ValueError: If the file is not a snapshot, or was written by a newer version of ``wordle``.
+	"""
+
+	#: The number of times each word appears, in the same order as :meth:`~.words`.
+	counts: numpy.ndarray
+
+	def __init__(self, filename: PathLike):
+		self.filename = os.fspath(filename)
+
+		with open(self.filename, "rb") as fp:
+			header = fp.read(_HEADER.size)
+
+		if len(header) != _HEADER.size or header[:len(_MAGIC)] != _MAGIC:
+			raise ValueError(f"{self.filename!r} is not a wordle snapshot.")
+
+		_, version, _, n_words, vocab_size = _HEADER.unpack(header)
+
+		if version > _VERSION:
+			raise ValueError(f"{self.filename!r} was written by a newer version of wordle.")
+
+		data = numpy.memmap(self.filename, dtype=numpy.uint8, mode='r')
+
+		vocab_end = _HEADER.size + _padded(vocab_size)
+		offsets_end = vocab_end + (n_words + 1) * 8
+
+		self._vocab = data[_HEADER.size:_HEADER.size + vocab_size]
+		self._offsets = data[vocab_end:offsets_end].view("<u8")
+		self.counts = data[offsets_end:offsets_end + n_words * 8].view("<i8")
+
+	def __repr__(self) -> str:
+		return f"{self.__class__.__name__}({self.filename!r})"
+
+	def __len__(self) -> int:
+		return len(self.counts)
+
+	def __contains__(self, word: object) -> bool:
+		return isinstance(word, str) and self._find(word.encode("UTF-8")) is not None
+
+	def _word(self, index: int) -> bytes:
+		return self._vocab[self._offsets[index]:self._offsets[index + 1]].tobytes()
+
+	def _find(self, word: bytes) -> typing.Optional[int]:
+		"""
+		Returns the index of ``word`` in the vocabulary, or :py:obj:`None` if it is not in the snapshot.
+
+		:param word: The word, encoded as UTF-8.
+		"""
+
+		low, high = 0, len(self)
+
+		while low < high:
+			mid = (low + high) // 2
+			if self._word(mid) < word:
+				low = mid + 1
+			else:
+				high = mid
+
+		if low < len(self) and self._word(low) == word:
+			return low
+
+		return None
+
+	def get(self, word: str) -> int:
+		"""
+		Returns the count of ``word``, which is ``0`` if it is not in the snapshot.
+
+		:param word:
+		"""
+
+		index = self._find(word.encode("UTF-8"))
+		return 0 if index is None else int(self.counts[index])
+
+	def _iter_encoded(self) -> Iterator[Tuple[bytes, int]]:
+		"""
+		Yields each word (encoded as UTF-8) and its count, in the order they are stored.
+		"""
+
+		for start in range(0, len(self), _BLOCK_SIZE):
+			offsets = self._offsets[start:start + _BLOCK_SIZE + 1].tolist()
+			counts = self.counts[start:start + _BLOCK_SIZE].tolist()
+
+			# Copying the block's words in one go is much faster than slicing the memory map for each word.
+			base = offsets[0]
+			vocab = self._vocab[base:offsets[-1]].tobytes()
+
+			for idx, count in enumerate(counts):
+				yield vocab[offsets[idx] - base:offsets[idx + 1] - base], count
+
+	def words(self) -> Iterator[str]:
+		"""
+		Yields the words in the snapshot, sorted by their UTF-8 encoding.
+		"""
+
+		for word, _ in self._iter_encoded():
+			yield word.decode("UTF-8")
+
+	def items(self) -> Iterator[Tuple[str, int]]:
+		"""
+		Yields ``(word, count)`` tuples, sorted by the UTF-8 encoding of the words.
+		"""
+
+		for word, count in self._iter_encoded():
+			yield word.decode("UTF-8"), count
+
+	def most_common(self, n: typing.Optional[int] = None) -> List[Tuple[str, int]]:
+		"""
+		Returns a list of the ``n`` most common words and their counts, from the most common to the least.
+
+		Words with equal counts are sorted by their UTF-8 encoding.
+
+		:param n: If :py:obj:`None` every word in the snapshot is returned.
+		"""
+
+		counts = self.counts
+
+		if n is None or n >= len(counts):
+			indices = numpy.arange(len(counts))
+		elif n <= 0:
+			return []
+		else:
+			# Only sort the words which can be in the top n.
+			threshold = numpy.partition(counts, len(counts) - n)[len(counts) - n]
+			above = numpy.flatnonzero(counts > threshold)
+			tied = numpy.flatnonzero(counts == threshold)[:n - len(above)]
+			indices = numpy.concatenate([above, tied])
+
+		indices = indices[numpy.lexsort((indices, -counts[indices]))]
+
+		return [(self._word(index).decode("UTF-8"), int(counts[index])) for index in indices.tolist()]
+
+	def to_counter(self) -> typing.Counter[str]:
+		"""
+		Returns the contents of the snapshot as a :class:`collections.Counter`.
+		"""
+
+		return Counter(dict(self.items()))
+
+
+def _padded(size: int) -> int:
+	"""
+	Returns ``size`` rounded up to a multiple of 8.
+
+	:param size:
+	"""
+
+	return (size + 7) & ~7
+
+
+def _write_sorted(fp: BinaryIO, items: Iterable[Tuple[bytes, int]]) -> None:
+	"""
+	Write a snapshot of the given words and counts to ``fp``.
+
+	:param fp: A file opened for writing in binary mode, positioned at its start.
+	:param items: ``(word, count)`` tuples, with the words encoded as UTF-8, sorted and distinct.
+	"""
+
+	fp.write(b'\0' * _HEADER.size)
+
+	items = iter(items)
+	offset_blocks: List[numpy.ndarray] = [numpy.zeros(1, dtype="<u8")]
+	count_blocks: List[numpy.ndarray] = [numpy.zeros(0, dtype="<i8")]
+	vocab_size = 0
+
+	# The vocabulary is written as it is read, and only the offsets and counts are kept in memory.
+	while True:
+		block = list(islice(items, _BLOCK_SIZE))
+		if not block:
+			break
+
+		words = [word for word, _ in block]
+		fp.write(b''.join(words))
+
+		block_offsets = numpy.cumsum([len(word) for word in words], dtype="<u8") + vocab_size
+		vocab_size = int(block_offsets[-1])
+		offset_blocks.append(block_offsets)
+		count_blocks.append(numpy.array([count for _, count in block], dtype="<i8"))
+
+	fp.write(b'\0' * (_padded(vocab_size) - vocab_size))
+	fp.write(numpy.concatenate(offset_blocks).tobytes())
+	fp.write(numpy.concatenate(count_blocks).tobytes())
+
+	fp.seek(0)
+	fp.write(_HEADER.pack(_MAGIC, _VERSION, 0, sum(map(len, count_blocks)), vocab_size))
+
+
+def write_snapshot(counts: Mapping[str, int], filename: PathLike) -> None:
+	"""
+	Write the given word frequencies to a snapshot file.
+
+	Words with a count of zero or less are omitted.
+
+	:param counts: Mapping of words to their frequencies,
+		e.g. as returned by :func:`~wordle.frequency.frequency_from_directory`.
+	:param filename: The file to write the snapshot to.
+	"""
+
+	items = sorted((word.encode("UTF-8"), count) for word, count in counts.items() if count > 0)
+
+	with open(filename, "wb") as fp:
+		_write_sorted(fp, items)
+
+
+def merge_snapshots(filenames: Iterable[PathLike], outfile: PathLike) -> None:
+	"""
+	Combine several snapshots into one, summing the count of each word.
+
+	The snapshots are merged in a single pass over their sorted vocabularies,
+	so the memory used is proportional to the number of distinct words (for their counts) rather than their size.
+
+	:param filenames: The snapshot files to merge.
+	:param outfile: The file to write the merged snapshot to. This must not be one of ``filenames``.
+	"""
+
+	snapshots = [Snapshot(filename) for filename in filenames]
+	merged = heapq.merge(*(snapshot._iter_encoded() for snapshot in snapshots), key=itemgetter(0))
+	totals = ((word, sum(count for _, count in group)) for word, group in groupby(merged, itemgetter(0)))
+
+	with open(outfile, "wb") as fp:
+		_write_sorted(fp, totals)
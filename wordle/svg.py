@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+#
+#  svg.py
+"""
+Write word clouds as SVG images, directly to a file.
+
+.. versionadded:: 0.3.0
+"""
+#
+#  Copyright (c) 2020-2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+
+# stdlib
+import base64
+import io
+import os
+from typing import IO, Iterable, Iterator
+from xml.sax import saxutils
+
+# 3rd party
+from PIL import Image  # type: ignore[import-untyped]
+from wordcloud import WordCloud  # type: ignore[import-untyped]
+
+# this package
+from wordle.glyphs import _LRUCache, glyph_cache
+
+__all__ = ["font_face_url", "write_svg"]
+
+#: Embedded fonts, keyed on the font file, the characters in the subset, and whether the subset was optimized.
+_font_faces: _LRUCache[str] = _LRUCache(32 * 1024 * 1024, len)
+
+
+def font_face_url(font_path: str, characters: Iterable[str], optimize: bool = True) -> str:
+	"""
+	Returns a ``data:`` URL of a WOFF font containing only the given characters from the font.
+
+	Subsetting the font is slow, so the result is cached for each font file (and its modification time),
+	set of characters, and value of ``optimize``.
+
+	Requires `fontTools <https://pypi.org/project/fonttools/>`_.
+
+	:param font_path: The font file.
+	:param characters: The characters to include in the font.
+	:param optimize: Whether to be aggressive when subsetting the font, to reduce its size.
+		In particular, hinting tables are dropped, which may introduce slight changes to character shapes.
+	"""
+
+	text = ''.join(sorted(set(characters)))
+	key = (os.fspath(font_path), os.stat(font_path).st_mtime_ns, text, optimize)
+
+	def compute() -> str:
+		# 3rd party
+		import fontTools.subset  # type: ignore[import-untyped]
+		import fontTools.ttLib  # type: ignore[import-untyped]
+
+		options = fontTools.subset.Options(
+				# Small impact on character shapes, but reduce size a lot
+				hinting=not optimize,
+				# On small subsets, can improve size
+				desubroutinize=optimize,
+				ignore_missing_glyphs=True,
+				)
+
+		ttf = fontTools.subset.load_font(font_path, options)
+		subsetter = fontTools.subset.Subsetter(options)
+		subsetter.populate(text=text)
+		subsetter.subset(ttf)
+
+		# Round trip through XML to convert to WOFF, as wordcloud does.
+		buffer = io.BytesIO()
+		ttf.saveXML(buffer)
+		buffer.seek(0)
+		woff = fontTools.ttLib.TTFont(flavor="woff")
+		woff.importXML(buffer)
+
+		buffer = io.BytesIO()
+		woff.save(buffer)
+		data = base64.b64encode(buffer.getbuffer()).decode("ascii")
+		return "data:application/font-woff;charset=utf-8;base64," + data
+
+	return _font_faces.get(key, compute)
+
+
+def write_svg(
+		word_cloud: WordCloud,
+		fp: IO[str],
+		*,
+		embed_font: bool = False,
+		optimize_embedded_font: bool = True,
+		embed_image: bool = False,
+		) -> None:
+	"""
+	Write the word cloud to ``fp`` as an SVG image.
+
+	The output is the same as :meth:`wordcloud.WordCloud.to_svg`, but is written one element at a time
+	rather than being built up in memory, and embedded fonts are cached by :func:`~.font_face_url`.
+
+	:param word_cloud:
+	:param fp: The text file to write to.
+	:param embed_font: Whether to include font inside resulting SVG file.
+	:param optimize_embedded_font: Whether to be aggressive when embedding a font, to reduce size.
+		In particular, hinting tables are dropped, which may introduce slight
+		changes to character shapes (w.r.t. `to_image` baseline).
+	:param embed_image: Whether to include rasterized image inside resulting SVG file.
+		Useful for debugging.
+	"""
+
+	elements = _iter_svg(
+			word_cloud,
+			embed_font=embed_font,
+			optimize_embedded_font=optimize_embedded_font,
+			embed_image=embed_image,
+			)
+
+	fp.write(next(elements))
+
+	for element in elements:
+		fp.write('\n')
+		fp.write(element)
+
+
+def _iter_svg(
+		word_cloud: WordCloud,
+		*,
+		embed_font: bool,
+		optimize_embedded_font: bool,
+		embed_image: bool,
+		) -> Iterator[str]:
+	"""
+	Yields the elements of the SVG image of the word cloud in turn.
+
+	:param word_cloud:
+	:param embed_font:
+	:param optimize_embedded_font:
+	:param embed_image:
+	"""
+
+	word_cloud._check_generated()
+	scale = word_cloud.scale
+
+	if word_cloud.mask is not None:
+		height, width = word_cloud.mask.shape[:2]
+	else:
+		height, width = word_cloud.height, word_cloud.width
+
+	if word_cloud.max_font_size is None:
+		max_font_size = max(w[1] for w in word_cloud.layout_)
+	else:
+		max_font_size = word_cloud.max_font_size
+
+	font = glyph_cache.font(word_cloud.font_path, int(max_font_size * scale)).font
+	raw_font_family, raw_font_style = font.getname()
+	font_family = repr(raw_font_family)
+	raw_font_style = raw_font_style.lower()
+
+	font_weight = "bold" if "bold" in raw_font_style else "normal"
+
+	if "italic" in raw_font_style:
+		font_style = "italic"
+	elif "oblique" in raw_font_style:
+		font_style = "oblique"
+	else:
+		font_style = "normal"
+
+	yield f'<svg xmlns="http://www.w3.org/2000/svg" width="{width * scale}" height="{height * scale}">'
+
+	if embed_font:
+		characters = {c for item in word_cloud.layout_ for c in item[0][0]}
+		url = font_face_url(word_cloud.font_path, characters, optimize_embedded_font)
+		yield (
+				f"<style>@font-face{{font-family:{font_family};font-weight:{font_weight};"
+				f'font-style:{font_style};src:url("{url}")format("woff");}}</style>'
+				)
+
+	yield f"<style>text{{font-family:{font_family};font-weight:{font_weight};font-style:{font_style};}}</style>"
+
+	if word_cloud.background_color is not None:
+		yield f'<rect width="100%" height="100%" style="fill:{word_cloud.background_color}"></rect>'
+
+	if embed_image:
+		buffer = io.BytesIO()
+		word_cloud.to_image().save(buffer, format="JPEG")
+		data = base64.b64encode(buffer.getbuffer()).decode("ascii")
+		yield f'<image width="100%" height="100%" href="data:image/jpg;base64,{data}"/>'
+
+	for (word, _), font_size, (y, x), orientation, color in word_cloud.layout_:
+		x *= scale
+		y *= scale
+
+		font = glyph_cache.font(word_cloud.font_path, int(font_size * scale)).font
+		(size_x, _), (offset_x, offset_y) = font.font.getsize(word)
+		ascent, _ = font.getmetrics()
+
+		min_x = -offset_x
+		max_x = size_x - offset_x
+		max_y = ascent - offset_y
+
+		if orientation == Image.ROTATE_90:
+			x += max_y
+			y += max_x - min_x
+			transform = f"translate({x},{y}) rotate(-90)"
+		else:
+			x += min_x
+			y += max_y
+			transform = f"translate({x},{y})"
+
+		yield (
+				f'<text transform="{transform}" font-size="{font_size * scale}" style="fill:{color}">'
+				f"{saxutils.escape(word)}</text>"
+				)
+
+	yield "</svg>"
@@ -0,0 +1,1248 @@
+#!/usr/bin/env python
+#
+#  tokenizers.py
+"""
+Fast tokenizers for common languages, used in place of Pygments when counting words.
+
+A tokenizer reproduces the word counts of a Pygments lexer (after the filtering done by
+:func:`wordle.frequency.get_tokens`) without producing the full token stream.
+Tokenizers are only used when the installed version of the lexer they replace has
+exactly the rules they were written for; otherwise, and for every other language, Pygments is used.
+
+.. note::
+
+	The tokenizers in this module were written for the lexers in Pygments 2.19.2.
+	With other versions of Pygments whose lexers have different rules they are not used,
+	and every file is lexed with Pygments as before. :func:`~.get_tokenizer` can be used
+	to check whether a tokenizer is used for a given lexer.
+
+If a tokenizer encounters something it can't handle in exactly the same way as Pygments
+(e.g. identifiers containing non-ASCII characters) it raises :exc:`~.Unsupported`
+and the file is lexed with Pygments instead.
+
+.. versionadded:: 0.3.0
+"""
+#
+#  Copyright (c) 2020-2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+# stdlib
+import hashlib
+import keyword
+import re
+import string
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+
+# 3rd party
+import pygments.lexer  # type: ignore[import-untyped]
+from pygments import unistring
+
+__all__ = [
+		"CTokenizer",
+		"CppTokenizer",
+		"JavaScriptTokenizer",
+		"PythonTokenizer",
+		"Tokenizer",
+		"TypeScriptTokenizer",
+		"Unsupported",
+		"get_tokenizer",
+		"lexer_fingerprint",
+		"register_tokenizer",
+		"unregister_tokenizer",
+		]
+
+
+class Unsupported(Exception):
+	"""
+	Raised by a :class:`~.Tokenizer` when it can't guarantee the same counts as Pygments for a source file.
+	"""
+
+
+class Tokenizer:
+	"""
+	Base class for tokenizers which count the words in source code in place of a Pygments lexer.
+
+	Subclasses must set :attr:`~.lexers` and implement :meth:`~.count`.
+	"""
+
+	#: Mapping of the names of the Pygments lexers this tokenizer replaces
+	#: to the :func:`~.lexer_fingerprint` of the lexer it was written for.
+	lexers: Dict[str, str] = {}
+
+	def supports(self, lex: pygments.lexer.Lexer) -> bool:
+		"""
+		Returns whether this tokenizer gives the same counts as the given lexer.
+
+		:param lex:
+		"""
+
+		if lex.name not in self.lexers or lex.filters:
+			return False
+
+		return lexer_fingerprint(lex) == self.lexers[lex.name]
+
+	def count(self, source: str, counts: Dict[str, int]) -> None:
+		"""
+		Count the words in ``source``.
+
+		The counts must be the same as those :func:`wordle.frequency.get_tokens` collects from the
+		Pygments token stream before its final cleanup. This includes words it later discards,
+		unless they consist only of punctuation (which are always discarded and don't affect the order of the others).
+
+		:param source: The source code, after it has been preprocessed by the lexer.
+		:param counts: The dictionary to add the counts to. Modified in place.
+
+		:raises Unsupported: If the source can't be counted exactly.
+			Anything added to ``counts`` is then discarded.
+		"""
+
+		raise NotImplementedError
+
+
+#: Registered tokenizers, keyed by the name of the Pygments lexer they replace.
+_tokenizers: Dict[str, Tokenizer] = {}
+
+#: Cache of lexer fingerprints, keyed by lexer class.
+_fingerprints: Dict[type, str] = {}
+
+#: Cache of lexer class -> tokenizer (or :py:obj:`None`), populated by :func:`get_tokenizer`.
+_lexer_tokenizers: Dict[type, Optional[Tokenizer]] = {}
+
+
+def register_tokenizer(tokenizer: Tokenizer) -> None:
+	"""
+	Register a tokenizer to be used in place of the Pygments lexers named in its :attr:`~.Tokenizer.lexers`.
+
+	Replaces any tokenizer already registered for those lexers.
+
+	:param tokenizer:
+	"""
+
+	for lexer_name in tokenizer.lexers:
+		_tokenizers[lexer_name] = tokenizer
+
+	_lexer_tokenizers.clear()
+
+
+def unregister_tokenizer(lexer_name: str) -> None:
+	"""
+	Stop using a tokenizer in place of the Pygments lexer with the given name.
+
+	:param lexer_name:
+	"""
+
+	_tokenizers.pop(lexer_name, None)
+	_lexer_tokenizers.clear()
+
+
+def get_tokenizer(lex: pygments.lexer.Lexer) -> Optional[Tokenizer]:
+	"""
+	Returns the tokenizer to use in place of the given lexer, or :py:obj:`None` if there isn't one.
+
+	:param lex:
+	"""
+
+	if lex.filters:
+		return None
+
+	cls = type(lex)
+
+	try:
+		return _lexer_tokenizers[cls]
+	except KeyError:
+		pass
+
+	tokenizer = _tokenizers.get(lex.name)
+	if tokenizer is not None and not tokenizer.supports(lex):
+		tokenizer = None
+
+	_lexer_tokenizers[cls] = tokenizer
+	return tokenizer
+
+
+def lexer_fingerprint(lex: pygments.lexer.Lexer) -> str:
+	"""
+	Returns a hash of the rules of a Pygments :class:`~pygments.lexer.RegexLexer`,
+	which changes whenever the rules (and so possibly the tokens it produces) change.
+
+	Returns an empty string for other kinds of lexer.
+
+	:param lex:
+	"""
+
+	cls = type(lex)
+
+	if cls in _fingerprints:
+		return _fingerprints[cls]
+
+	if not isinstance(lex, pygments.lexer.RegexLexer) or isinstance(lex, pygments.lexer.ExtendedRegexLexer):
+		fingerprint = ''
+	else:
+		rules = []
+		for state, state_rules in sorted(cls._tokens.items()):
+			if state.startswith("_tmp_"):
+				# Anonymous combined states are numbered in the order they were created.
+				continue
+
+			for rexmatch, action, new_state in state_rules:
+				rules.append(f"{state}\0{rexmatch.__self__.pattern}\0{_describe(action)}\0{_describe(new_state)}")
+
+		# Overriding get_tokens_unprocessed (e.g. to retype names) could change the output.
+		for klass in cls.__mro__:
+			if "get_tokens_unprocessed" in vars(klass):
+				rules.append(f"{klass.__module__}.{klass.__qualname__}")
+
+		fingerprint = hashlib.sha256('\n'.join(rules).encode("UTF-8")).hexdigest()
+
+	_fingerprints[cls] = fingerprint
+	return fingerprint
+
+
+def _describe(obj: Any) -> str:
+	"""
+	Returns a description of part of a lexer rule which is stable between processes.
+	"""
+
+	if obj is None or isinstance(obj, (str, int)):
+		return repr(obj)
+	elif isinstance(obj, (tuple, list)):
+		return '(' + ','.join(_describe(item) for item in obj) + ')'
+	elif isinstance(obj, dict):
+		return '{' + ','.join(f"{key!r}:{_describe(value)}" for key, value in sorted(obj.items())) + '}'
+	elif isinstance(obj, pygments.lexer._TokenType):
+		return str(obj)
+	elif callable(obj) and hasattr(obj, "__code__"):
+		cells = [_describe(cell.cell_contents) for cell in obj.__closure__ or ()]
+		return f"{obj.__qualname__}[{','.join(cells)}]"
+	elif isinstance(obj, type):
+		return f"{obj.__module__}.{obj.__qualname__}"
+	else:
+		return type(obj).__qualname__
+
+
+_split = re.compile("[ \n\t]").split
+
+#: Characters which are discarded by :func:`wordle.frequency.get_tokens` when they make up a whole word.
+#: This doesn't include backslashes, which are kept.
+_PUNCTUATION = frozenset(string.punctuation) - {'\\'}
+
+
+def _add(value: str, counts: Dict[str, int]) -> None:
+	"""
+	Count the words in a token which Pygments would have counted.
+	"""
+
+	if ' ' in value or '\n' in value or '\t' in value:
+		for word in _split(value):
+			counts[word] = counts.get(word, 0) + 1
+	else:
+		counts[value] = counts.get(value, 0) + 1
+
+
+# Python
+
+_PY_NAME = r"[A-Za-z_][A-Za-z0-9_]*"
+
+_PY_NUMBER = (
+		r"(?:\d(?:_?\d)*\.(?:\d(?:_?\d)*)?|(?:\d(?:_?\d)*)?\.\d(?:_?\d)*)(?:[eE][+-]?\d(?:_?\d)*)?"
+		r"|\d(?:_?\d)*[eE][+-]?\d(?:_?\d)*j?"
+		r"|0[oO](?:_?[0-7])+|0[bB](?:_?[01])+|0[xX](?:_?[a-fA-F0-9])+|\d(?:_?\d)*"
+		)
+
+_PY_STRING = r"""(?P<prefix>(?i:rf|fr|rb|br|[rfub]))?(?P<quote>\"\"\"|'''|"|')"""
+
+_PY_SOFT_KEYWORD_LOOKAHEAD = (
+		r"(?![ \t]*(?:[:,;=^&|@~)\]}]|(?:"
+		+ '|'.join(kw for kw in keyword.kwlist if kw[0].islower()) + r")\b))"
+		)
+
+# Pygments skips whitespace, operators and punctuation, so the gaps between matches can be too.
+# Anything else not matched at the start of a token can't be tokenized here.
+_py_root_re = re.compile(
+		r"""(?P<doc>^\s*[rRuUbB]{0,2}(?P<doc_value>\"\"\"(?s:.)*?\"\"\"|'''(?s:.)*?'''))"""
+		r"|(?P<comment>#.*)"
+		rf"|(?P<soft>^[ \t]*(?P<soft_word>match|case)\b{_PY_SOFT_KEYWORD_LOOKAHEAD})"
+		r"|(?P<yield_from>yield from\b)"
+		r"|(?P<statement>(?P<statement_word>def|class|from|import)(?P<statement_space>(?:\s|\\\s)+))"
+		rf"|(?P<string>{_PY_STRING})"
+		rf"|(?P<number>{_PY_NUMBER})"
+		rf"|(?P<name>@?{_PY_NAME})"
+		r"|(?P<backslash>\\)"
+		r"|(?P<other>[^\s!-/:-@\[-`{-~])",
+		re.MULTILINE,
+		)
+
+_py_name_re = re.compile(_PY_NAME)
+_py_soft_keyword_inner_re = re.compile(r"(\s+)([^\n_]*)(_\b)", re.MULTILINE)
+_py_import_re = re.compile(rf"(?P<as>\s+as\s+)|\.|(?P<name>{_PY_NAME})|\s*,\s*")
+_py_from_import_re = re.compile(rf"(?P<end>\s+import\b|None\b)|\.|(?P<name>{_PY_NAME})")
+
+_PY_EXPR = (
+		r"|(?P<ws>\s+)"
+		rf"|(?P<string>{_PY_STRING})"
+		rf"|(?P<number>{_PY_NUMBER})"
+		r"|!=|==|<<|>>|:=|[-~+/*%=<>&^|.]|[\]{}:(),;\[]"
+		rf"|(?P<name>@?{_PY_NAME})"
+		r"|@"
+		)
+
+# Inside the braces of an f-string.
+_py_fstring_expr_re = re.compile(
+		r"(?P<open>[{(\[])|(?P<close>(?:=\s*)?(?:![sraf])?[}:])" + _PY_EXPR,
+		re.MULTILINE,
+		)
+
+# Inside brackets within the braces of an f-string.
+_py_fstring_inner_re = re.compile(r"(?P<open>[{(\[])|(?P<close>[\])}])" + _PY_EXPR, re.MULTILINE)
+
+#: Words which Pygments treats as operators, and so aren't counted.
+_PY_OPERATOR_WORDS = frozenset({"in", "is", "and", "or", "not"})
+
+_PY_STRING_ESCAPE = r"\\(?:N\{.*?\}|u[a-fA-F0-9]{4}|U[a-fA-F0-9]{8})|"
+_PY_BYTES_ESCAPE = r"""\\(?:[\\abfnrtv"']|\n|x[a-fA-F0-9]{2}|[0-7]{1,3})|"""
+_PY_FORMAT_ESCAPE = r"\{\{|\}\}|"
+
+#: Cache of the patterns for the content of each kind of string, keyed by the prefix (lowercase) and quote.
+_py_string_res: Dict[Tuple[str, str], Pattern[str]] = {}
+
+
+def _py_string_re(prefix: str, quote: str) -> Pattern[str]:
+	"""
+	Returns the pattern for the content of a string with the given prefix and opening quote.
+
+	Each match is a single Pygments token, in a group named for how it is counted.
+	"""
+
+	key = (prefix, quote)
+	if key in _py_string_res:
+		return _py_string_res[key]
+
+	raw = 'r' in prefix
+	fstring = 'f' in prefix
+	triple = len(quote) == 3
+
+	escape = ''
+	if fstring:
+		escape += _PY_FORMAT_ESCAPE
+	if not raw:
+		if 'b' not in prefix:
+			escape += _PY_STRING_ESCAPE
+		escape += _PY_BYTES_ESCAPE
+	if not triple:
+		escape += rf"\\\\|\\{quote}|\\\n|"
+
+	if fstring:
+		content = r"""\}|(?P<open>\{)|(?P<text>[^\\'"{}\n]+|\\)|['"]"""
+	else:
+		content = (
+				r"(?P<interp>%(?:\(\w+\))?[-#0 +]*(?:[0-9]+|[*])?(?:\.(?:[0-9]+|[*]))?[hlL]?[E-GXc-giorsaux%]"
+				r"|\{(?:(?:\w+)(?:(?:\.\w+)|(?:\[[^\]]+\]))*)?(?:![sra])?"
+				r"(?::(?:.?[<>=\^])?[-+ ]?#?0?(?:\d+)?,?(?:\.\d+)?[E-GXb-gnosx%]?)?\})"
+				r"""|(?P<text>[^\\'"%{\n]+|\\)|['"]|%|\{{1,2}"""
+				)
+
+	pattern = f"(?P<skip>{escape[:-1]})|" if escape else ''
+	pattern += f"(?P<close>{re.escape(quote)})|{content}"
+	if triple:
+		pattern += r"|\n"
+
+	_py_string_res[key] = string_re = re.compile(pattern, re.MULTILINE)
+	return string_re
+
+
+def _count_python(text: str, counts: Dict[str, int]) -> None:
+	"""
+	Count the words in Python source code in the same way as Pygments' ``PythonLexer``.
+	"""
+
+	search = _py_root_re.search
+	get = counts.get
+	pos = 0
+
+	while True:
+		m = search(text, pos)
+		if m is None:
+			return
+
+		kind = m.lastgroup
+		pos = m.end()
+
+		if kind == "name":
+			value = m.group()
+			if value not in _PY_OPERATOR_WORDS:
+				counts[value] = get(value, 0) + 1
+		elif kind == "string":
+			pos = _count_python_string(text, pos, m.group("prefix"), m.group("quote"), counts)
+		elif kind == "comment":
+			continue
+		elif kind == "number":
+			value = m.group()
+			counts[value] = get(value, 0) + 1
+		elif kind == "doc":
+			_add(m.group("doc_value"), counts)
+		elif kind == "statement":
+			word = m.group("statement_word")
+			counts[word] = get(word, 0) + 1
+			space = m.group("statement_space")
+			if '\\' in space:
+				_add(space, counts)
+			pos = _count_python_statement(text, pos, word, counts)
+		elif kind == "backslash":
+			counts['\\'] = get('\\', 0) + 1
+		elif kind == "yield_from":
+			counts["yield"] = get("yield", 0) + 1
+			counts["from"] = get("from", 0) + 1
+		elif kind == "soft":
+			value = m.group("soft_word")
+			counts[value] = get(value, 0) + 1
+
+			# Pygments lexes the pattern up to a wildcard separately, and the wildcard itself isn't counted.
+			while True:
+				inner = _py_soft_keyword_inner_re.match(text, pos)
+				if inner is None:
+					break
+				_count_python(inner.group(2), counts)
+				pos = inner.end()
+		else:
+			raise Unsupported(f"Unexpected character {m.group()!r}")
+
+
+def _count_python_statement(text: str, pos: int, word: str, counts: Dict[str, int]) -> int:
+	"""
+	Count the words following ``def``, ``class``, ``from`` or ``import``, which Pygments lexes in their own states.
+
+	Returns the position to continue from.
+	"""
+
+	if word == "def" or word == "class":
+		m = _py_name_re.match(text, pos)
+		if m is None:
+			if word == "class":
+				# Pygments marks everything up to the next name as an error.
+				raise Unsupported("class without a name")
+			return pos
+
+		_add(m.group(), counts)
+		return m.end()
+
+	state_re = _py_import_re if word == "import" else _py_from_import_re
+
+	while True:
+		m = state_re.match(text, pos)
+		if m is None:
+			return pos
+
+		pos = m.end()
+		kind = m.lastgroup
+
+		if kind == "name":
+			_add(m.group(), counts)
+		elif kind == "as":
+			_add("as", counts)
+		elif kind == "end":
+			_add(m.group().lstrip(), counts)
+			return pos
+
+
+def _count_python_string(text: str, pos: int, prefix: Optional[str], quote: str, counts: Dict[str, int]) -> int:
+	"""
+	Count the words in a string literal, including the expressions in any f-strings within it.
+
+	Returns the position to continue from, which is after the closing quote.
+	"""
+
+	stack: List[Pattern[str]] = [_py_string_re((prefix or '').lower(), quote)]
+
+	while stack:
+		state = stack[-1]
+		m = state.match(text, pos)
+
+		if m is None:
+			if pos >= len(text):
+				return pos
+
+			char = text[pos]
+			if char == '\n':
+				# Pygments returns to the root state at an unterminated string.
+				return pos + 1
+			elif state is _py_fstring_expr_re or state is _py_fstring_inner_re:
+				# Pygments marks the character as an error, which is only counted if it's a backslash.
+				if char == '\\':
+					_add(char, counts)
+				elif char not in _PUNCTUATION:
+					raise Unsupported(f"Unexpected character {char!r}")
+				pos += 1
+				continue
+			else:  # pragma: no cover
+				raise Unsupported(f"Unexpected character {char!r}")
+
+		pos = m.end()
+		kind = m.lastgroup
+
+		if kind == "text" or kind == "interp" or kind == "number":
+			_add(m.group(), counts)
+		elif kind == "name":
+			value = m.group()
+			if value not in _PY_OPERATOR_WORDS:
+				_add(value, counts)
+		elif kind == "close":
+			stack.pop()
+			if state is _py_fstring_expr_re:
+				_add(m.group(), counts)
+		elif kind == "open":
+			if state is _py_fstring_inner_re or state is _py_fstring_expr_re:
+				stack.append(_py_fstring_inner_re)
+			else:
+				stack.append(_py_fstring_expr_re)
+		elif kind == "string":
+			stack.append(_py_string_re((m.group("prefix") or '').lower(), m.group("quote")))
+
+	return pos
+
+
+class PythonTokenizer(Tokenizer):
+	"""
+	Counts the words in Python source code in the same way as Pygments' ``PythonLexer``.
+	"""
+
+	lexers = {"Python": "6df67fc91573c11de1fcc06a95cb876f5a180947e208f69af9dc2a32767a4e19"}
+
+	def count(self, source: str, counts: Dict[str, int]) -> None:  # noqa: D102
+		_count_python(source, counts)
+
+
+# JavaScript and TypeScript
+
+_JS_IDENT = (
+		"(?:[$_" + unistring.combine("Lu", "Ll", "Lt", "Lm", "Lo", "Nl") + r"]|\\u[a-fA-F0-9]{4})"
+		"(?:[$" + unistring.combine("Lu", "Ll", "Lt", "Lm", "Lo", "Nl", "Mn", "Mc", "Nd", "Pc")
+		+ "\u200c\u200d]" + r"|\\u[a-fA-F0-9]{4})*"
+		)
+
+_JS_KEYWORDS = (
+		r"(?:for|in|while|do|break|return|continue|switch|case|default|if|else|throw|try|catch|finally"
+		r"|yield|await|async|this|of|static|export|import|debugger|extends|super)\b"
+		r"|(?:var|let|const|with|function|class)\b"
+		)
+
+_JS_WORDS = (
+		r"\b(?:constructor|from|as)\b"
+		r"|(?:abstract|boolean|byte|char|double|enum|final|float|goto|implements|int|interface|long|native"
+		r"|package|private|protected|public|short|synchronized|throws|transient|volatile)\b"
+		r"|(?:true|false|null|NaN|Infinity|undefined)\b"
+		r"|(?:Array|Boolean|Date|BigInt|Function|Math|ArrayBuffer|Number|Object|RegExp|String|Promise|Proxy"
+		r"|decodeURI|decodeURIComponent|encodeURI|encodeURIComponent|eval|isFinite|isNaN|parseFloat|parseInt"
+		r"|DataView|document|window|globalThis|global|Symbol|Intl|WeakSet|WeakMap|Set|Map|Reflect|JSON|Atomics"
+		r"|Int(?:8|16|32)Array|BigInt64Array|Float32Array|Float64Array|Uint8ClampedArray|Uint(?:8|16|32)Array"
+		r"|BigUint64Array)\b"
+		r"|(?:(?:Eval|Internal|Range|Reference|Syntax|Type|URI)?Error)\b"
+		)
+
+#: Keywords after which a slash starts a regular expression literal.
+_JS_PUSH_KEYWORDS = frozenset({
+		"for", "while", "do", "break", "return", "continue", "switch", "case", "default", "if", "else",
+		"throw", "try", "catch", "finally", "yield", "await", "async", "this", "of", "static", "export",
+		"import", "debugger", "extends", "super", "var", "let", "const", "with", "function", "class",
+		})
+_TS_PUSH_KEYWORDS = frozenset({
+		"abstract", "implements", "private", "protected", "public", "readonly", "enum", "interface", "override",
+		})
+
+#: Words which Pygments treats as operators, and so aren't counted.
+_JS_OPERATOR_WORDS = frozenset({"typeof", "instanceof", "in", "void", "delete", "new"})
+
+_JS_NUMBER = (
+		r"0[bB][01]+n?|0[oO]?[0-7]+n?|0[xX][0-9a-fA-F]+n?|[0-9]+n"
+		r"|(?:\.[0-9]+|[0-9]+\.[0-9]*|[0-9]+)(?:[eE][-+]?[0-9]+)?"
+		)
+
+_JS_OPERATORS = r"\+\+|--|~|\?\?=?|\?|:|\\(?=\n)|(?:<<|>>>?|==?|!=?|(?:\*\*|\|\||&&|[-<>+*%&|^]))=?"
+
+_TS_RULES = (
+		r"(?P<ts_keyword>(?:abstract|implements|private|protected|public|readonly)\b|(?:enum|interface|override)\b)"
+		r"|(?P<ts_word>\b(?:declare|type)\b|\b(?:string|boolean|number)\b)"
+		r"|(?P<ts_module>\b(?P<module>module)\s*(?P<module_name>[\w?.$]+)\s*)"
+		r"|(?P<ts_annotation>(?P<annotated>[\w?.$]+)\s*:\s*(?P<annotation>[\w?.$]+))"
+		"|(?P<ts_decorator>@" + _JS_IDENT + ")|"
+		)
+
+
+def _js_code_re(typescript: bool, template: bool) -> Pattern[str]:
+	"""
+	Returns the pattern for a single token of JavaScript or TypeScript code.
+
+	Whitespace, operators and punctuation are combined into a single match (named ``run``).
+	Operators and some punctuation allow a regular expression literal to follow;
+	the last of these in the run is captured as ``push``, otherwise as ``nopush``.
+
+	:param typescript:
+	:param template: Whether the code is within a ``${}`` substitution in a template string,
+		where a ``}`` ends the substitution.
+	"""
+
+	# Punctuation which doesn't begin another token Pygments would check first.
+	guard = r"(?!\.[0-9]|<!--"
+	if typescript:
+		guard += r"|[?.][\w?.$]*\s*:\s*[\w?.$]"
+	guard += ')'
+
+	closing = r"[)\].]" if template else r"[})\].]"
+
+	# Most identifiers are ASCII and aren't followed by anything which could make Pygments treat them differently,
+	# so are matched in one go; keywords are distinguished afterwards.
+	ident = r"(?P<ident>[A-Za-z_][A-Za-z0-9_]*)(?![\w$\\\x80-\U0010ffff]|[\w?.$]*\(\) \{"
+	if typescript:
+		ident = r"(?!module)" + ident + r"|[\w?.$]*\s*:\s*[\w?.$]"
+	ident += ")|"
+
+	return re.compile(
+			(r"(?P<end>\})|" if template else '')
+			+ ident
+			+ (_TS_RULES if typescript else '')
+			+ r"(?P<run>(?:\s+|" + guard + r"(?:(?P<nopush>\.\.\.|=>|" + closing + r")|(?P<push>"
+			+ _JS_OPERATORS + r"|[{(\[;,])))+)"
+			r"|(?P<comment><!--|//.*?$|/\*.*?\*/)"
+			r"|(?P<slash>/)"
+			r"|(?P<number>" + _JS_NUMBER + ')'
+			r"|(?P<opword>(?:typeof|instanceof|in|void|delete|new)\b)"
+			r"|(?P<keyword>" + _JS_KEYWORDS + ')'
+			r"|(?P<word>" + _JS_WORDS + ')'
+			r"|(?P<method>[a-zA-Z_?.$][\w?.$]*(?=\(\) \{))"
+			r"|(?P<name>" + _JS_IDENT + ')'
+			r"""|(?P<string>"[^"\\]*(?:\\[\s\S][^"\\]*)*"|'[^'\\]*(?:\\[\s\S][^'\\]*)*')"""
+			r"|(?P<template>`)"
+			r"|(?P<private>#[a-zA-Z_]\w*)"
+			r"|.",
+			re.MULTILINE | re.DOTALL,
+			)
+
+
+_js_hashbang_re = re.compile(r"\A#! ?/.*?$", re.MULTILINE | re.DOTALL)
+_js_regex_re = re.compile(
+		r"/(\\.|[^[/\\\n]|\[(\\.|[^\]\\\n])*])+/([gimuysd]+\b|\B)",
+		re.MULTILINE | re.DOTALL,
+		)
+_js_template_re = re.compile(r"(?P<close>`)|(?P<text>\\.|[^`\\$]+)|(?P<open>\$\{)|\$", re.DOTALL)
+
+_js_code_res: Dict[Tuple[bool, bool], Pattern[str]] = {}
+
+
+def _count_javascript(text: str, counts: Dict[str, int], typescript: bool = False) -> None:
+	"""
+	Count the words in JavaScript or TypeScript source code in the same way as Pygments' ``JavascriptLexer``
+	or ``TypeScriptLexer``.
+
+	:param text:
+	:param counts:
+	:param typescript:
+	"""
+
+	if (typescript, False) not in _js_code_res:
+		_js_code_res[(typescript, False)] = _js_code_re(typescript, False)
+		_js_code_res[(typescript, True)] = _js_code_re(typescript, True)
+
+	root_match = _js_code_res[(typescript, False)].match
+	template_code_match = _js_code_res[(typescript, True)].match
+	template_match = _js_template_re.match
+	get = counts.get
+
+	# Whether a slash would start a regular expression literal (Pygments' "slashstartsregex" state).
+	regex_ok = True
+
+	# The number of template strings the current position is within,
+	# and whether it's within the text (rather than a substitution) of the innermost one.
+	depth = 0
+	in_template = False
+
+	pos = 0
+	m = _js_hashbang_re.match(text)
+	if m is not None:
+		pos = m.end()
+		regex_ok = False
+
+	length = len(text)
+
+	while pos < length:
+		if in_template:
+			m = template_match(text, pos)
+			if m is None:
+				# A trailing backslash.
+				_add(text[pos], counts)
+				pos += 1
+				continue
+
+			pos = m.end()
+			kind = m.lastgroup
+
+			if kind == "text":
+				_add(m.group(), counts)
+			elif kind == "open":
+				in_template = False
+				regex_ok = False
+			elif kind == "close":
+				depth -= 1
+				in_template = False
+				regex_ok = False
+
+			continue
+
+		m = (template_code_match if depth else root_match)(text, pos)
+		assert m is not None  # The patterns match any single character.
+		kind = m.lastgroup
+		start = pos
+		pos = m.end()
+
+		if kind == "ident":
+			value = m.group()
+			if value in _JS_PUSH_KEYWORDS or (typescript and value in _TS_PUSH_KEYWORDS):
+				counts[value] = get(value, 0) + 1
+				regex_ok = True
+			elif value in _JS_OPERATOR_WORDS:
+				regex_ok = True
+			else:
+				counts[value] = get(value, 0) + 1
+				regex_ok = False
+		elif kind == "run":
+			push_end = m.end("push")
+			nopush_end = m.end("nopush")
+			if push_end > nopush_end:
+				regex_ok = True
+			elif nopush_end >= 0:
+				regex_ok = False
+		elif kind == "name" or kind == "word" or kind == "number" or kind == "private":
+			value = m.group()
+			counts[value] = get(value, 0) + 1
+			regex_ok = False
+		elif kind == "keyword":
+			value = m.group()
+			counts[value] = get(value, 0) + 1
+			regex_ok = True
+		elif kind == "string":
+			_add(m.group(), counts)
+			regex_ok = False
+		elif kind == "opword":
+			regex_ok = True
+		elif kind == "comment" or kind == "slash":
+			# Pygments looks for a regular expression after a newline.
+			if start == 0 or text[start - 1] == '\n':
+				regex_ok = True
+
+			if kind == "comment":
+				continue
+
+			if not regex_ok:
+				# An operator.
+				if text.startswith('=', pos):
+					pos += 1
+				regex_ok = True
+				continue
+
+			regex = _js_regex_re.match(text, start)
+			if regex is not None:
+				_add(regex.group(), counts)
+				pos = regex.end()
+				regex_ok = False
+				continue
+
+			# Pygments marks the rest of the line as errors, one character at a time.
+			end = text.find('\n', start)
+			if end == -1:
+				end = length
+			for char in text[start:end]:
+				if char not in _PUNCTUATION:
+					_add(char, counts)
+			pos = end + 1
+			regex_ok = True
+		elif kind == "template":
+			depth += 1
+			in_template = True
+		elif kind == "end":
+			in_template = True
+		elif kind == "method":
+			_add(m.group(), counts)
+			regex_ok = True
+		elif kind == "ts_annotation":
+			_add(m.group("annotated"), counts)
+			_add(m.group("annotation"), counts)
+			regex_ok = False
+		elif kind == "ts_keyword":
+			_add(m.group(), counts)
+			regex_ok = True
+		elif kind == "ts_word" or kind == "ts_decorator":
+			_add(m.group(), counts)
+			regex_ok = False
+		elif kind == "ts_module":
+			_add(m.group("module"), counts)
+			_add(m.group("module_name"), counts)
+			regex_ok = True
+		else:
+			# Pygments marks the character as an error.
+			char = m.group()
+			if char not in _PUNCTUATION:
+				_add(char, counts)
+			regex_ok = False
+
+
+class JavaScriptTokenizer(Tokenizer):
+	"""
+	Counts the words in JavaScript source code in the same way as Pygments' ``JavascriptLexer``.
+	"""
+
+	lexers = {"JavaScript": "7ff9fc761970e0b8ac01423a552ec08b45e67a54bab637ae2959ab0567d54a3b"}
+
+	def count(self, source: str, counts: Dict[str, int]) -> None:  # noqa: D102
+		_count_javascript(source, counts)
+
+
+class TypeScriptTokenizer(Tokenizer):
+	"""
+	Counts the words in TypeScript source code in the same way as Pygments' ``TypeScriptLexer``.
+	"""
+
+	lexers = {"TypeScript": "b77a9bd32d6961463eb24152e547b402bd80044471dc401dbd661d0c7cea5888"}
+
+	def count(self, source: str, counts: Dict[str, int]) -> None:  # noqa: D102
+		_count_javascript(source, counts, typescript=True)
+
+
+# C and C++
+
+_C_IDENT = r"(?!\d)(?:[\w$]|\\u[0-9a-fA-F]{4}|\\U[0-9a-fA-F]{8})+"
+_C_NAMESPACED_IDENT = r"(?!\d)(?:[\w$]|\\u[0-9a-fA-F]{4}|\\U[0-9a-fA-F]{8}|::)+"
+
+_C_COMMENT = (
+		r"//(?:.|(?<=\\)\n)*\n"
+		r"|/(?:\\\n)?[*][^*]*(?:[*](?!(?:\\\n)?/)[^*]*)*[*](?:\\\n)?/"
+		)
+
+_C_POSSIBLE_COMMENTS = r"\s*(?:(?:" + _C_COMMENT + r")\s*)*"
+
+_C_COMMON_KEYWORDS = (
+		"_Pragma", "alignas", "alignof", "asm", "auto", "break", "const", "continue", "default", "do", "else",
+		"enum", "extern", "for", "goto", "if", "register", "restricted", "return", "sizeof", "static",
+		"static_assert", "struct", "switch", "thread_local", "typedef", "union", "volatile", "while",
+		"_inline", "__inline", "inline", "naked", "restrict", "thread", "__m128i", "__m128d", "__m128", "__m64",
+		"__asm", "__assume", "__based", "__cdecl", "__declspec", "__except", "__fastcall", "__finally",
+		"__forceinline", "__identifier", "__leave", "__noop", "__raise", "__stdcall", "__try", "__unaligned",
+		"__w64",
+		)
+
+_C_KEYWORDS = (
+		"_Alignas", "_Alignof", "_Generic", "_Imaginary", "_Noreturn", "_Static_assert", "_Thread_local",
+		"complex", "imaginary", "noreturn",
+		) + _C_COMMON_KEYWORDS
+
+_CPP_KEYWORDS = (
+		"__restrict", "and", "and_eq", "bitand", "bitor", "catch", "class", "co_await", "co_return", "co_yield",
+		"compl", "concept", "const_cast", "consteval", "constexpr", "constinit", "decltype", "delete",
+		"dynamic_cast", "explicit", "export", "final", "friend", "import", "module", "mutable", "new", "noexcept",
+		"not", "not_eq", "nullptr", "operator", "or", "or_eq", "override", "private", "protected", "public",
+		"reinterpret_cast", "requires", "static_cast", "template", "this", "throw", "throws", "try", "typeid",
+		"typename", "using", "virtual", "xor", "xor_eq",
+		) + _C_COMMON_KEYWORDS
+
+_C_COMMON_TYPES = (
+		"__int16", "__int32", "__int64", "__int8", "__wchar_t", "_BitInt", "__int128", "bool", "char", "double",
+		"float", "int", "long", "short", "signed", "unsigned", "void",
+		)
+
+_C_TYPES = ("_Atomic", "_Bool", "_Complex") + _C_COMMON_TYPES
+_CPP_TYPES = ("char16_t", "char32_t", "char8_t") + _C_COMMON_TYPES
+
+_C_BUILTINS = ("true", "false", "NULL")
+
+_C_NUMBER = (
+		r"0[xX](?:[0-9a-fA-F](?:'?[0-9a-fA-F])*\.[0-9a-fA-F](?:'?[0-9a-fA-F])*|\.[0-9a-fA-F](?:'?[0-9a-fA-F])*"
+		r"|[0-9a-fA-F](?:'?[0-9a-fA-F])*)[pP][+-]?[0-9a-fA-F](?:'?[0-9a-fA-F])*[lL]?"
+		r"|-?(?:\d(?:'?\d)*\.\d(?:'?\d)*|\.\d(?:'?\d)*|\d(?:'?\d)*)[eE][+-]?\d(?:'?\d)*[fFlL]?"
+		r"|-?(?:(?:\d(?:'?\d)*\.(?:\d(?:'?\d)*)?|\.\d(?:'?\d)*)[fFlL]?)|\d(?:'?\d)*[fFlL]"
+		r"|-?0[xX][0-9a-fA-F](?:'?[0-9a-fA-F])*(?:[uU][lL]{0,2}|[lL]{1,2}[uU]?)?"
+		r"|-?0[bB][01](?:'?[01])*(?:[uU][lL]{0,2}|[lL]{1,2}[uU]?)?"
+		r"|-?0(?:'?[0-7])+(?:[uU][lL]{0,2}|[lL]{1,2}[uU]?)?"
+		r"|-?\d(?:'?\d)*(?:[uU][lL]{0,2}|[lL]{1,2}[uU]?)?"
+		)
+
+# The rules Pygments checks at the start of each line, before anything else.
+_C_LINE_START = (
+		r"(?P<if0>^(?P<if0_prefix>\s*(?:/[*].*?[*]/\s*)?)#if\s+0)"
+		r"|(?P<macro>^(?P<macro_prefix>\s*(?:/[*].*?[*]/\s*)?)#)"
+		r"|(?P<label>^[ \t]*(?!(?:public|private|protected|default)\b)(?P<label_name>" + _C_IDENT + r")\s*:(?!:))"
+		)
+
+# Whitespace, which can't continue onto a new line which might start with one of the rules above.
+_C_SPACE = r"[^\S\n]+|\n(?![ \t]*[\w$\\]|\s*[#/])"
+
+_C_WHITESPACE = (
+		_C_LINE_START + r"|(?P<run>(?:" + _C_SPACE + r")+)|(?P<newline>\n)|(?P<backslash>\\\n)"
+		r"|(?P<comment>" + _C_COMMENT + r"|/(?:\\\n)?[*][\w\W]*)"
+		)
+
+
+def _c_words(words: Tuple[str, ...]) -> str:
+	return r"(?:" + '|'.join(words) + r")\b"
+
+
+def _c_function(name: str, end: str) -> str:
+	"""
+	Returns the pattern Pygments uses to find a function definition (or declaration) in the ``root`` state.
+
+	:param name: The prefix for the names of the groups.
+	:param end: The character which follows the signature.
+	"""
+
+	return (
+			f"(?P<{name}>(?P<{name}_ret>" + _C_NAMESPACED_IDENT + r"(?:[&*\s])+)"
+			f"(?P<{name}_comment1>" + _C_POSSIBLE_COMMENTS + ')'
+			f"(?P<{name}_name>" + _C_NAMESPACED_IDENT + ')'
+			f"(?P<{name}_comment2>" + _C_POSSIBLE_COMMENTS + ')'
+			f"(?P<{name}_args>" + r"\([^;\"')]*?\))"
+			f"(?P<{name}_comment3>" + _C_POSSIBLE_COMMENTS + ')'
+			f"(?P<{name}_tail>[^;{end}/\"']*)" + re.escape(end) + ')'
+			)
+
+
+def _c_code(cpp: bool, colon: bool = True) -> str:
+	"""
+	Returns the pattern for a single token in the ``statement`` and ``function`` states.
+
+	Whitespace, operators and punctuation are combined into a single match (named ``run``).
+
+	:param cpp: Whether the code is C++.
+	:param colon: Whether colons may be included in the run.
+	"""
+
+	operators = r"~!%^&*+=|?<>/()\[\],." + (':' if colon else '') + '-'
+
+	# Operators which don't begin a comment or number, which Pygments would check for first.
+	run = _C_SPACE + r"|(?![-.][\d.]|/[/*\\])[" + operators + ']'
+
+	if cpp:
+		state_keywords = (
+				r"(?P<classname>(?P<classname_word>class|concept|typename|struct|union)\s+)"
+				r"|(?P<case>case\b)|(?P<namespace>namespace\b)|(?P<enum>enum\s+)"
+				)
+		raw = (
+				r"(?P<raw>(?:[LuU]|u8)?R\"(?P<raw_delimiter>[^\\()\s]{,16})\((?P<raw_text>(?:.|\n)*?)\)"
+				r"(?P=raw_delimiter)\")|"
+				)
+	else:
+		state_keywords = r"(?P<classname>(?P<classname_word>struct|union)\s+)|(?P<case>case\b)"
+		raw = ''
+
+	return (
+			_C_LINE_START
+			+ r"|(?P<run>(?:" + run + r")+)|(?P<newline>\n)"
+			+ '|' + state_keywords
+			# Most identifiers are ASCII and aren't followed by anything which could make Pygments treat them differently,
+			# so are matched in one go.
+			+ r"|(?P<ident>[A-Za-z_][A-Za-z0-9_]*)(?![\w$\\\"'])"
+			r"|(?P<backslash>\\\n)"
+			r"|(?P<comment>" + _C_COMMENT + r"|/(?:\\\n)?[*][\w\W]*)|"
+			+ raw
+			+ r"(?P<string>(?:[LuU]|u8)?\")"
+			r"|(?P<char>(?:[LuU]|u8)?'(?P<char_value>\\.|\\[0-7]{1,3}|\\x[a-fA-F0-9]{1,2}|[^\\'\n])')"
+			r"|(?P<number>" + _C_NUMBER + ')'
+			r"|(?P<skip>[~!%^&*+=|?:<>/()\[\],.-])"
+			r"|(?P<name>" + _C_IDENT + ')'
+			r"|(?P<brace>[{};])"
+			)
+
+
+_c_string_re = re.compile(
+		r'(?P<end>")|\\(?:[\\abfnrtv"\']|x[a-fA-F0-9]{2,4}|u[a-fA-F0-9]{4}|U[a-fA-F0-9]{8}|[0-7]{1,3})'
+		r'|(?P<text>[^\\"\n]+|\\\n?)'
+		)
+
+_C_INCLUDE = r"(?P<{0}_prefix>\s*(?:/[*].*?[*]/\s*)?)include(?P<{0}_space>\s*(?:/[*].*?[*]/\s*)?){1}[^\n]*"
+
+_c_macro_re = re.compile(
+		"(?P<include>" + _C_INCLUDE.format("include", r'"[^"]+"') + ')'
+		"|(?P<include_system>" + _C_INCLUDE.format("include_system", r"<[^>]+>") + ')'
+		r"|[^/\n]+|/[*][\s\S]*?[*]/|(?P<end>//.*?\n)|/|(?<=\\)\n|(?P<newline>\n)",
+		re.MULTILINE,
+		)
+
+_c_if0_re = re.compile(
+		r"(?P<push>^\s*#if.*?(?<!\\)\n)|(?P<pop>^\s*#el(?:se|if).*\n|^\s*#endif.*?(?<!\\)\n)|.*?\n",
+		re.MULTILINE,
+		)
+
+_c_ident_re = re.compile(_C_IDENT)
+_c_word_re = re.compile(r"\w*")
+_cpp_enum_name_re = re.compile(r"(?P<keyword>(?:class|struct)\b)|(?P<name>" + _C_IDENT + ')')
+
+_c_res: Dict[bool, Tuple[Any, ...]] = {}
+
+
+def _c_patterns(cpp: bool) -> Tuple[Any, ...]:
+	"""
+	Returns the compiled patterns and keywords for C or C++, compiling them the first time they are needed.
+
+	:param cpp:
+	"""
+
+	if cpp not in _c_res:
+		keywords, types = (_CPP_KEYWORDS, _CPP_TYPES) if cpp else (_C_KEYWORDS, _C_TYPES)
+
+		if cpp:
+			state_keywords = (
+					r"(?P<classname>(?P<classname_word>class|concept|typename|struct|union)\s+)"
+					r"|(?P<case>case\b)|(?P<namespace>namespace\b)|(?P<enum>enum\s+)"
+					)
+		else:
+			state_keywords = r"(?P<classname>(?P<classname_word>struct|union)\s+)|(?P<case>case\b)"
+
+		root = re.compile(
+				_C_WHITESPACE + '|' + state_keywords
+				+ r"|(?P<keyword>" + _c_words(keywords) + ')|'
+				+ _c_function("function", '{') + '|' + _c_function("declaration", ';')
+				+ r"|(?P<type>" + _c_words(types) + ')',
+				re.MULTILINE,
+				)
+		code = re.compile(_c_code(cpp), re.MULTILINE)
+		case_value = re.compile(
+				r"(?P<case_end>(?<!:):(?!:))|(?P<constant>" + _C_IDENT + ")|" + _c_code(cpp, colon=False),
+				re.MULTILINE,
+				)
+		namespace = re.compile(
+				r"(?P<namespace_end>[;{])|(?P<constant>inline\b|" + _C_IDENT + ")|" + _c_code(cpp),
+				re.MULTILINE,
+				)
+		whitespace = re.compile(_C_WHITESPACE, re.MULTILINE)
+		words = frozenset(keywords + types + _C_BUILTINS)
+
+		_c_res[cpp] = (root, code, case_value, namespace, whitespace, words)
+
+	return _c_res[cpp]
+
+
+def _count_c_group(value: str, counts: Dict[str, int], cpp: bool) -> None:
+	"""
+	Count the words in part of a match which Pygments lexes again from the ``root`` state.
+	"""
+
+	if value and not value.isspace():
+		_count_c(value, counts, cpp)
+
+
+def _count_c(text: str, counts: Dict[str, int], cpp: bool = False) -> None:
+	"""
+	Count the words in C or C++ source code in the same way as Pygments' ``CLexer`` or ``CppLexer``.
+
+	:param text:
+	:param counts:
+	:param cpp:
+	"""
+
+	root_re, code_re, case_value_re, namespace_re, whitespace_re, words = _c_patterns(cpp)
+	root_match = root_re.match
+	code_match = code_re.match
+	string_match = _c_string_re.match
+	get = counts.get
+
+	stack = ["root"]
+	pos = 0
+	length = len(text)
+
+	while pos < length:
+		state = stack[-1]
+
+		if state == "function" or state == "statement":
+			m = code_match(text, pos)
+		elif state == "root":
+			m = root_match(text, pos)
+			if m is None:
+				stack.append("statement")
+				continue
+		elif state == "string":
+			m = string_match(text, pos)
+			if m is None:
+				# An unterminated string. Pygments starts again from the root state after the newline.
+				stack = ["root"]
+				pos += 1
+				continue
+
+			pos = m.end()
+			kind = m.lastgroup
+			if kind == "text":
+				_add(m.group(), counts)
+			elif kind == "end":
+				stack.pop()
+			continue
+		elif state == "macro":
+			m = _c_macro_re.match(text, pos)
+			assert m is not None  # The pattern matches any single character.
+			pos = m.end()
+			kind = m.lastgroup
+			if kind == "end" or kind == "newline":
+				stack.pop()
+			elif kind is not None:
+				_count_c_group(m.group(f"{kind}_prefix"), counts, cpp)
+				_count_c_group(m.group(f"{kind}_space"), counts, cpp)
+			continue
+		elif state == "if0":
+			m = _c_if0_re.match(text, pos)
+			if m is None:
+				# The last line is missing its newline. Pygments marks each character as an error.
+				_add(text[pos], counts)
+				pos += 1
+				continue
+
+			pos = m.end()
+			kind = m.lastgroup
+			if kind == "push":
+				stack.append("if0")
+			elif kind == "pop":
+				stack.pop()
+			continue
+		elif state == "classname":
+			stack.pop()
+			m = _c_ident_re.match(text, pos)
+			if m is not None:
+				_add(m.group(), counts)
+				pos = m.end()
+			continue
+		elif state == "enumname":
+			m = whitespace_re.match(text, pos)
+			if m is None:
+				m = _cpp_enum_name_re.match(text, pos)
+				if m is None:
+					stack.pop()
+				else:
+					_add(m.group(), counts)
+					pos = m.end()
+					if m.lastgroup == "name":
+						stack.pop()
+				continue
+		elif state == "case-value":
+			m = case_value_re.match(text, pos)
+		else:
+			m = namespace_re.match(text, pos)
+
+		if m is None:
+			# Pygments marks the character as an error.
+			char = text[pos]
+			if char not in _PUNCTUATION:
+				_add(char, counts)
+			pos += 1
+			continue
+
+		kind = m.lastgroup
+		start = pos
+		pos = m.end()
+
+		if kind == "run" or kind == "newline" or kind == "skip" or kind == "comment":
+			continue
+		elif kind == "ident" or kind == "number" or kind == "keyword" or kind == "type" or kind == "constant":
+			value = m.group()
+			counts[value] = get(value, 0) + 1
+		elif kind == "brace":
+			char = text[start]
+			if state == "function":
+				if char == '{':
+					stack.append("function")
+				elif char == '}' and len(stack) > 1:
+					stack.pop()
+			elif state == "statement" and char != '}':
+				stack.pop()
+		elif kind == "name":
+			value = m.group()
+			if '$' in value or '\\' in value:
+				# Pygments matches a keyword in preference to an identifier, up to the end of the keyword.
+				word_match = _c_word_re.match(value)
+				assert word_match is not None
+				word = word_match.group()
+				if word in words:
+					value = word
+					pos = start + len(word)
+			counts[value] = get(value, 0) + 1
+		elif kind == "string":
+			stack.append("string")
+		elif kind == "char":
+			_add(m.group("char_value"), counts)
+		elif kind == "backslash":
+			counts['\\'] = get('\\', 0) + 1
+		elif kind == "label":
+			_add(m.group("label_name"), counts)
+		elif kind == "function" or kind == "declaration":
+			_count_c_group(m.group(f"{kind}_ret"), counts, cpp)
+			_count_c_group(m.group(f"{kind}_comment1"), counts, cpp)
+			_add(m.group(f"{kind}_name"), counts)
+			_count_c_group(m.group(f"{kind}_comment2"), counts, cpp)
+			_count_c_group(m.group(f"{kind}_args"), counts, cpp)
+			_count_c_group(m.group(f"{kind}_comment3"), counts, cpp)
+			_count_c_group(m.group(f"{kind}_tail"), counts, cpp)
+			if kind == "function":
+				stack.append("function")
+		elif kind == "classname":
+			_add(m.group("classname_word"), counts)
+			stack.append("classname")
+		elif kind == "case":
+			counts["case"] = get("case", 0) + 1
+			stack.append("case-value")
+		elif kind == "case_end":
+			stack.pop()
+		elif kind == "if0" or kind == "macro":
+			_count_c_group(m.group(f"{kind}_prefix"), counts, cpp)
+			stack.append(kind)
+		elif kind == "namespace":
+			counts["namespace"] = get("namespace", 0) + 1
+			stack.append("namespace")
+		elif kind == "namespace_end":
+			stack[-1] = "root"
+		elif kind == "enum":
+			counts["enum"] = get("enum", 0) + 1
+			stack.append("enumname")
+		elif kind == "raw":
+			delimiter = m.group("raw_delimiter")
+			if delimiter:
+				counts[delimiter] = get(delimiter, 0) + 1
+			_add(m.group("raw_text"), counts)
+			_add(')' + delimiter, counts)
+
+
+class CTokenizer(Tokenizer):
+	"""
+	Counts the words in C source code in the same way as Pygments' ``CLexer``.
+	"""
+
+	lexers = {'C': "a61de2d4c49f1f9b48394ad6b3dcfb20e6df6a6ccace921e457d9dc350c127c0"}
+
+	def count(self, source: str, counts: Dict[str, int]) -> None:  # noqa: D102
+		_count_c(source, counts)
+
+
+class CppTokenizer(Tokenizer):
+	"""
+	Counts the words in C++ source code in the same way as Pygments' ``CppLexer``.
+	"""
+
+	lexers = {"C++": "f69f74e456cb76f24ac76c2f5930031f289e0797225a3cae2283e2da5d161626"}
+
+	def count(self, source: str, counts: Dict[str, int]) -> None:  # noqa: D102
+		_count_c(source, counts, cpp=True)
+
+
+register_tokenizer(PythonTokenizer())
+register_tokenizer(JavaScriptTokenizer())
+register_tokenizer(TypeScriptTokenizer())
+register_tokenizer(CTokenizer())
+register_tokenizer(CppTokenizer())
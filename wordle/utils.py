@@ -29,6 +29,7 @@ Utility functions.
 #
 
 # stdlib
+import hashlib
 import os
 import pathlib
 import sys
@@ -41,7 +42,7 @@ from domdf_python_tools.typing import PathLike
 from dulwich.config import StackedConfig
 from southwark import clone, windows_clone_helper
 
-__all__ = ["clone_into_tmpdir"]
+__all__ = ["clone_into_tmpdir", "shard_of"]
 
 
 def clone_into_tmpdir(
@@ -49,6 +50,8 @@ def clone_into_tmpdir(
 		tmpdir: PathLike,
 		sha: Optional[str] = None,
 		depth: Optional[int] = None,
+		*,
+		bare: bool = False,
 		) -> pathlib.Path:
 	"""
 	Clone the git repository at ``git_url`` into ``tmpdir``.
@@ -58,8 +61,12 @@ def clone_into_tmpdir(
 	:param sha: An optional SHA hash of a commit to checkout.
 	:param depth: An optional depth to clone at. If :py:obj:`None` and ``sha`` is :py:obj:`None` the depth is ``1``.
 		If :py:obj:`None` and ``sha`` is given the depth is unlimited.
+	:param bare: If :py:obj:`True` a bare repository is created and no working tree is written.
+		``sha`` is then only used to determine the depth, and must be looked up in the repository by the caller.
 
 	.. versionadded:: 0.2.0
+
+	.. versionchanged:: 0.3.0  Added the ``bare`` keyword-only argument.
 	"""
 
 	if sha is None and depth is None:
@@ -73,14 +80,32 @@ def clone_into_tmpdir(
 	with windows_clone_helper():
 		with open(os.devnull, encoding="UTF-8") as devnull:
 			with redirect_stderr(devnull):
-				repo = clone(git_url, target=str(directory), depth=depth)
+				repo = clone(git_url, target=str(directory), depth=depth, bare=bare)
 
-		if sha is not None:
-			repo.reset_to(sha)
+		with repo:
+			if sha is not None and not bare:
+				repo.reset_to(sha)
 
 	return directory
 
 
+def shard_of(path: str, n_shards: int) -> int:
+	"""
+	Returns the shard (from ``0`` to ``n_shards - 1``) which the file at ``path`` belongs to.
+
+	The shard is derived from a hash of the path, so it is the same on every machine and in every run,
+	and files are spread evenly between the shards.
+
+	:param path: The path of the file relative to the root of the directory or git tree, using ``/`` as the separator.
+	:param n_shards: The total number of shards.
+
+	.. versionadded:: 0.3.0
+	"""
+
+	digest = hashlib.sha1(path.encode("UTF-8", errors="surrogateescape")).digest()  # nosec: B303
+	return int.from_bytes(digest[:8], "big") % n_shards
+
+
 class _TemporaryDirectory(tempfile.TemporaryDirectory):
 
 	def cleanup(self) -> None: